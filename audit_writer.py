@@ -0,0 +1,315 @@
+# Scriere asincronă, în loturi, a jurnalului de audit.
+#
+# log_user_activity() pune evenimentele într-o coadă din proces; un fir de execuție în fundal
+# le scrie în audit_log cu INSERT-uri pe mai multe rânduri, când lotul se umple sau după
+# un interval fix. Când baza de date nu este disponibilă, evenimentele sunt salvate într-un
+# fișier local (spool, câte un JSON pe linie) și reluate la următoarea scriere reușită.
+# Un eveniment respins de baza de date (date invalide, utilizator șters) nu blochează restul:
+# lotul este reluat rând cu rând, iar evenimentul respins ajunge în fișierul dead-letter.
+
+import atexit
+import datetime
+import json
+import os
+import queue
+import threading
+import time
+
+import psycopg2
+from psycopg2 import pool as pg_pool
+from psycopg2.extras import execute_values
+
+import database as db
+
+AUDIT_QUEUE_SIZE = int(os.environ.get('AUDIT_QUEUE_SIZE', '10000'))
+AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', '500'))
+AUDIT_FLUSH_INTERVAL = float(os.environ.get('AUDIT_FLUSH_INTERVAL', '2'))
+AUDIT_ENQUEUE_TIMEOUT = float(os.environ.get('AUDIT_ENQUEUE_TIMEOUT', '0.5'))
+AUDIT_SPOOL_PATH = os.environ.get('AUDIT_SPOOL_PATH', 'audit_spool.jsonl')
+AUDIT_DEAD_LETTER_PATH = os.environ.get('AUDIT_DEAD_LETTER_PATH', 'audit_dead_letter.jsonl')
+
+AUDIT_COLUMNS = ('user_id', 'action_type', 'table_name', 'record_id', 'action_details',
+                 'ip_address', 'user_agent', 'created_at')
+
+# Marcaje interne trimise prin coadă pentru a trezi imediat firul de scriere
+_FLUSH = object()
+_STOP = object()
+
+# Erorile după care un lot nu mai este reluat rând cu rând: baza de date nu este disponibilă
+# (inclusiv pool-ul închis sau epuizat). Celelalte erori ale bazei de date țin de conținutul
+# evenimentelor.
+CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError, pg_pool.PoolError)
+
+class AuditWriter:
+    """Scriitor în fundal pentru audit_log, cu loturi, back-pressure și spool pe disc.
+
+    Dacă coada este plină, `submit()` așteaptă cel mult `enqueue_timeout` secunde
+    (back-pressure), apoi scrie evenimentul direct în spool, ca să nu se piardă.
+    Evenimentele respinse definitiv de baza de date sunt mutate în `dead_letter_path`,
+    împreună cu eroarea; cele nescrise din orice alt motiv (conexiune, fișierul spool) rămân
+    în spool pentru reluare.
+    """
+
+    def __init__(self, queue_size=AUDIT_QUEUE_SIZE, batch_size=AUDIT_BATCH_SIZE,
+                 flush_interval=AUDIT_FLUSH_INTERVAL, enqueue_timeout=AUDIT_ENQUEUE_TIMEOUT,
+                 spool_path=AUDIT_SPOOL_PATH, dead_letter_path=AUDIT_DEAD_LETTER_PATH):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.spool_path = spool_path
+        self.dead_letter_path = dead_letter_path
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._spool_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'submitted': 0,
+            'written': 0,
+            'spooled': 0,
+            'replayed': 0,
+            'dead_lettered': 0,
+            'failed_flushes': 0,
+            'backpressure_waits': 0,
+        }
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def stats(self):
+        """Returnează contoarele scriitorului și dimensiunea curentă a cozii."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['queued'] = self._queue.qsize()
+        stats['spool_pending'] = os.path.exists(self.spool_path) or os.path.exists(self.spool_path + '.replay')
+        return stats
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self._thread.start()
+
+    def submit(self, event):
+        """Adaugă un eveniment (dicționar cu cheile din AUDIT_COLUMNS) în coadă."""
+        self.start()
+        event.setdefault('created_at', datetime.datetime.now().isoformat(sep=' '))
+        self._count('submitted')
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self._count('backpressure_waits')
+            try:
+                self._queue.put(event, timeout=self.enqueue_timeout)
+            except queue.Full:
+                self._spool([event])
+        return True
+
+    def flush(self):
+        """Cere scrierea imediată a evenimentelor din coadă și așteaptă finalizarea ei."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(_FLUSH)
+        self._queue.join()
+
+    def stop(self, timeout=10.0):
+        """Scrie evenimentele rămase și oprește firul (apelată la oprirea procesului)."""
+        if self._thread is not None and self._thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                pass
+            self._thread.join(timeout)
+
+        # Dacă firul nu a apucat să le scrie, evenimentele rămase ajung în spool
+        leftovers = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _FLUSH and item is not _STOP:
+                leftovers.append(item)
+            self._queue.task_done()
+        if leftovers:
+            self._spool(leftovers)
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            item = None
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                pass
+
+            if item is not None and item is not _FLUSH and item is not _STOP:
+                batch.append(item)
+
+            if (item is _FLUSH or item is _STOP or len(batch) >= self.batch_size
+                    or time.monotonic() >= deadline):
+                if batch:
+                    try:
+                        self._flush(batch)
+                    except Exception as e:
+                        # Nici spool-ul nu a putut fi scris; firul continuă, iar flush() nu rămâne blocat
+                        print(f"Eroare la salvarea jurnalului de audit, {len(batch)} evenimente pierdute: {str(e)}")
+                    finally:
+                        for _ in batch:
+                            self._queue.task_done()
+                    batch = []
+                elif os.path.exists(self.spool_path) or os.path.exists(self.spool_path + '.replay'):
+                    # Coadă goală, dar avem evenimente în spool: încercăm să le reluăm
+                    try:
+                        self._replay_spool()
+                    except Exception as e:
+                        print(f"Eroare la reluarea jurnalului de audit din spool: {str(e)}")
+                deadline = time.monotonic() + self.flush_interval
+
+            if item is _FLUSH or item is _STOP:
+                self._queue.task_done()
+            if item is _STOP:
+                return
+
+    def _flush(self, batch):
+        batch = list(batch)
+        try:
+            # Mai întâi evenimentele mai vechi din spool, ca ordinea să fie păstrată
+            self._replay_spool()
+            self._count('written', self._write_events(batch))
+        except Exception as e:
+            # Evenimentele respinse de baza de date au ajuns deja în dead-letter (_write_events);
+            # restul lotului nu a fost trimis sau scris și este reluat mai târziu din spool
+            self._count('failed_flushes')
+            print(f"Eroare la scrierea jurnalului de audit, evenimentele sunt salvate local: {str(e)}")
+            self._spool(batch)
+
+    def _write_events(self, events):
+        """Scrie evenimentele și returnează câte au ajuns în audit_log.
+
+        Dacă lotul este respins din cauza datelor, evenimentele sunt scrise unul câte unul,
+        iar cele respinse din nou sunt mutate în fișierul dead-letter. La o eroare de
+        conexiune excepția este propagată, iar din `events` sunt scoase cele deja scrise,
+        ca apelantul să le păstreze doar pe celelalte.
+        """
+        try:
+            self._write(events)
+            return len(events)
+        except CONNECTION_ERRORS:
+            raise
+        except psycopg2.Error as e:
+            if len(events) == 1:
+                self._dead_letter(events, e)
+                return 0
+            print(f"Lot de audit respins ({str(e).strip()}), reluat eveniment cu eveniment")
+
+        written = 0
+        while events:
+            try:
+                self._write(events[:1])
+                written += 1
+            except CONNECTION_ERRORS:
+                raise
+            except psycopg2.Error as e:
+                self._dead_letter(events[:1], e)
+            del events[0]
+        return written
+
+    def _write(self, events):
+        with db.db_cursor() as cursor:
+            execute_values(
+                cursor,
+                f"INSERT INTO audit_log ({', '.join(AUDIT_COLUMNS)}) VALUES %s",
+                [tuple(event.get(column) for column in AUDIT_COLUMNS) for event in events],
+                page_size=len(events),
+            )
+
+    def _spool(self, events):
+        with self._spool_lock:
+            with open(self.spool_path, 'a', encoding='utf-8') as f:
+                for event in events:
+                    f.write(json.dumps(event, default=str) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+        self._count('spooled', len(events))
+
+    def _dead_letter(self, events, error):
+        with self._spool_lock:
+            with open(self.dead_letter_path, 'a', encoding='utf-8') as f:
+                for event in events:
+                    f.write(json.dumps({'event': event, 'error': str(error).strip()}, default=str) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+        self._count('dead_lettered', len(events))
+        print(f"Evenimente de audit respinse, mutate în {self.dead_letter_path}: {len(events)}")
+
+    def _replay_spool(self):
+        """Scrie în baza de date evenimentele din spool, lot cu lot.
+
+        Fișierul este mutat întâi în `<spool>.replay`, astfel încât evenimentele noi
+        pot fi salvate în spool în paralel. Dacă scrierea eșuează la jumătate, în
+        fișierul de reluare rămân doar evenimentele încă nescrise. Liniile care nu pot
+        fi citite ajung, ca și evenimentele respinse, în fișierul dead-letter.
+        """
+        replay_path = self.spool_path + '.replay'
+        with self._spool_lock:
+            if not os.path.exists(replay_path):
+                if not os.path.exists(self.spool_path):
+                    return
+                os.replace(self.spool_path, replay_path)
+
+        with open(replay_path, 'r', encoding='utf-8') as f:
+            events = []
+            try:
+                while True:
+                    events = []
+                    while len(events) < self.batch_size:
+                        line = f.readline()
+                        if not line:
+                            break
+                        if not line.strip():
+                            continue
+                        try:
+                            events.append(json.loads(line))
+                        except ValueError as e:
+                            self._dead_letter([line.rstrip('\n')], e)
+                    if not events:
+                        break
+                    self._count('replayed', self._write_events(events))
+            except Exception:
+                # Evenimentele nescrise din lotul curent și restul fișierului
+                remaining = ''.join(json.dumps(event, default=str) + '\n' for event in events) + f.read()
+                tmp_path = replay_path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as out:
+                    out.write(remaining)
+                    out.flush()
+                    os.fsync(out.fileno())
+                os.replace(tmp_path, replay_path)
+                raise
+        os.remove(replay_path)
+
+_writer = AuditWriter()
+atexit.register(_writer.stop)
+
+def submit(user_id, action_type, table_name, record_id=None, action_details=None,
+           ip_address=None, user_agent=None):
+    """Pune un eveniment de audit în coada scriitorului asincron."""
+    return _writer.submit({
+        'user_id': user_id,
+        'action_type': action_type,
+        'table_name': table_name,
+        'record_id': record_id,
+        'action_details': action_details,
+        'ip_address': ip_address,
+        'user_agent': user_agent,
+    })
+
+def flush():
+    """Scrie imediat evenimentele din coadă (util înainte de rapoarte sau la teste manuale)."""
+    _writer.flush()
+
+def get_stats():
+    """Returnează statisticile scriitorului de audit, pentru monitorizare."""
+    return _writer.stats()
@@ -0,0 +1,138 @@
+# Benchmark pentru instrucțiunile pregătite din database.py (PREPARE/EXECUTE).
+#
+# Creează o schemă separată (implicit `bench_prepared`) în baza de date din DATABASE_URL,
+# aplică în ea migrațiile de schemă și indexuri, o populează cu un catalog de produse
+# (implicit 100.000) și măsoară latența per apel pentru interogările înregistrate în
+# database.PREPARED_STATEMENTS: execuție obișnuită față de execute_prepared().
+#
+#   python benchmarks/prepared_statements.py --products 100000 --iterations 200
+#
+# Rulați pe o bază de test: schema este ștearsă la final, cu excepția cazului --keep.
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from psycopg2 import sql
+
+import database as db
+
+# Migrațiile necesare pentru tabelele și indexurile folosite de interogări
+SCHEMA_MIGRATIONS = ('0001', '0003', '0004', '0007')
+
+# Parametrii cu care este apelată fiecare interogare pregătită
+BENCHMARK_PARAMS = {
+    'products': None,
+    'stock_alerts': None,
+    'user_credentials': ['bench_user_500', 'bench_user_500'],
+    'user_by_email': ['bench_user_500@example.com'],
+}
+
+def setup_schema(conn, schema, products_count):
+    with conn.cursor() as cursor:
+        cursor.execute(sql.SQL("DROP SCHEMA IF EXISTS {} CASCADE").format(sql.Identifier(schema)))
+        cursor.execute(sql.SQL("CREATE SCHEMA {}").format(sql.Identifier(schema)))
+        cursor.execute(sql.SQL("SET search_path TO {}").format(sql.Identifier(schema)))
+        for version, name, path in db.get_migrations():
+            if f"{version:04d}" in SCHEMA_MIGRATIONS:
+                with open(path, encoding='utf-8') as f:
+                    cursor.execute(f.read())
+
+        cursor.execute("""
+            INSERT INTO suppliers (name, contact_person, email, country, city)
+            SELECT 'Furnizor ' || i, 'Contact ' || i, 'furnizor' || i || '@example.com', 'China', 'Shenzhen'
+            FROM generate_series(1, 200) AS i
+        """)
+        cursor.execute("""
+            INSERT INTO products (sku, name, category, purchase_price, stock_quantity, stock_alert_threshold, supplier_id)
+            SELECT 'BENCH-' || i,
+                   'Produs ' || md5(i::text),
+                   (ARRAY['LCD Panels', 'LED Components', 'Touch Screens', 'Power Supplies'])[1 + i % 4],
+                   round((random() * 500)::numeric, 2),
+                   (random() * 100)::int,
+                   5 + i % 10,
+                   1 + i % 200
+            FROM generate_series(1, %s) AS i
+        """, [products_count])
+        cursor.execute("""
+            INSERT INTO users (username, email, password_hash, role)
+            SELECT 'bench_user_' || i, 'bench_user_' || i || '@example.com', md5(i::text), 'Vizualizator'
+            FROM generate_series(1, 1000) AS i
+        """)
+        cursor.execute("ANALYZE")
+    conn.commit()
+
+def measure(call, iterations):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000.0)
+    timings.sort()
+    return {
+        'mean': statistics.fmean(timings),
+        'p50': timings[len(timings) // 2],
+        'p95': timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+    }
+
+def run_benchmark(conn, iterations, warmup):
+    results = []
+    with conn.cursor() as cursor:
+        for name, statement in db.PREPARED_STATEMENTS.items():
+            params = BENCHMARK_PARAMS.get(name)
+
+            def plain():
+                cursor.execute(statement.query, params)
+                cursor.fetchall()
+
+            def prepared():
+                db.execute_prepared(cursor, name, params)
+                cursor.fetchall()
+
+            for call in (plain, prepared):
+                for _ in range(warmup):
+                    call()
+            conn.rollback()
+
+            results.append((name, measure(plain, iterations), measure(prepared, iterations)))
+            conn.rollback()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Latența per apel: interogări obișnuite față de instrucțiuni pregătite")
+    parser.add_argument('--products', type=int, default=100000, help="numărul de produse din catalogul de test")
+    parser.add_argument('--iterations', type=int, default=200, help="apeluri măsurate per interogare")
+    parser.add_argument('--warmup', type=int, default=10, help="apeluri de încălzire, nemăsurate")
+    parser.add_argument('--schema', default='bench_prepared', help="schema temporară folosită pentru date")
+    parser.add_argument('--keep', action='store_true', help="nu șterge schema la final")
+    args = parser.parse_args()
+
+    conn = db.get_connection()
+    try:
+        print(f"Pregătesc schema {args.schema} cu {args.products} produse...")
+        setup_schema(conn, args.schema, args.products)
+
+        results = run_benchmark(conn, args.iterations, args.warmup)
+
+        print(f"\n{'Interogare':<20} {'Obișnuită (ms)':>28} {'Pregătită (ms)':>28} {'Câștig p50':>12}")
+        print(f"{'':<20} {'medie / p50 / p95':>28} {'medie / p50 / p95':>28}")
+        for name, plain, prepared in results:
+            gain = (1 - prepared['p50'] / plain['p50']) * 100 if plain['p50'] else 0.0
+            print(f"{name:<20} "
+                  f"{plain['mean']:>10.3f} / {plain['p50']:>6.3f} / {plain['p95']:>6.3f} "
+                  f"{prepared['mean']:>10.3f} / {prepared['p50']:>6.3f} / {prepared['p95']:>6.3f} "
+                  f"{gain:>11.1f}%")
+    finally:
+        if not args.keep:
+            conn.rollback()
+            with conn.cursor() as cursor:
+                cursor.execute(sql.SQL("DROP SCHEMA IF EXISTS {} CASCADE").format(sql.Identifier(args.schema)))
+            conn.commit()
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+# Grafice pentru dashboard, randate o singură dată per versiune a datelor.
+#
+# Imaginile PNG sunt păstrate într-un cache din proces, cu cheia calculată din datele de
+# intrare și parametrii graficului; același set de date nu este randat din nou la fiecare
+# rerulare a fiecărei sesiuni. Figurile sunt create direct cu matplotlib.figure.Figure
+# (fără registrul global al pyplot) și eliberate explicit după randare.
+
+import collections
+import concurrent.futures
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+import database as db
+
+CHART_CACHE_MAX_BYTES = int(os.environ.get('CHART_CACHE_MAX_BYTES', str(16 * 1024 * 1024)))
+CHART_CACHE_MAX_ENTRIES = int(os.environ.get('CHART_CACHE_MAX_ENTRIES', '64'))
+CHART_PRERENDER = os.environ.get('CHART_PRERENDER', '1') == '1'
+
+MONTH_LABELS = ['Ian', 'Feb', 'Mar', 'Apr', 'Mai', 'Iun', 'Iul', 'Aug', 'Sep', 'Oct', 'Noi', 'Dec']
+BAR_COLORS = ['#3498db', '#2ecc71', '#e74c3c', '#f39c12']
+
+# Tabelele din care provin datele graficelor; modificarea lor declanșează pre-randarea
+CHART_TABLES = {'stock_value_by_category', 'monthly_purchases_by_supplier', 'suppliers'}
+
+class ChartCache:
+    """Cache LRU de imagini PNG, limitat ca număr de intrări și ca memorie totală.
+
+    O singură randare simultană per cheie: sesiunile care cer același grafic în timp ce
+    acesta se randează așteaptă rezultatul în loc să îl randeze și ele.
+    """
+
+    def __init__(self, max_bytes=CHART_CACHE_MAX_BYTES, max_entries=CHART_CACHE_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()  # cheie -> PNG (bytes)
+        self._rendering = {}  # cheie -> threading.Event
+        self._size = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'render_time_total': 0.0}
+
+    def get_or_render(self, key, render):
+        while True:
+            with self._lock:
+                png = self._entries.get(key)
+                if png is not None:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return png
+                rendering = self._rendering.get(key)
+                if rendering is None:
+                    rendering = self._rendering[key] = threading.Event()
+                    self._stats['misses'] += 1
+                    break
+            rendering.wait()
+
+        start = time.perf_counter()
+        try:
+            png = render()
+        finally:
+            with self._lock:
+                del self._rendering[key]
+                rendering.set()
+
+        with self._lock:
+            self._stats['render_time_total'] += time.perf_counter() - start
+            if len(png) <= self.max_bytes:
+                self._entries[key] = png
+                self._size += len(png)
+                while self._size > self.max_bytes or len(self._entries) > self.max_entries:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._size -= len(evicted)
+                    self._stats['evictions'] += 1
+        return png
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({'entries': len(self._entries), 'bytes': self._size})
+        return stats
+
+_cache = ChartCache()
+# Randarea cu matplotlib nu este sigură între fire de execuție: o serializăm
+_render_lock = threading.Lock()
+
+def _chart_key(name, data, params):
+    payload = json.dumps({'chart': name, 'data': data, 'params': params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def _figure_to_png(fig):
+    """Rasterizează figura în PNG și o eliberează explicit."""
+    try:
+        buf = io.BytesIO()
+        fig.savefig(buf, format='png', bbox_inches='tight')
+        return buf.getvalue()
+    finally:
+        fig.clear()
+
+def _draw_stock_chart(stock_by_category, figsize):
+    categories = [row['category'] for row in stock_by_category]
+    stock_values = [row['stock_value'] for row in stock_by_category]
+
+    fig = Figure(figsize=figsize)
+    ax = fig.add_subplot()
+    ax.bar(categories, stock_values, color=[BAR_COLORS[i % len(BAR_COLORS)] for i in range(len(categories))])
+    ax.set_ylabel('Valoare Stoc (Lei)')
+    ax.set_title('Valoare Stoc per Categorie')
+
+    # Adăugăm valori pe bare
+    offset = max(stock_values, default=0) * 0.02
+    for i, v in enumerate(stock_values):
+        ax.text(i, v + offset, f"{v:,.0f} Lei", ha='center')
+
+    return _figure_to_png(fig)
+
+def _draw_purchases_chart(monthly_purchases, months, max_suppliers, figsize):
+    month_starts = pd.date_range(end=datetime.now().date().replace(day=1), periods=months, freq='MS').date
+    data = pd.DataFrame(monthly_purchases, columns=['month', 'supplier_id', 'supplier_name', 'total_value', 'total_quantity'])
+    data = data.pivot_table(index='month', columns='supplier_name', values='total_value', aggfunc='sum', fill_value=0)
+    data = data.reindex(month_starts, fill_value=0)
+
+    # Păstrăm furnizorii principali, restul sunt adunați într-o singură serie
+    top_suppliers = list(data.sum().nlargest(max_suppliers).index)
+    if len(data.columns) > max_suppliers:
+        data['Alți furnizori'] = data.drop(columns=top_suppliers).sum(axis=1)
+        top_suppliers.append('Alți furnizori')
+    month_labels = [f"{MONTH_LABELS[m.month - 1]} {m:%y}" for m in month_starts]
+
+    fig = Figure(figsize=figsize)
+    ax = fig.add_subplot()
+    bottom = np.zeros(len(month_labels))
+    for supplier in top_suppliers:
+        ax.bar(month_labels, data[supplier].values, bottom=bottom, label=supplier)
+        bottom += data[supplier].values
+
+    ax.set_ylabel('Valoare Achiziții (Lei)')
+    ax.set_title('Achiziții Lunare per Furnizor')
+    if top_suppliers:
+        ax.legend()
+
+    return _figure_to_png(fig)
+
+def render_stock_chart(stock_by_category, figsize=(10, 5)):
+    """Returnează PNG-ul graficului de valoare a stocului per categorie (din cache, dacă există)."""
+    params = {'figsize': figsize}
+
+    def render():
+        with _render_lock:
+            return _draw_stock_chart(stock_by_category, figsize)
+
+    return _cache.get_or_render(_chart_key('stock', stock_by_category, params), render)
+
+def render_purchases_chart(monthly_purchases, months=6, max_suppliers=5, figsize=(10, 5)):
+    """Returnează PNG-ul graficului de achiziții lunare per furnizor (din cache, dacă există)."""
+    # Luna curentă face parte din cheie: axa lunilor se schimbă la început de lună
+    params = {'months': months, 'max_suppliers': max_suppliers, 'figsize': figsize,
+              'month': datetime.now().strftime('%Y-%m')}
+
+    def render():
+        with _render_lock:
+            return _draw_purchases_chart(monthly_purchases, months, max_suppliers, figsize)
+
+    return _cache.get_or_render(_chart_key('purchases', monthly_purchases, params), render)
+
+def get_cache_stats():
+    """Returnează statisticile cache-ului de grafice (hit-uri, randări, memorie folosită)."""
+    return _cache.stats()
+
+# Pre-randare: când se modifică tabelele agregate, graficele cu parametrii impliciți sunt
+# randate în fundal, astfel încât prima sesiune de după modificare le găsește deja în cache.
+_prerender_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='chart-prerender')
+_prerender_pending = threading.Event()
+
+def prerender_charts():
+    """Încarcă datele curente și randează graficele implicite ale dashboard-ului."""
+    _prerender_pending.clear()
+    try:
+        render_stock_chart(db.get_stock_value_by_category())
+        render_purchases_chart(db.get_monthly_purchases())
+    except Exception as e:
+        print(f"Eroare la pre-randarea graficelor: {str(e)}")
+
+def _on_table_change(table):
+    # Mai multe modificări apropiate produc o singură pre-randare
+    if (table is None or table in CHART_TABLES) and not _prerender_pending.is_set():
+        _prerender_pending.set()
+        _prerender_executor.submit(prerender_charts)
+
+if CHART_PRERENDER:
+    db.add_cache_listener(_on_table_change)
@@ -9,13 +9,10 @@ st.set_page_config(
 )
 
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
 import database as db
-import os
+import charts
+import file_server
 import time
-import io
-import base64
 from PIL import Image
 from datetime import datetime, timedelta
 
@@ -155,7 +152,8 @@ def show_dashboard():
         
         # Buton de logout
         if st.button("🚪 Deconectare", key="logout_btn"):
-            # Resetăm session state
+            # Invalidăm URL-urile de descărcare ale sesiunii și resetăm session state
+            file_server.revoke_download_session(st.session_state.get('download_session'))
             for key in list(st.session_state.keys()):
                 del st.session_state[key]
             st.session_state.authenticated = False
@@ -171,10 +169,12 @@ def show_dashboard():
     
     # Afișează conținutul paginii corespunzătoare
     if current_page == 'dashboard':
-        # Statistici generale
+        # Statisticile generale, datele graficelor și alertele de stoc sunt citite în paralel
+        data = db.load_dashboard_data(['stats', 'stock_by_category', 'monthly_purchases', 'stock_alerts'])
+        
         try:
             # Obținem statistici din baza de date
-            stats = db.get_stats()
+            stats = data.result('stats')
         except:
             # Statistici simulate pentru demonstrație
             stats = {
@@ -220,14 +220,24 @@ def show_dashboard():
         
         with col1:
             st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-            stock_chart = generate_stock_chart()
-            st.image(stock_chart, caption="Valoare Stoc per Categorie")
+            if not data.ok('stock_by_category'):
+                st.error(f"Eroare la încărcarea valorii stocului: {data.errors.get('stock_by_category')}")
+            elif not data.stock_by_category:
+                st.info("Nu există produse în stoc pentru a genera graficul.")
+            else:
+                stock_chart = charts.render_stock_chart(data.stock_by_category)
+                st.image(stock_chart, caption="Valoare Stoc per Categorie")
             st.markdown('</div>', unsafe_allow_html=True)
         
         with col2:
             st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-            purchases_chart = generate_purchases_chart()
-            st.image(purchases_chart, caption="Achiziții Lunare per Furnizor")
+            if not data.ok('monthly_purchases'):
+                st.error(f"Eroare la încărcarea achizițiilor: {data.errors.get('monthly_purchases')}")
+            elif not data.monthly_purchases:
+                st.info("Nu există achiziții în ultimele luni pentru a genera graficul.")
+            else:
+                purchases_chart = charts.render_purchases_chart(data.monthly_purchases)
+                st.image(purchases_chart, caption="Achiziții Lunare per Furnizor")
             st.markdown('</div>', unsafe_allow_html=True)
         
         # Row 3 - Alerte și Activitate Recentă
@@ -239,7 +249,7 @@ def show_dashboard():
             
             # Obținem alerte de stoc
             try:
-                low_stock_alerts = db.get_stock_alerts()
+                low_stock_alerts = data.result('stock_alerts')
             except:
                 # Date simulate pentru demonstrație
                 low_stock_alerts = [
@@ -247,18 +257,11 @@ def show_dashboard():
                     {'id': 2, 'sku': 'LCD-1005', 'name': 'LCD Display 19"', 'stock_quantity': 2, 'stock_alert_threshold': 5, 'supplier_name': 'Guangzhou LED Solutions'},
                     {'id': 3, 'sku': 'LED-2001', 'name': 'LED Backlight Module', 'stock_quantity': 4, 'stock_alert_threshold': 10, 'supplier_name': 'Hong Kong Electronics Ltd'}
                 ]
+                low_stock_alerts = pd.DataFrame(low_stock_alerts, columns=db.STOCK_ALERT_COLUMNS)
             
-            if low_stock_alerts:
-                alerts_df = pd.DataFrame([
-                    {
-                        "SKU": alert['sku'],
-                        "Produs": alert['name'],
-                        "Stoc": alert['stock_quantity'],
-                        "Limită": alert['stock_alert_threshold'],
-                        "Furnizor": alert['supplier_name']
-                    }
-                    for alert in low_stock_alerts
-                ])
+            if not low_stock_alerts.empty:
+                alerts_df = db.label_frame(low_stock_alerts, ['sku', 'name', 'stock_quantity', 'stock_alert_threshold', 'supplier_name'],
+                                           {'name': 'Produs', 'stock_alert_threshold': 'Limită'})
                 st.dataframe(alerts_df, use_container_width=True)
             else:
                 st.info("Nu există alerte de stoc în acest moment.")
@@ -298,62 +301,3 @@ def format_date(date_obj, format="%d.%m.%Y"):
             return date_obj
     return date_obj.strftime(format)
 
-def get_binary_file_downloader_html(bin_file_path, file_label):
-    with open(bin_file_path, 'rb') as f:
-        data = f.read()
-    b64 = base64.b64encode(data).decode()
-    href = f'<a href="data:application/octet-stream;base64,{b64}" download="{os.path.basename(bin_file_path)}" class="download-btn">{file_label}</a>'
-    return href
-
-# Funcții pentru generarea graficelor
-def generate_stock_chart():
-    # Simulăm date pentru grafic
-    categories = ['LCD Panels', 'LED Components', 'Touch Screens', 'Power Supplies']
-    stock_values = [45000, 32000, 18000, 12000]
-    
-    # Creăm graficul
-    fig, ax = plt.subplots(figsize=(10, 5))
-    ax.bar(categories, stock_values, color=['#3498db', '#2ecc71', '#e74c3c', '#f39c12'])
-    ax.set_ylabel('Valoare Stoc (Lei)')
-    ax.set_title('Valoare Stoc per Categorie')
-    
-    # Adăugăm valori pe bare
-    for i, v in enumerate(stock_values):
-        ax.text(i, v + 1000, f"{v} Lei", ha='center')
-    
-    # Convertim graficul la un format care poate fi afișat în Streamlit
-    buf = io.BytesIO()
-    fig.savefig(buf, format='png', bbox_inches='tight')
-    buf.seek(0)
-    
-    return buf
-
-def generate_purchases_chart():
-    # Simulăm date pentru grafic
-    months = ['Ian', 'Feb', 'Mar', 'Apr', 'Mai']
-    suppliers = ['Shenzhen Display', 'Guangzhou LED', 'Hong Kong Electronics']
-    
-    data = np.array([
-        [15000, 18000, 12000, 20000, 25000],  # Shenzhen Display
-        [8000, 10000, 15000, 12000, 9000],    # Guangzhou LED
-        [5000, 7000, 9000, 6000, 8000]        # Hong Kong Electronics
-    ])
-    
-    # Creăm graficul
-    fig, ax = plt.subplots(figsize=(10, 5))
-    
-    bottom = np.zeros(len(months))
-    for i, supplier in enumerate(suppliers):
-        ax.bar(months, data[i], bottom=bottom, label=supplier)
-        bottom += data[i]
-    
-    ax.set_ylabel('Valoare Achiziții (Lei)')
-    ax.set_title('Achiziții Lunare per Furnizor')
-    ax.legend()
-    
-    # Convertim graficul la un format care poate fi afișat în Streamlit
-    buf = io.BytesIO()
-    fig.savefig(buf, format='png', bbox_inches='tight')
-    buf.seek(0)
-    
-    return buf
\ No newline at end of file
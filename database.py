@@ -1,222 +1,900 @@
 import os
+import atexit
+import base64
+import collections
+import concurrent.futures
+import contextvars
+import csv
+import dataclasses
+import functools
+import itertools
+import json
+import logging
+import re
+import select
+import sys
+import threading
+import time
+import uuid
 import psycopg2
 import datetime
+import pandas as pd
+from contextlib import contextmanager
 from psycopg2 import sql
-from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from psycopg2 import pool as pg_pool
+from psycopg2.extensions import (
+    TRANSACTION_STATUS_IDLE,
+    TRANSACTION_STATUS_UNKNOWN,
+)
 
 # Obține detaliile de conexiune din variabilele de mediu
 DATABASE_URL = os.environ.get('DATABASE_URL')
 
+# Configurare pool de conexiuni (partajat de toate sesiunile din proces)
+DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', '1'))
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', '10'))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '10'))
+DB_POOL_HEALTHCHECK_INTERVAL = float(os.environ.get('DB_POOL_HEALTHCHECK_INTERVAL', '30'))
+
+# Instrumentare: fiecare instrucțiune executată pe conexiunile aplicației este cronometrată și
+# înregistrată într-un buffer circular (funcția din database.py, pagina apelantă, durata,
+# numărul de rânduri și timpul de așteptare după o conexiune din pool). Instrucțiunile mai
+# lente de DB_SLOW_QUERY_MS ajung și în jurnalul de interogări lente (`database.slow_queries`).
+DB_QUERY_LOG_SIZE = int(os.environ.get('DB_QUERY_LOG_SIZE', '5000'))
+DB_SLOW_QUERY_MS = float(os.environ.get('DB_SLOW_QUERY_MS', '500'))
+DB_SLOW_QUERY_LOG = os.environ.get('DB_SLOW_QUERY_LOG')
+QUERY_STATEMENT_MAX_LENGTH = 4000
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+_MODULE_GLOBALS = globals()
+# Funcțiile din acest fișier care nu sunt puncte de intrare și nu trebuie raportate ca atare
+_INSTRUMENTATION_SKIP = {'execute', 'executemany', 'copy_expert', 'cached_query', 'get_or_load', 'run'}
+
+slow_query_logger = logging.getLogger('database.slow_queries')
+if DB_SLOW_QUERY_LOG:
+    _slow_query_handler = logging.FileHandler(DB_SLOW_QUERY_LOG, encoding='utf-8')
+    _slow_query_handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    slow_query_logger.addHandler(_slow_query_handler)
+
+_query_log = collections.deque(maxlen=DB_QUERY_LOG_SIZE)
+_slow_queries = collections.deque(maxlen=200)
+# Identificator stabil al fiecărei înregistrări (lista interogărilor lente este reordonată la fiecare citire)
+_query_ids = itertools.count(1)
+_query_log_lock = threading.Lock()
+_query_caller = contextvars.ContextVar('db_query_caller', default=None)
+
+@contextmanager
+def query_caller(name):
+    """Setează explicit pagina apelantă raportată pentru interogările din acest context.
+
+    Util pentru interogările rulate în fire de execuție separate, unde pagina nu apare în stivă.
+    """
+    token = _query_caller.set(name)
+    try:
+        yield
+    finally:
+        _query_caller.reset(token)
+
+@functools.lru_cache(maxsize=1024)
+def _app_relpath(filename):
+    """Calea relativă a unui fișier din aplicație sau None pentru biblioteci externe."""
+    path = os.path.abspath(filename)
+    if not path.startswith(APP_DIR + os.sep) or 'site-packages' in path:
+        return None
+    return os.path.relpath(path, APP_DIR)
+
+def _describe_caller(frame):
+    """Determină funcția publică din database.py și pagina (fișierul aplicației) care a apelat.
+
+    Stiva este parcursă de la `frame` spre exterior.
+    """
+    function = None
+    caller = None
+    while frame is not None:
+        code = frame.f_code
+        if frame.f_globals is _MODULE_GLOBALS:
+            if not code.co_name.startswith(('_', '<')) and code.co_name not in _INSTRUMENTATION_SKIP:
+                function = code.co_name
+        else:
+            relpath = _app_relpath(code.co_filename)
+            if relpath is not None:
+                if function is None:
+                    function = f"{os.path.splitext(os.path.basename(relpath))[0]}.{code.co_name}"
+                caller = relpath
+        frame = frame.f_back
+    return function or '?', _query_caller.get() or caller
+
+def _statement_text(cursor, query):
+    if isinstance(query, sql.Composable):
+        query = query.as_string(cursor)
+    elif isinstance(query, bytes):
+        query = query.decode('utf-8', 'replace')
+    return query[:QUERY_STATEMENT_MAX_LENGTH]
+
+def _record_query(cursor, query, params, duration, failed):
+    function, caller = _describe_caller(sys._getframe(2))
+    connection = cursor.connection
+    wait = getattr(connection, 'pending_wait', 0.0)
+    if wait:
+        # Așteptarea după conexiune se atribuie primei instrucțiuni din împrumut
+        connection.pending_wait = 0.0
+    record = {
+        'function': function,
+        'caller': caller,
+        'statement': _statement_text(cursor, query),
+        'params': params,
+        'duration_ms': duration * 1000.0,
+        'rows': cursor.rowcount if cursor.rowcount >= 0 else None,
+        'wait_ms': wait * 1000.0,
+        'failed': failed,
+        'started_at': datetime.datetime.now() - datetime.timedelta(seconds=duration),
+    }
+    slow = record['duration_ms'] >= DB_SLOW_QUERY_MS
+    with _query_log_lock:
+        record['id'] = next(_query_ids)
+        _query_log.append(record)
+        if slow:
+            _slow_queries.append(record)
+    if slow:
+        slow_query_logger.warning(
+            "Interogare lentă: %.1f ms, %s rânduri, funcția %s, pagina %s: %s",
+            record['duration_ms'], record['rows'], function, caller,
+            ' '.join(record['statement'].split()),
+        )
+
+class InstrumentedCursor(psycopg2.extensions.cursor):
+    """Cursor care înregistrează durata și numărul de rânduri pentru fiecare instrucțiune."""
+
+    def _timed(self, method, query, params, *args):
+        start = time.perf_counter()
+        failed = True
+        try:
+            result = method(query, params, *args)
+            failed = False
+            return result
+        finally:
+            _record_query(self, query, params, time.perf_counter() - start, failed)
+
+    def execute(self, query, vars=None):
+        return self._timed(super().execute, query, vars)
+
+    def executemany(self, query, vars_list):
+        return self._timed(super().executemany, query, vars_list)
+
+    def copy_expert(self, sql, file, size=8192):
+        return self._timed(super().copy_expert, sql, file, size)
+
+class InstrumentedConnection(psycopg2.extensions.connection):
+    """Conexiune ale cărei cursoare sunt instrumentate implicit și care ține evidența
+    instrucțiunilor pregătite pe ea (vezi `execute_prepared`)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cursor_factory = InstrumentedCursor
+        self.pending_wait = 0.0
+        self.prepared_statements = set()  # numele instrucțiunilor pregătite pe această conexiune
+        self.prepared_generation = None
+
+def get_query_log():
+    """Returnează o copie a buffer-ului circular cu ultimele interogări înregistrate."""
+    with _query_log_lock:
+        return list(_query_log)
+
+def reset_query_log():
+    """Golește buffer-ul de interogări și lista de interogări lente."""
+    with _query_log_lock:
+        _query_log.clear()
+        _slow_queries.clear()
+
+def get_query_summary():
+    """Returnează un DataFrame cu percentilele duratei (p50/p95/p99) pentru fiecare funcție."""
+    columns = ['function', 'calls', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms', 'total_ms', 'rows_avg', 'wait_avg_ms', 'callers']
+    records = get_query_log()
+    if not records:
+        return pd.DataFrame(columns=columns)
+    
+    frame = pd.DataFrame.from_records(records, columns=['function', 'caller', 'duration_ms', 'rows', 'wait_ms'])
+    grouped = frame.groupby('function')
+    summary = grouped['duration_ms'].quantile([0.5, 0.95, 0.99]).unstack()
+    summary.columns = ['p50_ms', 'p95_ms', 'p99_ms']
+    summary['calls'] = grouped.size()
+    summary['max_ms'] = grouped['duration_ms'].max()
+    summary['total_ms'] = grouped['duration_ms'].sum()
+    summary['rows_avg'] = grouped['rows'].mean()
+    summary['wait_avg_ms'] = grouped['wait_ms'].mean()
+    summary['callers'] = grouped['caller'].agg(lambda callers: ', '.join(sorted(set(callers.dropna()))))
+    return summary.reset_index()[columns].sort_values('p95_ms', ascending=False, ignore_index=True)
+
+def get_slow_queries(limit=20):
+    """Returnează cele mai lente instrucțiuni recente, din buffer și din jurnalul de interogări lente."""
+    with _query_log_lock:
+        records = {record['id']: record for record in list(_query_log) + list(_slow_queries)}
+    return sorted(records.values(), key=lambda record: record['duration_ms'], reverse=True)[:limit]
+
+def explain_query(statement, params=None):
+    """Returnează planul de execuție (EXPLAIN, fără execuție efectivă) pentru o instrucțiune."""
+    match = re.match(r'\s*EXECUTE\s+(\w+)', statement)
+    if match and match.group(1) in PREPARED_STATEMENTS:
+        # Instrucțiunile pregătite există doar pe conexiunea lor: explicăm textul original
+        statement = PREPARED_STATEMENTS[match.group(1)].query
+    elif statement.lstrip().upper().startswith('DECLARE'):
+        # Cursoarele cu nume (citire în flux) sunt înregistrate ca DECLARE ... FOR <select>
+        statement = statement[statement.upper().index(' FOR ') + 5:]
+    with db_connection() as conn:
+        with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cursor:
+            cursor.execute("EXPLAIN " + statement, params)
+            return [row[0] for row in cursor.fetchall()]
+
 def get_connection():
-    """Creează și returnează o conexiune la baza de date."""
-    return psycopg2.connect(DATABASE_URL)
+    """Creează și returnează o conexiune dedicată, din afara pool-ului.
 
-def create_tables():
-    """Creează tabelele necesare în baza de date."""
+    Folosită doar pentru operații care modifică starea sesiunii (ex. autocommit pentru DDL).
+    Pentru interogările obișnuite folosiți `db_connection()` sau `db_cursor()`.
+    """
+    return psycopg2.connect(DATABASE_URL, connection_factory=InstrumentedConnection)
+
+class PoolTimeoutError(pg_pool.PoolError):
+    """Nu s-a putut obține o conexiune din pool în timpul de așteptare configurat."""
+
+class ConnectionPool:
+    """Pool de conexiuni thread-safe cu dimensiune minimă/maximă și verificare la împrumut.
+
+    Când toate cele `max_size` conexiuni sunt ocupate, apelantul așteaptă cel mult
+    `timeout` secunde înainte de a primi `PoolTimeoutError`. Conexiunile care au stat
+    nefolosite mai mult de `healthcheck_interval` secunde sunt verificate cu `SELECT 1`
+    înainte de a fi predate; cele căzute sunt înlocuite transparent.
+    """
+
+    def __init__(self, dsn, min_size=1, max_size=10, timeout=10.0, healthcheck_interval=30.0):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError("Dimensiuni invalide pentru pool-ul de conexiuni")
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.healthcheck_interval = healthcheck_interval
+        self._cond = threading.Condition()
+        self._idle = collections.deque()  # (conexiune, moment ultima folosire)
+        self._size = 0  # conexiuni deschise: libere + împrumutate
+        self._closed = False
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+            'connections_created': 0,
+            'connections_discarded': 0,
+            'healthcheck_failures': 0,
+        }
+        
+        for _ in range(min_size):
+            conn = self._connect()
+            with self._cond:
+                self._size += 1
+                self._idle.append((conn, time.monotonic()))
+
+    def _connect(self):
+        conn = psycopg2.connect(self.dsn, connection_factory=InstrumentedConnection)
+        with self._cond:
+            self._stats['connections_created'] += 1
+        return conn
+
+    def _is_healthy(self, conn, last_used):
+        if conn.closed or conn.get_transaction_status() == TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if time.monotonic() - last_used < self.healthcheck_interval:
+            return True
+        try:
+            # Cursor simplu: verificarea internă nu apare în jurnalul de interogări
+            with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def getconn(self):
+        """Împrumută o conexiune; blochează cel mult `timeout` secunde dacă pool-ul e plin."""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        waited = False
+        
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise pg_pool.PoolError("Pool-ul de conexiuni este închis")
+                if self._idle:
+                    # LIFO: refolosim conexiunea cea mai recentă, care e cel mai probabil validă
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    # Rezervăm locul acum, deschidem conexiunea în afara lock-ului
+                    self._size += 1
+                    conn, last_used = None, None
+                    break
+                if not waited:
+                    waited = True
+                    self._stats['waits'] += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeoutError(
+                        f"Nicio conexiune disponibilă după {self.timeout:.1f}s "
+                        f"(maxim {self.max_size} conexiuni)"
+                    )
+                self._cond.wait(remaining)
+            
+            wait_time = time.monotonic() - start
+            self._stats['checkouts'] += 1
+            self._stats['wait_time_total'] += wait_time
+            self._stats['wait_time_max'] = max(self._stats['wait_time_max'], wait_time)
+        
+        if conn is not None and not self._is_healthy(conn, last_used):
+            self._close_quietly(conn)
+            with self._cond:
+                self._stats['healthcheck_failures'] += 1
+                self._stats['connections_discarded'] += 1
+            conn = None
+        
+        if conn is None:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+        
+        return conn
+
+    def putconn(self, conn, discard=False):
+        """Returnează o conexiune în pool; tranzacțiile rămase deschise sunt anulate."""
+        if not discard and not conn.closed:
+            status = conn.get_transaction_status()
+            if status == TRANSACTION_STATUS_UNKNOWN:
+                discard = True
+            elif status != TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    discard = True
+        
+        with self._cond:
+            if discard or conn.closed or self._closed:
+                self._size -= 1
+                self._stats['connections_discarded'] += 1
+                keep = False
+            else:
+                self._idle.append((conn, time.monotonic()))
+                keep = True
+            self._cond.notify()
+        
+        if not keep:
+            self._close_quietly(conn)
+
+    def stats(self):
+        """Returnează un instantaneu al contoarelor pool-ului, pentru monitorizare."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+            })
+        return stats
+
+    def closeall(self):
+        """Închide toate conexiunile libere; cele împrumutate se închid la returnare."""
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            self._close_quietly(conn)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Returnează pool-ul de conexiuni al procesului, creându-l la prima utilizare."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    DATABASE_URL,
+                    min_size=DB_POOL_MIN_SIZE,
+                    max_size=DB_POOL_MAX_SIZE,
+                    timeout=DB_POOL_TIMEOUT,
+                    healthcheck_interval=DB_POOL_HEALTHCHECK_INTERVAL,
+                )
+    return _pool
+
+def close_pool():
+    """Închide pool-ul de conexiuni (apelată automat la oprirea procesului)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+atexit.register(close_pool)
+
+def get_pool_stats():
+    """Returnează statisticile pool-ului (împrumuturi, așteptări, expirări etc.)."""
+    return get_pool().stats()
+
+_statement_timeout = contextvars.ContextVar('db_statement_timeout', default=None)
+
+@contextmanager
+def statement_timeout(milliseconds):
+    """Limitează durata fiecărei instrucțiuni rulate prin `db_connection()` în acest context."""
+    token = _statement_timeout.set(int(milliseconds))
+    try:
+        yield
+    finally:
+        _statement_timeout.reset(token)
+
+@contextmanager
+def db_connection():
+    """Împrumută o conexiune din pool pentru o unitate de lucru.
     
+    La ieșirea normală se face commit, la excepție rollback; conexiunile
+    stricate (eroare de rețea, server repornit) nu mai sunt returnate în pool.
+    """
+    pool = get_pool()
+    start = time.perf_counter()
+    conn = pool.getconn()
+    conn.pending_wait = time.perf_counter() - start
+    discard = False
+    try:
+        timeout = _statement_timeout.get()
+        if timeout is not None:
+            with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cursor:
+                cursor.execute("SELECT set_config('statement_timeout', %s, true)", [str(timeout)])
+        yield conn
+        conn.commit()
+    except BaseException as e:
+        if conn.closed or isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError)):
+            discard = True
+        else:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                discard = True
+        raise
+    finally:
+        pool.putconn(conn, discard=discard)
+
+@contextmanager
+def db_cursor():
+    """Scurtătură pentru `db_connection()` care oferă direct un cursor."""
+    with db_connection() as conn:
+        with conn.cursor() as cursor:
+            yield cursor
+
+# Cache de citire partajat de toate sesiunile din proces. Intrările sunt etichetate cu tabelele
+# din care provin și sunt invalidate de notificările `table_changes` trimise de triggere
+# (vezi migrations/0005_notificari_cache.sql); TTL-ul și numărul maxim de intrări sunt limite
+# suplimentare. Cât timp conexiunea LISTEN nu este activă, cache-ul este ocolit.
+DB_CACHE_TTL = float(os.environ.get('DB_CACHE_TTL', '300'))
+DB_CACHE_MAX_ENTRIES = int(os.environ.get('DB_CACHE_MAX_ENTRIES', '256'))
+CACHE_NOTIFY_CHANNEL = 'table_changes'
+
+class ReadCache:
+    """Cache TTL + LRU cu invalidare pe tabele și o singură încărcare simultană per cheie.
+
+    Valorile returnate sunt partajate între sesiuni și nu trebuie modificate de apelanți.
+    """
+
+    def __init__(self, ttl=DB_CACHE_TTL, max_entries=DB_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()  # cheie -> (expiră_la, tabele, valoare)
+        self._loading = {}  # cheie -> threading.Event pentru încărcarea în curs
+        self._versions = collections.Counter()  # tabel -> număr de invalidări
+        self._epoch = 0  # crește la fiecare golire completă
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'bypassed': 0, 'invalidations': 0, 'evictions': 0}
+
+    def get_or_load(self, key, tables, loader):
+        """Returnează valoarea din cache pentru `key` sau o încarcă prin `loader()`."""
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return entry[2]
+                loading = self._loading.get(key)
+                if loading is None:
+                    loading = self._loading[key] = threading.Event()
+                    versions = (self._epoch, [self._versions[table] for table in tables])
+                    self._stats['misses'] += 1
+                    break
+            # Altă sesiune încarcă deja aceeași cheie - așteptăm rezultatul ei
+            loading.wait()
+
+        try:
+            value = loader()
+        finally:
+            with self._lock:
+                del self._loading[key]
+                loading.set()
+
+        with self._lock:
+            # Dacă tabelele s-au schimbat între timp, rezultatul poate fi deja vechi: nu îl păstrăm
+            if versions == (self._epoch, [self._versions[table] for table in tables]):
+                self._entries[key] = (time.monotonic() + self.ttl, tuple(tables), value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._stats['evictions'] += 1
+        return value
+
+    def invalidate(self, table=None):
+        """Elimină intrările care depind de `table` (sau toate intrările, dacă lipsește)."""
+        with self._lock:
+            if table is None:
+                self._epoch += 1
+                self._entries.clear()
+            else:
+                self._versions[table] += 1
+                for key in [k for k, entry in self._entries.items() if table in entry[1]]:
+                    del self._entries[key]
+            self._stats['invalidations'] += 1
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(table)
+            except Exception as e:
+                print(f"Eroare în funcția de notificare a cache-ului: {str(e)}")
+
+    def add_listener(self, callback):
+        """Înregistrează o funcție apelată cu numele tabelului la fiecare invalidare."""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def count_bypass(self):
+        with self._lock:
+            self._stats['bypassed'] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        return stats
+
+class ChangeListener(threading.Thread):
+    """Fir de execuție care ascultă canalul `table_changes` pe o conexiune dedicată.
+
+    La fiecare (re)conectare golește cache-ul, deoarece notificările trimise cât timp
+    conexiunea a fost căzută s-au pierdut.
+    """
+
+    def __init__(self, cache, channel=CACHE_NOTIFY_CHANNEL, poll_timeout=5.0):
+        super().__init__(name='db-change-listener', daemon=True)
+        self.cache = cache
+        self.channel = channel
+        self.poll_timeout = poll_timeout
+        self.connected = threading.Event()
+
+    def run(self):
+        backoff = 1.0
+        while True:
+            conn = None
+            try:
+                conn = get_connection()
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self.channel)))
+                # Cât timp am fost deconectați s-ar fi putut aplica migrații
+                mark_schema_changed()
+                self.cache.invalidate()
+                self.connected.set()
+                backoff = 1.0
+                while True:
+                    if select.select([conn], [], [], self.poll_timeout) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        if notify.payload == SCHEMA_CHANGE_PAYLOAD:
+                            mark_schema_changed()
+                            self.cache.invalidate()
+                        else:
+                            self.cache.invalidate(notify.payload or None)
+            except Exception as e:
+                print(f"Eroare la ascultarea notificărilor de modificare: {str(e)}")
+            finally:
+                self.connected.clear()
+                self.cache.invalidate()
+                if conn is not None and not conn.closed:
+                    conn.close()
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 60.0)
+
+_cache = ReadCache()
+_change_listener = None
+_change_listener_lock = threading.Lock()
+
+def _ensure_change_listener():
+    global _change_listener
+    if _change_listener is None:
+        with _change_listener_lock:
+            if _change_listener is None:
+                _change_listener = ChangeListener(_cache)
+                _change_listener.start()
+    return _change_listener
+
+def cached_query(key, tables, loader):
+    """Rulează `loader()` prin cache-ul procesului; `tables` sunt tabelele citite de interogare."""
+    if not _ensure_change_listener().connected.is_set():
+        _cache.count_bypass()
+        return loader()
+    return _cache.get_or_load(key, tables, loader)
+
+def invalidate_cache(table=None):
+    """Invalidează manual intrările din cache pentru `table` (sau tot cache-ul)."""
+    _cache.invalidate(table)
+
+def add_cache_listener(callback):
+    """Înregistrează o funcție apelată la fiecare invalidare, cu numele tabelului (None = tot)."""
+    _cache.add_listener(callback)
+
+def get_cache_stats():
+    """Returnează statisticile cache-ului de citire (hit-uri, miss-uri, invalidări)."""
+    stats = _cache.stats()
+    stats['listening'] = _change_listener is not None and _change_listener.connected.is_set()
+    return stats
+
+# Instrucțiuni pregătite (PREPARE/EXECUTE) pentru interogările repetate des, ca PostgreSQL să nu
+# le analizeze și planifice la fiecare apel. Fiecare conexiune își pregătește instrucțiunile la
+# prima folosire; după o migrare (notificarea de schemă de pe canalul `table_changes`) sau dacă
+# serverul respinge planul păstrat, instrucțiunile sunt pregătite din nou.
+SCHEMA_CHANGE_PAYLOAD = '*schema*'
+PREPARED_RETRY_PGCODES = ('0A000', '26000')  # plan cu alt tip de rezultat / instrucțiune inexistentă
+
+class PreparedStatement:
+    """O interogare cu parametri `%s`, convertită pentru PREPARE (parametri `$1`, `$2`, ...)."""
+
+    def __init__(self, name, query):
+        if '%%' in query or '%(' in query:
+            raise ValueError(f"Interogarea pregătită {name} poate folosi doar parametri %s")
+        parts = query.split('%s')
+        self.name = name
+        self.query = query
+        self.param_count = len(parts) - 1
+        self.prepare_sql = f"PREPARE {name} AS " + ''.join(
+            part + (f"${i}" if i <= self.param_count else '') for i, part in enumerate(parts, start=1)
+        )
+        self.execute_sql = f"EXECUTE {name}" + (f" ({', '.join(['%s'] * self.param_count)})" if self.param_count else '')
+
+PREPARED_STATEMENTS = {}
+_schema_generation = 0
+
+def register_prepared(name, query):
+    """Înregistrează o interogare care va fi executată prin `execute_prepared(cursor, name, ...)`."""
+    PREPARED_STATEMENTS[name] = PreparedStatement(name, query)
+    return name
+
+def mark_schema_changed():
+    """Marchează instrucțiunile pregătite pe toate conexiunile procesului ca fiind expirate."""
+    global _schema_generation
+    _schema_generation += 1
+
+def execute_prepared(cursor, name, params=None):
+    """Execută instrucțiunea înregistrată `name`, pregătind-o pe conexiune la prima folosire.
+
+    Dacă serverul nu mai recunoaște instrucțiunea sau planul ei (schemă modificată) și
+    tranzacția abia începe, instrucțiunea este pregătită din nou și executată încă o dată.
+    """
+    statement = PREPARED_STATEMENTS[name]
+    conn = cursor.connection
+    prepared = getattr(conn, 'prepared_statements', None)
+    if prepared is None:
+        # Conexiune fără registru (creată în afara aplicației): execuție obișnuită
+        return cursor.execute(statement.query, params)
+    
+    if conn.prepared_generation != _schema_generation:
+        if prepared:
+            cursor.execute("DEALLOCATE ALL")
+            prepared.clear()
+        conn.prepared_generation = _schema_generation
+    
+    can_retry = conn.get_transaction_status() == TRANSACTION_STATUS_IDLE
+    while True:
+        if name not in prepared:
+            cursor.execute(statement.prepare_sql)
+            prepared.add(name)
+        try:
+            return cursor.execute(statement.execute_sql, params)
+        except psycopg2.Error as e:
+            if e.pgcode not in PREPARED_RETRY_PGCODES:
+                raise
+            prepared.discard(name)
+            if not can_retry:
+                raise
+            can_retry = False
+            conn.rollback()
+            if e.pgcode == '0A000':
+                cursor.execute(f"DEALLOCATE {name}")
+
+# Migrațiile de schemă sunt fișiere SQL numerotate (NNNN_descriere.sql), aplicate în ordine
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+MIGRATIONS_LOCK_KEY = 48151623  # cheie pg_advisory_lock, ca două procese să nu migreze simultan
+
+def get_migrations():
+    """Returnează lista migrațiilor disponibile ca tupluri (versiune, nume, cale), ordonate."""
+    migrations = []
+    for file_name in os.listdir(MIGRATIONS_DIR):
+        base, extension = os.path.splitext(file_name)
+        version, _, name = base.partition('_')
+        if extension != '.sql' or not version.isdigit():
+            continue
+        migrations.append((int(version), name, os.path.join(MIGRATIONS_DIR, file_name)))
+    migrations.sort()
+    
+    versions = [m[0] for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Versiuni de migrare duplicate în {MIGRATIONS_DIR}")
+    return migrations
+
+def run_migrations():
+    """Aplică migrațiile care nu au fost încă rulate și returnează versiunile aplicate.
+    
+    Fiecare migrare rulează în propria tranzacție, împreună cu înregistrarea ei
+    în `schema_migrations`; o migrare eșuată nu lasă schema pe jumătate modificată.
+    """
+    applied_now = []
     conn = get_connection()
-    conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
-    cursor = conn.cursor()
-    
-    # Tabelul utilizatori
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS users (
-        id SERIAL PRIMARY KEY,
-        username VARCHAR(50) UNIQUE NOT NULL,
-        email VARCHAR(100) UNIQUE NOT NULL,
-        password_hash VARCHAR(255) NOT NULL,
-        role VARCHAR(20) NOT NULL,
-        is_active BOOLEAN DEFAULT TRUE,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        last_login TIMESTAMP
-    )
-    ''')
-    
-    # Tabelul furnizori
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS suppliers (
-        id SERIAL PRIMARY KEY,
-        name VARCHAR(100) NOT NULL,
-        contact_person VARCHAR(100),
-        email VARCHAR(100),
-        phone VARCHAR(20),
-        country VARCHAR(50) DEFAULT 'China',
-        city VARCHAR(50),
-        address TEXT,
-        postal_code VARCHAR(20),
-        tax_id VARCHAR(50),
-        ce_certification BOOLEAN DEFAULT FALSE,
-        rohs_certification BOOLEAN DEFAULT FALSE,
-        notes TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    ''')
-    
-    # Tabelul produse
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS products (
-        id SERIAL PRIMARY KEY,
-        sku VARCHAR(50) UNIQUE NOT NULL,
-        name VARCHAR(100) NOT NULL,
-        description TEXT,
-        category VARCHAR(50),
-        supplier_id INTEGER REFERENCES suppliers(id),
-        purchase_price DECIMAL(10, 2),
-        stock_quantity INTEGER DEFAULT 0,
-        stock_alert_threshold INTEGER DEFAULT 5,
-        image_path VARCHAR(255),
-        dimensions VARCHAR(50),
-        weight DECIMAL(8, 2),
-        technical_specs TEXT,
-        last_purchase_date TIMESTAMP,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    ''')
-    
-    # Tabelul intrări stoc
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS stock_entries (
-        id SERIAL PRIMARY KEY,
-        product_id INTEGER REFERENCES products(id),
-        quantity INTEGER NOT NULL,
-        unit_price DECIMAL(10, 2) NOT NULL,
-        supplier_id INTEGER REFERENCES suppliers(id),
-        entry_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        invoice_number VARCHAR(50),
-        notes TEXT
-    )
-    ''')
-    
-    # Tabelul documente
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS documents (
-        id SERIAL PRIMARY KEY,
-        title VARCHAR(100) NOT NULL,
-        file_name VARCHAR(255) NOT NULL,
-        file_path VARCHAR(255) NOT NULL,
-        file_size INTEGER NOT NULL,
-        category VARCHAR(50) NOT NULL,
-        supplier_id INTEGER REFERENCES suppliers(id),
-        product_id INTEGER REFERENCES products(id),
-        upload_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        uploaded_by INTEGER REFERENCES users(id)
-    )
-    ''')
-    
-    # Tabelul jurnal audit
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS audit_log (
-        id SERIAL PRIMARY KEY,
-        user_id INTEGER REFERENCES users(id),
-        action_type VARCHAR(50) NOT NULL,
-        table_name VARCHAR(50) NOT NULL,
-        record_id INTEGER,
-        action_details TEXT,
-        ip_address VARCHAR(50),
-        user_agent TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    ''')
-    
-    cursor.close()
-    conn.close()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(%s)", [MIGRATIONS_LOCK_KEY])
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    name VARCHAR(255) NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            conn.commit()
+            
+            cursor.execute("SELECT version FROM schema_migrations")
+            applied = {row[0] for row in cursor.fetchall()}
+            
+            for version, name, path in get_migrations():
+                if version in applied:
+                    continue
+                with open(path, encoding='utf-8') as f:
+                    migration_sql = f.read()
+                try:
+                    cursor.execute(migration_sql)
+                    cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", [version, name])
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    print(f"Eroare la aplicarea migrării {version:04d}_{name}")
+                    raise
+                applied_now.append(version)
+                print(f"Migrare aplicată: {version:04d}_{name}")
+            
+            if applied_now:
+                # Celelalte procese își pregătesc din nou instrucțiunile și își golesc cache-ul
+                cursor.execute("SELECT pg_notify(%s, %s)", [CACHE_NOTIFY_CHANNEL, SCHEMA_CHANGE_PAYLOAD])
+                mark_schema_changed()
+            
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [MIGRATIONS_LOCK_KEY])
+            conn.commit()
+    finally:
+        conn.close()
+    
+    return applied_now
+
+def create_tables():
+    """Creează sau actualizează schema bazei de date (rulează migrațiile)."""
+    return run_migrations()
 
 def insert_sample_data():
     """Inserează date demonstrative în tabele."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    # Inserare utilizator admin
-    cursor.execute('''
-    INSERT INTO users (username, email, password_hash, role) 
-    VALUES ('admin', 'admin@example.com', '$2y$10$AbC123XyZ456DefGhI789O1234567890123456789012345678901234', 'Admin')
-    ON CONFLICT (username) DO NOTHING
-    ''')
-    
-    # Inserare furnizori
-    cursor.execute('''
-    INSERT INTO suppliers (name, contact_person, email, phone, country, city, ce_certification, rohs_certification) 
-    VALUES 
-    ('Shenzhen Display Tech', 'Li Wei', 'contact@szdisplay.com', '+86 12345678', 'China', 'Shenzhen', TRUE, TRUE),
-    ('Guangzhou LED Solutions', 'Zhang Min', 'info@gzled.cn', '+86 87654321', 'China', 'Guangzhou', TRUE, FALSE),
-    ('Hong Kong Electronics Ltd', 'John Chen', 'sales@hkel.hk', '+852 23456789', 'Hong Kong', 'Kowloon', TRUE, TRUE)
-    ON CONFLICT DO NOTHING
-    ''')
-    
-    # Obține ID-urile furnizorilor
-    cursor.execute("SELECT id FROM suppliers LIMIT 3")
-    supplier_ids = [row[0] for row in cursor.fetchall()]
-    
-    if supplier_ids:
-        # Inserare produse
-        for i, supplier_id in enumerate(supplier_ids):
-            cursor.execute('''
-            INSERT INTO products (sku, name, description, category, supplier_id, purchase_price, stock_quantity, stock_alert_threshold, image_path) 
-            VALUES 
-            (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (sku) DO NOTHING
-            ''', [
-                f'LCD-{1000+i}', 
-                f'LCD Display {15+i}"', 
-                f'High quality LCD display, {15+i} inch, HD resolution', 
-                'LCD Panels', 
-                supplier_id, 
-                100.00 + (i * 50), 
-                10 + i, 
-                5,
-                f'product_images/lcd_{15+i}_inch.jpg'  # Cale pentru imaginea produsului
-            ])
+    with db_cursor() as cursor:
+        # Inserare utilizator admin
+        cursor.execute('''
+        INSERT INTO users (username, email, password_hash, role) 
+        VALUES ('admin', 'admin@example.com', '$2y$10$AbC123XyZ456DefGhI789O1234567890123456789012345678901234', 'Admin')
+        ON CONFLICT (username) DO NOTHING
+        ''')
         
-        # Verifică dacă produsele au fost inserate
-        cursor.execute("SELECT id FROM products LIMIT 3")
-        product_ids = [row[0] for row in cursor.fetchall()]
+        # Inserare furnizori
+        cursor.execute('''
+        INSERT INTO suppliers (name, contact_person, email, phone, country, city, ce_certification, rohs_certification) 
+        VALUES 
+        ('Shenzhen Display Tech', 'Li Wei', 'contact@szdisplay.com', '+86 12345678', 'China', 'Shenzhen', TRUE, TRUE),
+        ('Guangzhou LED Solutions', 'Zhang Min', 'info@gzled.cn', '+86 87654321', 'China', 'Guangzhou', TRUE, FALSE),
+        ('Hong Kong Electronics Ltd', 'John Chen', 'sales@hkel.hk', '+852 23456789', 'Hong Kong', 'Kowloon', TRUE, TRUE)
+        ON CONFLICT DO NOTHING
+        ''')
         
-        if product_ids and supplier_ids:
-            # Inserare intrări stoc
-            for i, product_id in enumerate(product_ids):
+        # Obține ID-urile furnizorilor
+        cursor.execute("SELECT id FROM suppliers LIMIT 3")
+        supplier_ids = [row[0] for row in cursor.fetchall()]
+        
+        if supplier_ids:
+            # Inserare produse
+            for i, supplier_id in enumerate(supplier_ids):
                 cursor.execute('''
-                INSERT INTO stock_entries (product_id, quantity, unit_price, supplier_id, invoice_number) 
-                VALUES (%s, %s, %s, %s, %s)
+                INSERT INTO products (sku, name, description, category, supplier_id, purchase_price, stock_quantity, stock_alert_threshold, image_path) 
+                VALUES 
+                (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (sku) DO NOTHING
                 ''', [
-                    product_id, 
+                    f'LCD-{1000+i}', 
+                    f'LCD Display {15+i}"', 
+                    f'High quality LCD display, {15+i} inch, HD resolution', 
+                    'LCD Panels', 
+                    supplier_id, 
+                    100.00 + (i * 50), 
                     10 + i, 
-                    95.00 + (i * 45), 
-                    supplier_ids[i % len(supplier_ids)],
-                    f'INV-2025-{1000+i}'
+                    5,
+                    f'product_images/lcd_{15+i}_inch.jpg'  # Cale pentru imaginea produsului
                 ])
             
-            # Inserare documente
-            for i, supplier_id in enumerate(supplier_ids):
-                cursor.execute('''
-                INSERT INTO documents (title, file_name, file_path, file_size, category, supplier_id, upload_date, uploaded_by)
-                VALUES (%s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP, 1)
-                ''', [
-                    f'Factură {i+1}',
-                    f'invoice_{i+1}.pdf',
-                    f'uploaded_documents/invoice_{i+1}.pdf',
-                    1024 * (i+1),  # Simulăm dimensiunea fișierului
-                    'Factură',
-                    supplier_id
-                ])
+            # Verifică dacă produsele au fost inserate
+            cursor.execute("SELECT id FROM products LIMIT 3")
+            product_ids = [row[0] for row in cursor.fetchall()]
+            
+            if product_ids and supplier_ids:
+                # Inserare intrări stoc
+                for i, product_id in enumerate(product_ids):
+                    cursor.execute('''
+                    INSERT INTO stock_entries (product_id, quantity, unit_price, supplier_id, invoice_number) 
+                    VALUES (%s, %s, %s, %s, %s)
+                    ''', [
+                        product_id, 
+                        10 + i, 
+                        95.00 + (i * 45), 
+                        supplier_ids[i % len(supplier_ids)],
+                        f'INV-2025-{1000+i}'
+                    ])
                 
-                if i < len(product_ids):
+                # Inserare documente
+                for i, supplier_id in enumerate(supplier_ids):
                     cursor.execute('''
-                    INSERT INTO documents (title, file_name, file_path, file_size, category, product_id, upload_date, uploaded_by)
+                    INSERT INTO documents (title, file_name, file_path, file_size, category, supplier_id, upload_date, uploaded_by)
                     VALUES (%s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP, 1)
                     ''', [
-                        f'Specificații Tehnice Produs {i+1}',
-                        f'specs_{i+1}.pdf',
-                        f'uploaded_documents/specs_{i+1}.pdf',
-                        512 * (i+1),  # Simulăm dimensiunea fișierului
-                        'Specificații',
-                        product_ids[i]
+                        f'Factură {i+1}',
+                        f'invoice_{i+1}.pdf',
+                        f'uploaded_documents/invoice_{i+1}.pdf',
+                        1024 * (i+1),  # Simulăm dimensiunea fișierului
+                        'Factură',
+                        supplier_id
                     ])
-    
-    conn.commit()
-    cursor.close()
-    conn.close()
+                    
+                    if i < len(product_ids):
+                        cursor.execute('''
+                        INSERT INTO documents (title, file_name, file_path, file_size, category, product_id, upload_date, uploaded_by)
+                        VALUES (%s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP, 1)
+                        ''', [
+                            f'Specificații Tehnice Produs {i+1}',
+                            f'specs_{i+1}.pdf',
+                            f'uploaded_documents/specs_{i+1}.pdf',
+                            512 * (i+1),  # Simulăm dimensiunea fișierului
+                            'Specificații',
+                            product_ids[i]
+                        ])
 
 def save_product_image(product_id, file_data, file_name):
     """Salvează imaginea produsului pe disc și actualizează calea în baza de date."""
@@ -234,120 +912,150 @@ def save_product_image(product_id, file_data, file_name):
     with open(file_path, "wb") as f:
         f.write(file_data)
     
-    # Actualizăm calea imaginii în baza de date
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE products SET image_path = %s WHERE id = %s", [file_path, product_id])
-    conn.commit()
-    cursor.close()
-    conn.close()
+    # Generăm miniaturile acum, ca afișarea catalogului să nu mai decodeze imaginea
+    import thumbnails
+    image_hash = thumbnails.content_hash(file_data)
+    try:
+        thumbnails.create_thumbnails(file_data, image_hash)
+    except Exception as e:
+        # Miniaturile vor fi generate la prima afișare, din fișierul salvat
+        print(f"Eroare la generarea miniaturilor: {str(e)}")
+    
+    # Actualizăm calea și hash-ul imaginii în baza de date
+    with db_cursor() as cursor:
+        cursor.execute("UPDATE products SET image_path = %s, image_hash = %s WHERE id = %s",
+                       [file_path, image_hash, product_id])
     
     return file_path
 
 def save_document(title, file_name, file_data, category, supplier_id=None, product_id=None, notes=None, user_id=1):
-    """Salvează un document în baza de date și pe disc."""
-    # Creăm directorul pentru documente dacă nu există
-    doc_dir = "uploaded_documents"
-    if not os.path.exists(doc_dir):
-        os.makedirs(doc_dir)
-    
-    # Generăm un nume de fișier unic pentru a evita suprascrierea
-    file_extension = os.path.splitext(file_name)[1]
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    new_file_name = f"{timestamp}_{file_name}"
-    file_path = os.path.join(doc_dir, new_file_name)
-    
-    # Salvăm fișierul pe disc
-    with open(file_path, "wb") as f:
-        f.write(file_data)
-    
-    # Obținem dimensiunea fișierului
-    file_size = os.path.getsize(file_path)
-    
-    # Inserăm înregistrarea în baza de date
-    conn = get_connection()
-    cursor = conn.cursor()
-    
+    """Salvează un document în depozitul adresat după conținut (vezi document_store.py).
+
+    `file_data` poate fi bytes sau un fișier binar deschis, citit în bucăți (fără a fi
+    încărcat în memorie). Un conținut identic cu al unui document existent nu este scris
+    din nou pe disc. Ridică document_store.DocumentQuotaError dacă fișierul depășește
+    limitele categoriei. Returnează {'id', 'file_path', 'content_hash', 'file_size',
+    'deduplicated'} sau None la eroare.
+    """
+    import document_store
     try:
-        cursor.execute("""
-            INSERT INTO documents (title, file_name, file_path, file_size, category, 
-                                supplier_id, product_id, upload_date, uploaded_by)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP, %s)
-            RETURNING id
-        """, [title, new_file_name, file_path, file_size, category, supplier_id, product_id, user_id])
-        
-        result = cursor.fetchone()
-        document_id = result[0] if result else None
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
-        
-        return {"id": document_id, "file_path": file_path}
+        return document_store.store_document(title, file_name, file_data, category,
+                                             supplier_id, product_id, user_id)
+    except document_store.DocumentQuotaError:
+        raise
     except Exception as e:
-        conn.rollback()
-        cursor.close()
-        conn.close()
         print(f"Eroare la salvarea documentului: {str(e)}")
         return None
 
-def get_documents(supplier_id=None, product_id=None, category=None, limit=None):
-    """Returnează lista de documente cu filtrare opțională."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    query = "SELECT id, title, file_name, file_path, file_size, category, supplier_id, product_id, upload_date, uploaded_by FROM documents WHERE 1=1"
-    params = []
+# Lista de documente, cu numele furnizorului și al produsului asociat într-o singură interogare
+DOCUMENTS_SELECT = """
+    SELECT 
+        d.id, d.title, d.file_name, d.file_path, d.file_size, d.category,
+        d.supplier_id, d.product_id, d.upload_date, d.uploaded_by,
+        s.name AS supplier_name, p.name AS product_name, d.content_hash
+    FROM 
+        documents d
+    LEFT JOIN 
+        suppliers s ON d.supplier_id = s.id
+    LEFT JOIN 
+        products p ON d.product_id = p.id
+"""
+
+def _document_from_row(row):
+    document = {
+        'id': row[0],
+        'title': row[1],
+        'file_name': row[2],
+        'file_path': row[3],
+        'file_size': row[4],
+        'category': row[5],
+        'supplier_id': row[6],
+        'product_id': row[7],
+        'upload_date': row[8],
+        'uploaded_by': row[9]
+    }
+    # Rândurile din DOCUMENTS_SELECT au și numele furnizorului și al produsului și hash-ul conținutului
+    if len(row) > 10:
+        document['supplier_name'] = row[10]
+        document['product_name'] = row[11]
+        document['content_hash'] = row[12]
+    return document
+
+def _document_filters(supplier_id=None, product_id=None, category=None, start_date=None, end_date=None):
+    """Condițiile comune listei și căutării de documente (parametri cu nume)."""
+    filters = ""
+    params = {}
     
     if supplier_id:
-        query += " AND supplier_id = %s"
-        params.append(supplier_id)
+        filters += " AND d.supplier_id = %(supplier_id)s"
+        params['supplier_id'] = supplier_id
     
     if product_id:
-        query += " AND product_id = %s"
-        params.append(product_id)
+        filters += " AND d.product_id = %(product_id)s"
+        params['product_id'] = product_id
     
     if category:
-        query += " AND category = %s"
-        params.append(category)
+        filters += " AND d.category = %(category)s"
+        params['category'] = category
+    
+    if start_date:
+        filters += " AND d.upload_date >= %(start_date)s"
+        params['start_date'] = start_date
+    
+    if end_date:
+        filters += " AND d.upload_date < %(end_date)s"
+        params['end_date'] = end_date
+    
+    return filters, params
+
+def _documents_query(supplier_id=None, product_id=None, category=None, start_date=None, end_date=None,
+                     limit=None, after=None):
+    """Construiește interogarea pentru get_documents/get_documents_page (folosită și de check_query_indexes)."""
+    filters, params = _document_filters(supplier_id, product_id, category, start_date, end_date)
+    query = DOCUMENTS_SELECT + " WHERE TRUE" + filters
     
-    query += " ORDER BY upload_date DESC"
+    if after:
+        query += " AND (d.upload_date, d.id) < (%(after_date)s, %(after_id)s)"
+        params['after_date'], params['after_id'] = _decode_cursor(after, datetime.datetime, int)
+    
+    query += " ORDER BY d.upload_date DESC, d.id DESC"
     
     if limit:
-        query += f" LIMIT {limit}"
-    
-    cursor.execute(query, params)
-    results = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    
-    documents = []
-    for row in results:
-        documents.append({
-            'id': row[0],
-            'title': row[1],
-            'file_name': row[2],
-            'file_path': row[3],
-            'file_size': row[4],
-            'category': row[5],
-            'supplier_id': row[6],
-            'product_id': row[7],
-            'upload_date': row[8],
-            'uploaded_by': row[9]
-        })
+        query += " LIMIT %(limit)s"
+        params['limit'] = limit
     
-    return documents
+    return query, params
 
-def get_user_by_email(email):
-    """Caută un utilizator după adresa de email."""
-    conn = get_connection()
-    cursor = conn.cursor()
+def get_documents(supplier_id=None, product_id=None, category=None, limit=None, query=None,
+                  start_date=None, end_date=None):
+    """Returnează lista de documente cu filtrare opțională, de la cel mai recent încărcat.
     
-    cursor.execute("SELECT id, username, email, password_hash, role FROM users WHERE email = %s", [email])
-    result = cursor.fetchone()
+    `start_date` este inclusă, `end_date` exclusă. Fiecare document are și cheile
+    'supplier_name' și 'product_name'. Cu `query`, caută în titlu, numele fișierului și
+    textul extras din document și returnează primele `limit` rezultate ordonate după
+    relevanță (vezi get_documents_page pentru paginile următoare).
+    """
+    query = (query or '').strip()
+    if query:
+        return get_documents_page(limit=limit, supplier_id=supplier_id, product_id=product_id,
+                                  category=category, query=query, start_date=start_date,
+                                  end_date=end_date)['items']
+    sql_query, params = _documents_query(supplier_id, product_id, category, start_date, end_date, limit)
     
-    cursor.close()
-    conn.close()
+    with db_cursor() as cursor:
+        cursor.execute(sql_query, params)
+        results = cursor.fetchall()
+    
+    return [_document_from_row(row) for row in results]
+
+USER_BY_EMAIL_SQL = "SELECT id, username, email, password_hash, role FROM users WHERE email = %s"
+register_prepared('user_by_email', USER_BY_EMAIL_SQL)
+
+def get_user_by_email(email):
+    """Caută un utilizator după adresa de email."""
+    with db_cursor() as cursor:
+        execute_prepared(cursor, 'user_by_email', [email])
+        result = cursor.fetchone()
     
     if result:
         return {
@@ -359,17 +1067,15 @@ def get_user_by_email(email):
         }
     return None
 
+USER_CREDENTIALS_SQL = "SELECT id, username, email, password_hash, role FROM users WHERE username = %s OR email = %s"
+register_prepared('user_credentials', USER_CREDENTIALS_SQL)
+
 def verify_user_credentials(username, password_hash):
     """Verifică credențialele utilizatorului."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    # Verificăm atât după username cât și după email
-    cursor.execute("SELECT id, username, email, password_hash, role FROM users WHERE username = %s OR email = %s", [username, username])
-    result = cursor.fetchone()
-    
-    cursor.close()
-    conn.close()
+    with db_cursor() as cursor:
+        # Verificăm atât după username cât și după email
+        execute_prepared(cursor, 'user_credentials', [username, username])
+        result = cursor.fetchone()
     
     if result and result[3] == password_hash:
         return {
@@ -383,76 +1089,68 @@ def verify_user_credentials(username, password_hash):
 
 def save_user(username, email, password_hash, role='Vizualizator'):
     """Adaugă sau actualizează un utilizator în baza de date."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
     try:
-        # Verificăm dacă utilizatorul există deja
-        cursor.execute("SELECT id FROM users WHERE email = %s", [email])
-        result = cursor.fetchone()
-        
-        if result:
-            # Actualizăm utilizatorul existent
-            user_id = result[0]
-            cursor.execute("""
-                UPDATE users 
-                SET username = %s, password_hash = %s, role = %s
-                WHERE id = %s
-            """, [username, password_hash, role, user_id])
-        else:
-            # Adăugăm un utilizator nou
-            cursor.execute("""
-                INSERT INTO users (username, email, password_hash, role, is_active, created_at)
-                VALUES (%s, %s, %s, %s, TRUE, CURRENT_TIMESTAMP)
-                RETURNING id
-            """, [username, email, password_hash, role])
-            
+        with db_cursor() as cursor:
+            # Verificăm dacă utilizatorul există deja
+            cursor.execute("SELECT id FROM users WHERE email = %s", [email])
             result = cursor.fetchone()
-            user_id = result[0] if result else None
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
+            
+            if result:
+                # Actualizăm utilizatorul existent
+                user_id = result[0]
+                cursor.execute("""
+                    UPDATE users 
+                    SET username = %s, password_hash = %s, role = %s
+                    WHERE id = %s
+                """, [username, password_hash, role, user_id])
+            else:
+                # Adăugăm un utilizator nou
+                cursor.execute("""
+                    INSERT INTO users (username, email, password_hash, role, is_active, created_at)
+                    VALUES (%s, %s, %s, %s, TRUE, CURRENT_TIMESTAMP)
+                    RETURNING id
+                """, [username, email, password_hash, role])
+                
+                result = cursor.fetchone()
+                user_id = result[0] if result else None
         
         return user_id
     except Exception as e:
-        conn.rollback()
-        cursor.close()
-        conn.close()
         print(f"Eroare la salvarea utilizatorului: {str(e)}")
         return None
 
-def log_user_activity(user_id, action_type, table_name, record_id=None, action_details=None, ip_address=None):
-    """Înregistrează o acțiune a utilizatorului în jurnalul de audit."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
+def log_user_activity(user_id, action_type, table_name, record_id=None, action_details=None, ip_address=None,
+                      user_agent=None, sync=False):
+    """Înregistrează o acțiune a utilizatorului în jurnalul de audit.
+
+    Implicit evenimentul este pus în coada scriitorului asincron (audit_writer), care îl
+    scrie în loturi; cu `sync=True` se face un INSERT imediat, în tranzacția proprie.
+    """
+    if not sync:
+        import audit_writer
+        return audit_writer.submit(user_id, action_type, table_name, record_id, action_details,
+                                   ip_address, user_agent)
+
     try:
-        cursor.execute("""
-            INSERT INTO audit_log (user_id, action_type, table_name, record_id, action_details, ip_address, created_at)
-            VALUES (%s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
-        """, [user_id, action_type, table_name, record_id, action_details, ip_address])
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
+        with db_cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO audit_log (user_id, action_type, table_name, record_id, action_details, ip_address, user_agent, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+            """, [user_id, action_type, table_name, record_id, action_details, ip_address, user_agent])
         
         return True
     except Exception as e:
-        conn.rollback()
-        cursor.close()
-        conn.close()
         print(f"Eroare la înregistrarea acțiunii: {str(e)}")
         return False
 
 def get_suppliers():
-    """Returnează lista de furnizori."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, name, contact_person, email, phone, country, city FROM suppliers ORDER BY name")
-    suppliers = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    """Returnează lista de furnizori (prin cache-ul procesului)."""
+    return cached_query(('suppliers',), ('suppliers',), _load_suppliers)
+
+def _load_suppliers():
+    with db_cursor() as cursor:
+        cursor.execute("SELECT id, name, contact_person, email, phone, country, city FROM suppliers ORDER BY name")
+        suppliers = cursor.fetchall()
     
     result = []
     for supplier in suppliers:
@@ -468,169 +1166,676 @@ def get_suppliers():
     
     return result
 
-def get_products():
-    """Returnează lista de produse cu informații despre furnizor."""
-    conn = get_connection()
-    cursor = conn.cursor()
+def _product_from_row(product):
+    return {
+        'id': product[0],
+        'sku': product[1],
+        'name': product[2],
+        'category': product[3] or '',
+        'purchase_price': float(product[4]) if product[4] else None,
+        'stock_quantity': product[5] or 0,
+        'stock_alert_threshold': product[6] or 5,
+        'last_purchase_date': product[7],
+        'supplier_id': product[8],
+        'supplier_name': product[9] or '',
+        'image_path': product[10],
+        'image_hash': product[11]
+    }
+
+PRODUCT_COLUMNS = ['id', 'sku', 'name', 'category', 'purchase_price', 'stock_quantity',
+                   'stock_alert_threshold', 'last_purchase_date', 'supplier_id', 'supplier_name',
+                   'image_path', 'image_hash']
+PRODUCT_FRAME_DEFAULTS = {'category': '', 'stock_quantity': 0, 'stock_alert_threshold': 5, 'supplier_name': '',
+                          'image_path': '', 'image_hash': ''}
+PRODUCT_FRAME_DTYPES = {'stock_quantity': 'int64', 'stock_alert_threshold': 'int64', 'supplier_id': 'Int64',
+                        'purchase_price': 'float64'}
+
+PRODUCTS_SELECT = """
+    SELECT 
+        p.id, p.sku, p.name, p.category, p.purchase_price, p.stock_quantity, 
+        p.stock_alert_threshold, p.last_purchase_date, 
+        s.id as supplier_id, s.name as supplier_name,
+        p.image_path, p.image_hash
+    FROM 
+        products p
+    LEFT JOIN 
+        suppliers s ON p.supplier_id = s.id
+"""
+
+PRODUCTS_SQL = PRODUCTS_SELECT + """
+    ORDER BY 
+        p.name
+"""
+register_prepared('products', PRODUCTS_SQL)
+
+def get_products(as_frame=False):
+    """Returnează lista de produse cu informații despre furnizor (prin cache-ul procesului).
+
+    Cu `as_frame=True` returnează direct un DataFrame cu coloanele din PRODUCT_COLUMNS.
+    """
+    return cached_query(('products', as_frame), ('products', 'suppliers'), lambda: _load_products(as_frame))
+
+def _load_products(as_frame):
+    with db_cursor() as cursor:
+        execute_prepared(cursor, 'products')
+        products = cursor.fetchall()
+    
+    if as_frame:
+        return _frame_from_rows(products, PRODUCT_COLUMNS, PRODUCT_FRAME_DEFAULTS, PRODUCT_FRAME_DTYPES,
+                                date_columns=['last_purchase_date'])
+    return [_product_from_row(product) for product in products]
+
+def _stock_entry_from_row(entry):
+    return {
+        'id': entry[0],
+        'quantity': entry[1],
+        'unit_price': float(entry[2]) if entry[2] else 0.0,
+        'entry_date': entry[3],
+        'invoice_number': entry[4] or '',
+        'product_id': entry[5],
+        'product_name': entry[6],
+        'sku': entry[7],
+        'supplier_id': entry[8],
+        'supplier_name': entry[9]
+    }
+
+STOCK_ENTRY_COLUMNS = ['id', 'quantity', 'unit_price', 'entry_date', 'invoice_number',
+                       'product_id', 'product_name', 'sku', 'supplier_id', 'supplier_name']
+STOCK_ENTRY_FRAME_DEFAULTS = {'unit_price': 0.0, 'invoice_number': ''}
+STOCK_ENTRY_FRAME_DTYPES = {'quantity': 'int64', 'unit_price': 'float64'}
+
+STOCK_ENTRIES_SELECT = """
+    SELECT 
+        se.id, se.quantity, se.unit_price, se.entry_date, se.invoice_number,
+        p.id as product_id, p.name as product_name, p.sku,
+        s.id as supplier_id, s.name as supplier_name
+    FROM 
+        stock_entries se
+    JOIN 
+        products p ON se.product_id = p.id
+    JOIN 
+        suppliers s ON se.supplier_id = s.id
+"""
+
+STOCK_ENTRIES_SQL = STOCK_ENTRIES_SELECT + """
+    ORDER BY 
+        se.entry_date DESC
+"""
+
+def get_stock_entries(as_frame=False):
+    """Returnează toate intrările de stoc cu informații despre produs și furnizor.
+
+    Cu `as_frame=True` returnează direct un DataFrame cu coloanele din STOCK_ENTRY_COLUMNS.
+    """
+    with db_cursor() as cursor:
+        cursor.execute(STOCK_ENTRIES_SQL)
+        entries = cursor.fetchall()
+    
+    if as_frame:
+        return _frame_from_rows(entries, STOCK_ENTRY_COLUMNS, STOCK_ENTRY_FRAME_DEFAULTS, STOCK_ENTRY_FRAME_DTYPES,
+                                date_columns=['entry_date'])
+    return [_stock_entry_from_row(entry) for entry in entries]
+
+STOCK_ALERTS_SQL = """
+    SELECT 
+        p.id, p.sku, p.name, p.stock_quantity, p.stock_alert_threshold,
+        s.name as supplier_name
+    FROM 
+        products p
+    LEFT JOIN 
+        suppliers s ON p.supplier_id = s.id
+    WHERE 
+        p.stock_quantity <= p.stock_alert_threshold
+    ORDER BY 
+        p.stock_quantity
+"""
+register_prepared('stock_alerts', STOCK_ALERTS_SQL)
+
+STOCK_ALERT_COLUMNS = ['id', 'sku', 'name', 'stock_quantity', 'stock_alert_threshold', 'supplier_name']
+
+def _stock_alert_from_row(alert):
+    return {
+        'id': alert[0],
+        'sku': alert[1],
+        'name': alert[2],
+        'stock_quantity': alert[3],
+        'stock_alert_threshold': alert[4],
+        'supplier_name': alert[5] or ''
+    }
+
+def get_stock_alerts(as_frame=False):
+    """Returnează produsele cu stoc sub pragul de alertă.
+
+    Cu `as_frame=True` returnează direct un DataFrame cu coloanele din STOCK_ALERT_COLUMNS.
+    """
+    with db_cursor() as cursor:
+        execute_prepared(cursor, 'stock_alerts')
+        alerts = cursor.fetchall()
+    
+    if as_frame:
+        return _frame_from_rows(alerts, STOCK_ALERT_COLUMNS, {'supplier_name': ''},
+                                {'stock_quantity': 'int64', 'stock_alert_threshold': 'int64'})
+    return [_stock_alert_from_row(alert) for alert in alerts]
+
+# Etichetele românești ale coloanelor, pentru afișarea DataFrame-urilor în pagini
+COLUMN_LABELS = {
+    'id': 'ID',
+    'sku': 'SKU',
+    'name': 'Nume',
+    'category': 'Categorie',
+    'purchase_price': 'Preț',
+    'stock_quantity': 'Stoc',
+    'stock_alert_threshold': 'Limită Alertă',
+    'last_purchase_date': 'Ultima Achiziție',
+    'supplier_id': 'ID Furnizor',
+    'supplier_name': 'Furnizor',
+    'quantity': 'Cantitate',
+    'unit_price': 'Preț Unitar',
+    'entry_date': 'Data',
+    'invoice_number': 'Factură',
+    'product_id': 'ID Produs',
+    'product_name': 'Produs',
+}
+
+def _frame_from_rows(rows, columns, defaults=None, dtypes=None, date_columns=()):
+    """Construiește un DataFrame tipizat direct din tuplurile returnate de cursor.
+
+    Valorile Decimal sunt convertite la float pe coloană (`coerce_float`), nu rând cu rând.
+    """
+    frame = pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+    if defaults:
+        frame = frame.fillna(defaults)
+    if dtypes:
+        frame = frame.astype(dtypes)
+    for column in date_columns:
+        frame[column] = pd.to_datetime(frame[column])
+    return frame
+
+def label_frame(frame, columns, labels=None):
+    """Selectează coloanele `columns` și le redenumește cu etichetele românești.
+
+    `labels` permite înlocuirea etichetelor implicite din COLUMN_LABELS pentru o anumită pagină.
+    """
+    mapping = dict(COLUMN_LABELS, **(labels or {}))
+    return frame[list(columns)].rename(columns=mapping)
+
+# Paginare keyset: în loc de OFFSET, fiecare pagină continuă de la cheia de sortare a ultimului
+# rând din pagina anterioară, deci costul unei pagini nu crește odată cu istoricul.
+# Cursorul returnat (`next_cursor`) este un șir opac, care poate fi păstrat în session_state.
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+def _encode_cursor(*values):
+    payload = [v.isoformat() if isinstance(v, (datetime.datetime, datetime.date)) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+def _decode_cursor(cursor_token, *types):
+    """Decodifică un cursor de paginare; `types` indică tipul fiecărei valori din cheie."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor_token.encode()))
+        if len(values) != len(types):
+            raise ValueError
+        return [datetime.datetime.fromisoformat(v) if t is datetime.datetime else t(v) for v, t in zip(values, types)]
+    except (ValueError, TypeError, AttributeError):
+        raise ValueError(f"Cursor de paginare invalid: {cursor_token!r}")
+
+def _page_size(limit):
+    return max(1, min(int(limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+
+def _page_result(items, limit, key_function):
+    """Construiește rezultatul unei pagini din `limit + 1` rânduri citite."""
+    has_more = len(items) > limit
+    items = items[:limit]
+    return {
+        'items': items,
+        'next_cursor': _encode_cursor(*key_function(items[-1])) if has_more else None,
+    }
+
+# Sortările disponibile pentru catalog: expresia SQL a cheii (fără NULL, ca să poată fi
+# comparată în cursor), tipul valorii din cursor și valoarea cheii pentru un produs.
+# Fiecare expresie are un index (expresie, id) în migrația 0008.
+PRODUCT_SORTS = {
+    'name': ("p.name", str, lambda p: p['name']),
+    'sku': ("p.sku", str, lambda p: p['sku']),
+    'stock_quantity': ("COALESCE(p.stock_quantity, 0)", int, lambda p: p['stock_quantity']),
+    'purchase_price': ("COALESCE(p.purchase_price, 0)", str, lambda p: str(p['purchase_price'] or 0)),
+    'last_purchase_date': ("COALESCE(p.last_purchase_date, TIMESTAMP '1970-01-01')", datetime.datetime,
+                           lambda p: p['last_purchase_date'] or datetime.datetime(1970, 1, 1)),
+}
+
+def _products_page_query(after=None, limit=DEFAULT_PAGE_SIZE, category=None, supplier_id=None, low_stock=False,
+                         sort='name', descending=False):
+    if sort not in PRODUCT_SORTS:
+        raise ValueError(f"Sortare necunoscută: {sort}")
+    sort_expression, sort_type, _ = PRODUCT_SORTS[sort]
+    
+    query = PRODUCTS_SELECT + " WHERE 1=1"
+    params = []
+    
+    if category:
+        query += " AND p.category = %s"
+        params.append(category)
+    
+    if supplier_id:
+        query += " AND p.supplier_id = %s"
+        params.append(supplier_id)
+    
+    if low_stock:
+        query += " AND p.stock_quantity <= p.stock_alert_threshold"
+    
+    if after:
+        cast = "::numeric" if sort == 'purchase_price' else ""
+        query += f" AND ({sort_expression}, p.id) {'<' if descending else '>'} (%s{cast}, %s)"
+        params.extend(_decode_cursor(after, sort_type, int))
+    
+    direction = "DESC" if descending else "ASC"
+    query += f" ORDER BY {sort_expression} {direction}, p.id {direction} LIMIT %s"
+    params.append(limit + 1)
+    return query, params
+
+def get_products_page(after=None, limit=DEFAULT_PAGE_SIZE, category=None, supplier_id=None, low_stock=False,
+                      sort='name', descending=False):
+    """Returnează o pagină de produse, filtrate și ordonate în baza de date.
+    
+    `sort` este una dintre cheile din PRODUCT_SORTS (implicit după nume). Pentru căutare
+    după text, vezi search_products(). `after` este `next_cursor` din pagina anterioară (None pentru prima
+    pagină) și este valabil doar pentru aceleași filtre și aceeași sortare.
+    Rezultatul are forma {'items': [...], 'next_cursor': str sau None}.
+    """
+    limit = _page_size(limit)
+    query, params = _products_page_query(after, limit, category, supplier_id, low_stock, sort, descending)
     
-    cursor.execute("""
+    with db_cursor() as cursor:
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+    
+    sort_key = PRODUCT_SORTS[sort][2]
+    return _page_result([_product_from_row(row) for row in rows], limit,
+                        lambda p: (sort_key(p), p['id']))
+
+def _like_pattern(term):
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+# Relevanța: potrivirea cuvintelor (ponderată: SKU/nume > descriere > specificații),
+# similaritatea trigram cu SKU-ul și numele și un bonus pentru SKU-ul exact.
+# Calculată ca float8, ca valoarea din cursor să fie comparată exact la pagina următoare.
+PRODUCT_SEARCH_SQL = """
+    SELECT * FROM (
         SELECT 
             p.id, p.sku, p.name, p.category, p.purchase_price, p.stock_quantity, 
             p.stock_alert_threshold, p.last_purchase_date, 
-            s.id as supplier_id, s.name as supplier_name
+            s.id as supplier_id, s.name as supplier_name,
+            p.image_path, p.image_hash,
+            (ts_rank(p.search_vector, q.tsquery)::float8
+             + GREATEST(similarity(p.sku, q.term), similarity(p.name, q.term))::float8
+             + CASE WHEN upper(p.sku) = upper(q.term) THEN 1.0 ELSE 0.0 END) AS rank
         FROM 
             products p
+        CROSS JOIN 
+            (SELECT %(term)s::text AS term, websearch_to_tsquery('simple', %(term)s) AS tsquery) q
         LEFT JOIN 
             suppliers s ON p.supplier_id = s.id
-        ORDER BY 
-            p.name
-    """)
+        WHERE (p.search_vector @@ q.tsquery
+               OR p.sku ILIKE %(pattern)s
+               OR p.name ILIKE %(pattern)s
+               OR p.name %% q.term)
+          {filters}
+    ) ranked
+    {after}
+    ORDER BY rank DESC, id
+    LIMIT %(limit)s
+"""
+
+def _product_search_query(query, category=None, low_stock=False, limit=DEFAULT_PAGE_SIZE, after=None):
+    params = {'term': query, 'pattern': _like_pattern(query), 'limit': limit + 1}
+    filters = ""
+    if category:
+        filters += " AND p.category = %(category)s"
+        params['category'] = category
+    if low_stock:
+        filters += " AND p.stock_quantity <= p.stock_alert_threshold"
     
-    products = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    after_clause = ""
+    if after:
+        params['after_rank'], params['after_id'] = _decode_cursor(after, float, int)
+        after_clause = "WHERE rank < %(after_rank)s OR (rank = %(after_rank)s AND id > %(after_id)s)"
+    return PRODUCT_SEARCH_SQL.format(filters=filters, after=after_clause), params
+
+def search_products(query, category=None, low_stock=False, limit=DEFAULT_PAGE_SIZE, after=None):
+    """Caută produse după SKU, nume, descriere și specificații tehnice, ordonate după relevanță.
     
-    result = []
-    for product in products:
-        result.append({
-            'id': product[0],
-            'sku': product[1],
-            'name': product[2],
-            'category': product[3] or '',
-            'purchase_price': float(product[4]) if product[4] else None,
-            'stock_quantity': product[5] or 0,
-            'stock_alert_threshold': product[6] or 5,
-            'last_purchase_date': product[7],
-            'supplier_id': product[8],
-            'supplier_name': product[9] or ''
-        })
+    Găsește subșiruri din SKU/nume, cuvinte din descriere și specificații (sintaxa de căutare
+    web: `"text exact"`, `-exclus`, `or`) și nume scrise aproximativ. `after` este
+    `next_cursor` din pagina anterioară. Rezultatul are forma {'items': [...], 'next_cursor'},
+    iar fiecare produs are în plus cheia 'rank'.
+    """
+    query = (query or '').strip()
+    if not query:
+        return {'items': [], 'next_cursor': None}
+    limit = _page_size(limit)
+    sql_query, params = _product_search_query(query, category, low_stock, limit, after)
     
-    return result
+    with db_cursor() as cursor:
+        cursor.execute(sql_query, params)
+        rows = cursor.fetchall()
+    
+    products = []
+    for row in rows:
+        product = _product_from_row(row)
+        product['rank'] = row[12]
+        products.append(product)
+    return _page_result(products, limit, lambda p: (p['rank'], p['id']))
 
-def get_stock_entries():
-    """Returnează toate intrările de stoc cu informații despre produs și furnizor."""
-    conn = get_connection()
-    cursor = conn.cursor()
+PRODUCT_DETAILS_SELECT = """
+    SELECT 
+        p.id, p.sku, p.name, p.category, p.purchase_price, p.stock_quantity, 
+        p.stock_alert_threshold, p.last_purchase_date, 
+        s.id as supplier_id, s.name as supplier_name,
+        p.image_path, p.image_hash,
+        p.description, p.dimensions, p.weight, p.technical_specs
+    FROM 
+        products p
+    LEFT JOIN 
+        suppliers s ON p.supplier_id = s.id
+    WHERE p.id = %s
+"""
+
+def get_product(product_id):
+    """Returnează toate detaliile unui produs (inclusiv descrierea și specificațiile), sau None."""
+    with db_cursor() as cursor:
+        cursor.execute(PRODUCT_DETAILS_SELECT, [product_id])
+        row = cursor.fetchone()
     
-    cursor.execute("""
-        SELECT 
-            se.id, se.quantity, se.unit_price, se.entry_date, se.invoice_number,
-            p.id as product_id, p.name as product_name, p.sku,
-            s.id as supplier_id, s.name as supplier_name
-        FROM 
-            stock_entries se
-        JOIN 
-            products p ON se.product_id = p.id
-        JOIN 
-            suppliers s ON se.supplier_id = s.id
-        ORDER BY 
-            se.entry_date DESC
-    """)
-    
-    entries = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    if not row:
+        return None
+    product = _product_from_row(row)
+    product.update({
+        'description': row[12] or '',
+        'dimensions': row[13] or '',
+        'weight': float(row[14]) if row[14] is not None else None,
+        'technical_specs': row[15] or '',
+    })
+    return product
+
+def get_product_categories():
+    """Returnează categoriile de produse existente, din tabelul agregat (prin cache)."""
+    return cached_query(('product_categories',), ('stock_value_by_category',), _load_product_categories)
+
+def _load_product_categories():
+    with db_cursor() as cursor:
+        cursor.execute("SELECT category FROM stock_value_by_category WHERE category <> '' ORDER BY category")
+        return [row[0] for row in cursor.fetchall()]
+
+def get_stock_entries_page(after=None, limit=DEFAULT_PAGE_SIZE, product_id=None, supplier_id=None):
+    """Returnează o pagină de intrări în stoc, de la cea mai recentă la cea mai veche.
     
-    result = []
-    for entry in entries:
-        result.append({
-            'id': entry[0],
-            'quantity': entry[1],
-            'unit_price': float(entry[2]) if entry[2] else 0.0,
-            'entry_date': entry[3],
-            'invoice_number': entry[4] or '',
-            'product_id': entry[5],
-            'product_name': entry[6],
-            'sku': entry[7],
-            'supplier_id': entry[8],
-            'supplier_name': entry[9]
-        })
+    `after` este `next_cursor` din pagina anterioară (None pentru prima pagină).
+    Rezultatul are forma {'items': [...], 'next_cursor': str sau None}.
+    """
+    limit = _page_size(limit)
+    query = STOCK_ENTRIES_SELECT + " WHERE 1=1"
+    params = []
     
-    return result
+    if product_id:
+        query += " AND se.product_id = %s"
+        params.append(product_id)
+    
+    if supplier_id:
+        query += " AND se.supplier_id = %s"
+        params.append(supplier_id)
+    
+    if after:
+        query += " AND (se.entry_date, se.id) < (%s, %s)"
+        params.extend(_decode_cursor(after, datetime.datetime, int))
+    
+    query += " ORDER BY se.entry_date DESC, se.id DESC LIMIT %s"
+    params.append(limit + 1)
+    
+    with db_cursor() as cursor:
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+    
+    return _page_result([_stock_entry_from_row(row) for row in rows], limit,
+                        lambda e: (e['entry_date'], e['id']))
 
-def get_stock_alerts():
-    """Returnează produsele cu stoc sub pragul de alertă."""
-    conn = get_connection()
-    cursor = conn.cursor()
+def get_documents_page(after=None, limit=DEFAULT_PAGE_SIZE, supplier_id=None, product_id=None, category=None,
+                       query=None, start_date=None, end_date=None):
+    """Returnează o pagină de documente, de la cel mai recent încărcat.
     
-    cursor.execute("""
-        SELECT 
-            p.id, p.sku, p.name, p.stock_quantity, p.stock_alert_threshold,
-            s.name as supplier_name
-        FROM 
-            products p
-        LEFT JOIN 
-            suppliers s ON p.supplier_id = s.id
-        WHERE 
-            p.stock_quantity <= p.stock_alert_threshold
-        ORDER BY 
-            p.stock_quantity
-    """)
+    `start_date` este inclusă, `end_date` exclusă; fiecare document are și cheile
+    'supplier_name' și 'product_name'. Cu `query`, documentele sunt căutate în titlu,
+    numele fișierului și textul extras din conținut (sintaxa de căutare web) și ordonate
+    după relevanță; fiecare are în plus cheile 'rank' și 'snippet' (fragmentele potrivite,
+    cu termenii între <b></b>).
+    `after` este `next_cursor` din pagina anterioară (None pentru prima pagină).
+    Rezultatul are forma {'items': [...], 'next_cursor': str sau None}.
+    """
+    limit = _page_size(limit)
+    query = (query or '').strip()
+    if query:
+        sql_query, params = _documents_search_query(query, supplier_id, product_id, category, start_date,
+                                                    end_date, limit, after)
+        with db_cursor() as cursor:
+            cursor.execute(sql_query, params)
+            rows = cursor.fetchall()
+        documents = []
+        for row in rows:
+            document = _document_from_row(row)
+            document['rank'] = row[13]
+            document['snippet'] = row[14]
+            documents.append(document)
+        return _page_result(documents, limit, lambda d: (d['rank'], d['id']))
     
-    alerts = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    sql_query, params = _documents_query(supplier_id, product_id, category, start_date, end_date,
+                                         limit + 1, after)
+    with db_cursor() as cursor:
+        cursor.execute(sql_query, params)
+        rows = cursor.fetchall()
     
-    result = []
-    for alert in alerts:
-        result.append({
-            'id': alert[0],
-            'sku': alert[1],
-            'name': alert[2],
-            'stock_quantity': alert[3],
-            'stock_alert_threshold': alert[4],
-            'supplier_name': alert[5] or ''
-        })
+    return _page_result([_document_from_row(row) for row in rows], limit,
+                        lambda d: (d['upload_date'], d['id']))
+
+# Relevanța: ts_rank_cd pe search_vector (titlu > nume fișier > conținut, migrația 0011),
+# ca float8 pentru comparația exactă din cursor. Fragmentele (ts_headline) sunt calculate
+# doar pentru rândurile paginii, după LIMIT.
+DOCUMENT_SEARCH_SQL = """
+    SELECT 
+        page.id, page.title, page.file_name, page.file_path, page.file_size, page.category,
+        page.supplier_id, page.product_id, page.upload_date, page.uploaded_by,
+        s.name AS supplier_name, p.name AS product_name, page.content_hash, page.rank,
+        ts_headline('simple', coalesce(b.content_text, ''), websearch_to_tsquery('simple', %(term)s),
+                    'MaxFragments=2, MaxWords=15, MinWords=5') AS snippet
+    FROM (
+        SELECT * FROM (
+            SELECT 
+                d.id, d.title, d.file_name, d.file_path, d.file_size, d.category,
+                d.supplier_id, d.product_id, d.upload_date, d.uploaded_by, d.content_hash,
+                ts_rank_cd(d.search_vector, q.tsquery)::float8 AS rank
+            FROM 
+                documents d
+            CROSS JOIN 
+                (SELECT websearch_to_tsquery('simple', %(term)s) AS tsquery) q
+            WHERE d.search_vector @@ q.tsquery
+              {filters}
+        ) ranked
+        {after}
+        ORDER BY rank DESC, id
+        LIMIT %(limit)s
+    ) page
+    LEFT JOIN 
+        suppliers s ON page.supplier_id = s.id
+    LEFT JOIN 
+        products p ON page.product_id = p.id
+    LEFT JOIN 
+        document_blobs b ON b.sha256 = page.content_hash
+    ORDER BY page.rank DESC, page.id
+"""
+
+def _documents_search_query(query, supplier_id=None, product_id=None, category=None, start_date=None,
+                            end_date=None, limit=DEFAULT_PAGE_SIZE, after=None):
+    filters, params = _document_filters(supplier_id, product_id, category, start_date, end_date)
+    params.update({'term': query, 'limit': limit + 1})
     
-    return result
+    after_clause = ""
+    if after:
+        params['after_rank'], params['after_id'] = _decode_cursor(after, float, int)
+        after_clause = "WHERE rank < %(after_rank)s OR (rank = %(after_rank)s AND id > %(after_id)s)"
+    return DOCUMENT_SEARCH_SQL.format(filters=filters, after=after_clause), params
+
+# Citire în flux (streaming): cursoare server-side (named cursors) care aduc rândurile
+# în loturi de câte `itersize`, astfel încât exporturile complete rulează cu memorie constantă.
+# Conexiunea din pool rămâne împrumutată până la epuizarea sau închiderea generatorului.
+DEFAULT_ITERSIZE = 2000
+
+def _iter_query(query, params, row_factory, itersize=DEFAULT_ITERSIZE, batch_size=None):
+    """Rulează interogarea pe un cursor server-side și produce rânduri sau loturi de rânduri.
+    
+    Cu `batch_size` setat, generatorul produce liste de cel mult `batch_size` dicționare;
+    altfel produce câte un dicționar pe rând.
+    """
+    with db_connection() as conn:
+        with conn.cursor(name=f"stream_{uuid.uuid4().hex}") as cursor:
+            cursor.itersize = itersize
+            cursor.execute(query, params)
+            if batch_size:
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield [row_factory(row) for row in rows]
+            else:
+                for row in cursor:
+                    yield row_factory(row)
+
+def iter_products(itersize=DEFAULT_ITERSIZE, batch_size=None):
+    """Generator peste toate produsele, ordonate după nume."""
+    return _iter_query(PRODUCTS_SELECT + " ORDER BY p.name, p.id", [], _product_from_row,
+                       itersize, batch_size)
+
+def iter_stock_entries(itersize=DEFAULT_ITERSIZE, batch_size=None, product_id=None, supplier_id=None):
+    """Generator peste intrările în stoc, în ordine cronologică."""
+    query = STOCK_ENTRIES_SELECT + " WHERE 1=1"
+    params = []
+    
+    if product_id:
+        query += " AND se.product_id = %s"
+        params.append(product_id)
+    
+    if supplier_id:
+        query += " AND se.supplier_id = %s"
+        params.append(supplier_id)
+    
+    query += " ORDER BY se.entry_date, se.id"
+    return _iter_query(query, params, _stock_entry_from_row, itersize, batch_size)
+
+def iter_documents(itersize=DEFAULT_ITERSIZE, batch_size=None, supplier_id=None, product_id=None, category=None,
+                   start_date=None, end_date=None):
+    """Generator peste documente, de la cel mai vechi la cel mai recent.
+    
+    Aceleași filtre ca get_documents (`start_date` inclusă, `end_date` exclusă); fiecare
+    document are și cheile 'supplier_name' și 'product_name'.
+    """
+    filters, params = _document_filters(supplier_id, product_id, category, start_date, end_date)
+    query = DOCUMENTS_SELECT + " WHERE TRUE" + filters + " ORDER BY d.upload_date, d.id"
+    return _iter_query(query, params, _document_from_row, itersize, batch_size)
+
+AUDIT_LOG_SELECT = """
+    SELECT 
+        a.id, a.created_at, a.user_id, u.username, a.action_type, a.table_name,
+        a.record_id, a.action_details, a.ip_address, a.user_agent
+    FROM 
+        audit_log a
+    LEFT JOIN 
+        users u ON a.user_id = u.id
+"""
+
+def _audit_entry_from_row(row):
+    return {
+        'id': row[0],
+        'created_at': row[1],
+        'user_id': row[2],
+        'username': row[3] or '',
+        'action_type': row[4],
+        'table_name': row[5],
+        'record_id': row[6],
+        'action_details': row[7] or '',
+        'ip_address': row[8] or '',
+        'user_agent': row[9] or ''
+    }
+
+def _audit_log_query(user_id=None, start_date=None, end_date=None):
+    query = AUDIT_LOG_SELECT + " WHERE 1=1"
+    params = []
+    
+    if user_id:
+        query += " AND a.user_id = %s"
+        params.append(user_id)
+    
+    if start_date:
+        query += " AND a.created_at >= %s"
+        params.append(start_date)
+    
+    if end_date:
+        query += " AND a.created_at < %s"
+        params.append(end_date)
+    
+    query += " ORDER BY a.created_at, a.id"
+    return query, params
+
+def iter_audit_log(itersize=DEFAULT_ITERSIZE, batch_size=None, user_id=None, start_date=None, end_date=None):
+    """Generator peste jurnalul de audit, în ordine cronologică, cu filtrare opțională."""
+    query, params = _audit_log_query(user_id, start_date, end_date)
+    return _iter_query(query, params, _audit_entry_from_row, itersize, batch_size)
+
+EXPORTS = {
+    'products': iter_products,
+    'stock_entries': iter_stock_entries,
+    'documents': iter_documents,
+    'audit_log': iter_audit_log,
+}
+
+def export_csv(kind, output, itersize=DEFAULT_ITERSIZE, **filters):
+    """Scrie în `output` (fișier text deschis) un export CSV complet, lot cu lot.
+    
+    Returnează numărul de rânduri scrise.
+    """
+    if kind not in EXPORTS:
+        raise ValueError(f"Export necunoscut: {kind}")
+    
+    writer = None
+    count = 0
+    for batch in EXPORTS[kind](itersize=itersize, batch_size=itersize, **filters):
+        if writer is None:
+            writer = csv.DictWriter(output, fieldnames=list(batch[0].keys()))
+            writer.writeheader()
+        writer.writerows(batch)
+        count += len(batch)
+    return count
+
+STATS_KEYS = ('suppliers_count', 'products_count', 'stock_value', 'low_stock_count', 'users_count', 'documents_count')
+
+def _stats_from_row(row):
+    stats = dict(zip(STATS_KEYS, row))
+    stats['stock_value'] = float(stats['stock_value'] or 0)
+    return stats
+
+STATS_SQL = """
+    SELECT suppliers_count, products_count, stock_value,
+           low_stock_count, users_count, documents_count
+    FROM system_stats
+    WHERE id = 1
+"""
 
 def get_stats():
-    """Returnează statistici generale despre sistem."""
+    """Returnează statistici generale despre sistem.
+    
+    Contoarele sunt citite din rândul unic al tabelului `system_stats`,
+    ținut la zi de triggere pe tabelele furnizori, produse, utilizatori și documente,
+    și păstrate în cache-ul procesului până la următoarea modificare.
+    """
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Număr furnizori
-        cursor.execute("SELECT COUNT(*) FROM suppliers")
-        suppliers_count_result = cursor.fetchone()
-        suppliers_count = suppliers_count_result[0] if suppliers_count_result else 0
-        
-        # Număr produse
-        cursor.execute("SELECT COUNT(*) FROM products")
-        products_count_result = cursor.fetchone()
-        products_count = products_count_result[0] if products_count_result else 0
-        
-        # Total valoare stoc
-        cursor.execute("SELECT SUM(stock_quantity * purchase_price) FROM products WHERE purchase_price IS NOT NULL")
-        stock_value_result = cursor.fetchone()
-        stock_value = stock_value_result[0] if stock_value_result and stock_value_result[0] else 0
-        
-        # Produse cu stoc scăzut
-        cursor.execute("SELECT COUNT(*) FROM products WHERE stock_quantity <= stock_alert_threshold")
-        low_stock_count_result = cursor.fetchone()
-        low_stock_count = low_stock_count_result[0] if low_stock_count_result else 0
-        
-        # Număr utilizatori
-        cursor.execute("SELECT COUNT(*) FROM users")
-        users_count_result = cursor.fetchone()
-        users_count = users_count_result[0] if users_count_result else 0
-        
-        # Număr documente
-        cursor.execute("SELECT COUNT(*) FROM documents")
-        documents_count_result = cursor.fetchone()
-        documents_count = documents_count_result[0] if documents_count_result else 0
-        
-        cursor.close()
-        conn.close()
-        
-        return {
-            'suppliers_count': suppliers_count,
-            'products_count': products_count,
-            'stock_value': float(stock_value),
-            'low_stock_count': low_stock_count,
-            'users_count': users_count,
-            'documents_count': documents_count
-        }
+        return _cached_stats()
     except Exception as e:
         print(f"Eroare în get_stats: {str(e)}")
         return {
@@ -642,7 +1847,413 @@ def get_stats():
             'documents_count': 0
         }
 
-# Inițializare bază de date
+def _cached_stats():
+    return cached_query(('stats',), ('system_stats',), _load_stats)
+
+def _load_stats():
+    with db_cursor() as cursor:
+        cursor.execute(STATS_SQL)
+        row = cursor.fetchone()
+        
+        if row is None:
+            # Rândul lipsește (bază restaurată fără el) - îl reconstruim o singură dată
+            cursor.execute("SELECT rebuild_system_stats()")
+            cursor.execute(STATS_SQL)
+            row = cursor.fetchone()
+    
+    return _stats_from_row(row)
+
+def rebuild_stats():
+    """Recalculează complet tabelul `system_stats` din tabelele sursă."""
+    with db_cursor() as cursor:
+        cursor.execute("SELECT rebuild_system_stats()")
+    invalidate_cache('system_stats')
+    return get_stats()
+
+def verify_stats():
+    """Compară contoarele din `system_stats` cu valorile calculate direct din tabele.
+    
+    Returnează un dicționar {cheie: (valoare_stocată, valoare_reală)} doar pentru
+    contoarele care diferă; un dicționar gol înseamnă că statisticile sunt corecte.
+    """
+    with db_cursor() as cursor:
+        cursor.execute(STATS_SQL)
+        stored_row = cursor.fetchone()
+        
+        cursor.execute("""
+            SELECT (SELECT COUNT(*) FROM suppliers),
+                   p.products_count,
+                   p.stock_value,
+                   p.low_stock_count,
+                   (SELECT COUNT(*) FROM users),
+                   (SELECT COUNT(*) FROM documents)
+            FROM (
+                SELECT COUNT(*) AS products_count,
+                       COALESCE(SUM(stock_quantity * purchase_price), 0) AS stock_value,
+                       COUNT(*) FILTER (WHERE stock_quantity <= stock_alert_threshold) AS low_stock_count
+                FROM products
+            ) p
+        """)
+        actual = _stats_from_row(cursor.fetchone())
+    
+    stored = _stats_from_row(stored_row) if stored_row else dict.fromkeys(STATS_KEYS)
+    return {key: (stored[key], actual[key]) for key in STATS_KEYS if stored[key] != actual[key]}
+
+# Datele graficelor din dashboard sunt citite din tabelele agregate ținute la zi de triggere
+# (migrations/0006_rollup_grafice.sql), deci fără GROUP BY peste tot istoricul de intrări.
+def get_stock_value_by_category():
+    """Returnează valoarea stocului per categorie, descrescător după valoare."""
+    return cached_query(('stock_value_by_category',), ('stock_value_by_category',), _load_stock_value_by_category)
+
+def _load_stock_value_by_category():
+    with db_cursor() as cursor:
+        cursor.execute("""
+            SELECT category, stock_value, products_count
+            FROM stock_value_by_category
+            ORDER BY stock_value DESC, category
+        """)
+        rows = cursor.fetchall()
+    
+    return [
+        {'category': row[0] or 'Fără categorie', 'stock_value': float(row[1]), 'products_count': row[2]}
+        for row in rows
+    ]
+
+def get_monthly_purchases(months=6):
+    """Returnează achizițiile per lună și furnizor din ultimele `months` luni, inclusiv luna curentă."""
+    return cached_query(('monthly_purchases', months), ('monthly_purchases_by_supplier', 'suppliers'),
+                        lambda: _load_monthly_purchases(months))
+
+def _load_monthly_purchases(months):
+    with db_cursor() as cursor:
+        cursor.execute("""
+            SELECT m.month, m.supplier_id, COALESCE(s.name, 'Fără furnizor'), m.total_value, m.total_quantity
+            FROM monthly_purchases_by_supplier m
+            LEFT JOIN suppliers s ON s.id = m.supplier_id
+            WHERE m.month >= date_trunc('month', CURRENT_DATE) - make_interval(months => %s)
+            ORDER BY m.month, m.supplier_id
+        """, [months - 1])
+        rows = cursor.fetchall()
+    
+    return [
+        {
+            'month': row[0],
+            'supplier_id': row[1],
+            'supplier_name': row[2],
+            'total_value': float(row[3]),
+            'total_quantity': row[4]
+        }
+        for row in rows
+    ]
+
+def rebuild_chart_rollups():
+    """Recalculează complet tabelele agregate pentru grafice."""
+    with db_cursor() as cursor:
+        cursor.execute("SELECT rebuild_chart_rollups()")
+    invalidate_cache('stock_value_by_category')
+    invalidate_cache('monthly_purchases_by_supplier')
+
+# Datele pentru dashboard sunt citite în paralel: fiecare interogare rulează pe un fir din
+# executorul comun (limitat la DASHBOARD_MAX_WORKERS) și pe propria conexiune din pool,
+# cu o limită de timp; o interogare eșuată nu le blochează pe celelalte.
+DASHBOARD_MAX_WORKERS = int(os.environ.get('DASHBOARD_MAX_WORKERS', '4'))
+DASHBOARD_QUERY_TIMEOUT = float(os.environ.get('DASHBOARD_QUERY_TIMEOUT', '5'))
+
+@dataclasses.dataclass
+class DashboardData:
+    """Rezultatele interogărilor de dashboard; cele eșuate rămân None și apar în `errors`."""
+    stats: dict = None
+    stock_alerts: pd.DataFrame = None
+    recent_entries: list = None
+    products: pd.DataFrame = None
+    stock_by_category: list = None
+    monthly_purchases: list = None
+    errors: dict = dataclasses.field(default_factory=dict)  # nume interogare -> mesaj de eroare
+    timings: dict = dataclasses.field(default_factory=dict)  # nume interogare -> secunde
+
+    def ok(self, name):
+        """True dacă interogarea `name` a fost încărcată cu succes."""
+        return name not in self.errors and getattr(self, name) is not None
+
+    def result(self, name):
+        """Returnează rezultatul interogării `name` sau ridică RuntimeError cu eroarea ei."""
+        if not self.ok(name):
+            raise RuntimeError(self.errors.get(name, f"Datele '{name}' nu au fost încărcate"))
+        return getattr(self, name)
+
+DASHBOARD_QUERIES = {
+    'stats': _cached_stats,
+    'stock_alerts': lambda: get_stock_alerts(as_frame=True),
+    'recent_entries': lambda: get_stock_entries_page(limit=5)['items'],
+    'products': lambda: get_products(as_frame=True),
+    'stock_by_category': get_stock_value_by_category,
+    'monthly_purchases': get_monthly_purchases,
+}
+
+_dashboard_executor = None
+_dashboard_executor_lock = threading.Lock()
+
+def _get_dashboard_executor():
+    global _dashboard_executor
+    if _dashboard_executor is None:
+        with _dashboard_executor_lock:
+            if _dashboard_executor is None:
+                _dashboard_executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=DASHBOARD_MAX_WORKERS, thread_name_prefix='dashboard')
+    return _dashboard_executor
+
+def _run_dashboard_query(loader, deadline, caller):
+    # Timpul petrecut în coada executorului se scade din limita interogării
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise concurrent.futures.TimeoutError()
+    start = time.perf_counter()
+    # statement_timeout = 0 ar însemna fără limită
+    with query_caller(caller), statement_timeout(max(1, remaining * 1000)):
+        result = loader()
+    return result, time.perf_counter() - start
+
+def load_dashboard_data(queries=None, timeout=DASHBOARD_QUERY_TIMEOUT):
+    """Încarcă în paralel datele de dashboard și le returnează ca `DashboardData`.
+
+    `queries` este o listă de chei din DASHBOARD_QUERIES (implicit toate). Fiecare interogare
+    are la dispoziție cel mult `timeout` secunde; dacă depășește limita sau eșuează, câmpul
+    ei rămâne None și eroarea apare în `errors`, iar restul rezultatelor sunt returnate.
+    """
+    names = list(queries or DASHBOARD_QUERIES)
+    caller = _describe_caller(sys._getframe(1))[1]
+    executor = _get_dashboard_executor()
+    deadline = time.monotonic() + timeout
+    futures = {
+        name: executor.submit(_run_dashboard_query, DASHBOARD_QUERIES[name], deadline, caller)
+        for name in names
+    }
+    
+    data = DashboardData()
+    for name, future in futures.items():
+        try:
+            value, elapsed = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            setattr(data, name, value)
+            data.timings[name] = elapsed
+        except concurrent.futures.TimeoutError:
+            # Cele încă în coadă nu mai pornesc; cele în curs sunt oprite de statement_timeout
+            future.cancel()
+            data.errors[name] = f"Timp depășit ({timeout:g}s)"
+        except Exception as e:
+            print(f"Eroare la încărcarea datelor de dashboard ({name}): {str(e)}")
+            data.errors[name] = str(e)
+    return data
+
+def _plan_index_names(plan):
+    """Colectează recursiv numele indexurilor folosite într-un plan EXPLAIN (FORMAT JSON)."""
+    names = set()
+    if plan.get('Index Name'):
+        names.add(plan['Index Name'])
+    for child in plan.get('Plans', []):
+        names |= _plan_index_names(child)
+    return names
+
+def get_query_index_expectations():
+    """Returnează interogările din acest modul și indexurile pe care trebuie să le folosească.
+    
+    Fiecare element este un tuplu (funcție, interogare, parametri, indexuri așteptate).
+    Sunt verificate formele mărginite pe care le execută aplicația (LIMIT și condiția keyset
+    a paginii următoare): cititoarele complete (get_products, get_stock_entries, exporturile)
+    parcurg tot tabelul, iar pentru ele o sortare este planul corect, nu un index.
+    """
+    return [
+        ('get_products_page(sort=name)', *_products_page_query(after=_encode_cursor('LCD', 1)), ['idx_products_name']),
+        ('get_stock_alerts', STOCK_ALERTS_SQL, [], ['idx_products_low_stock']),
+        ('get_products_page(sort=sku)', *_products_page_query(after=_encode_cursor('A', 1), sort='sku'),
+         ['idx_products_sku_id']),
+        ('get_products_page(sort=stock_quantity)',
+         *_products_page_query(after=_encode_cursor(10, 1), sort='stock_quantity'),
+         ['idx_products_stock_quantity_id']),
+        ('get_products_page(sort=purchase_price, descending)',
+         *_products_page_query(after=_encode_cursor('100.00', 1), sort='purchase_price', descending=True),
+         ['idx_products_purchase_price_id']),
+        ('get_products_page(sort=last_purchase_date)',
+         *_products_page_query(after=_encode_cursor(datetime.datetime(2025, 1, 1), 1), sort='last_purchase_date'),
+         ['idx_products_last_purchase_date_id']),
+        ('search_products', *_product_search_query('lcd panel'),
+         ['idx_products_search_vector', 'idx_products_sku_trgm', 'idx_products_name_trgm']),
+        ('get_stock_entries_page',
+         STOCK_ENTRIES_SELECT + " WHERE (se.entry_date, se.id) < (%s, %s) ORDER BY se.entry_date DESC, se.id DESC LIMIT 51",
+         [datetime.datetime.now(), 0], ['idx_stock_entries_entry_date']),
+        ('iter_audit_log(start_date, end_date)',
+         *_audit_log_query(start_date=datetime.datetime(2025, 1, 1), end_date=datetime.datetime(2025, 2, 1)),
+         ['idx_audit_log_created_at']),
+        ('iter_audit_log(user_id)', *_audit_log_query(user_id=1), ['idx_audit_log_user_id']),
+        ('get_documents(supplier_id)', *_documents_query(supplier_id=1, limit=51), ['idx_documents_supplier_upload_date_id']),
+        ('get_documents(product_id)', *_documents_query(product_id=1, limit=51), ['idx_documents_product_upload_date_id']),
+        ('get_documents(category)', *_documents_query(category='Factură', limit=51), ['idx_documents_category_upload_date_id']),
+        ('get_documents(start_date, end_date)',
+         *_documents_query(start_date=datetime.datetime(2025, 1, 1), end_date=datetime.datetime(2025, 4, 1), limit=51),
+         ['idx_documents_upload_date_id']),
+        ('get_documents_page(after)',
+         *_documents_query(limit=51, after=_encode_cursor(datetime.datetime(2025, 5, 1), 100)),
+         ['idx_documents_upload_date_id']),
+        ('get_documents(query)', *_documents_search_query('INV-2025-1003'), ['idx_documents_search_vector']),
+        ('get_user_by_email', USER_BY_EMAIL_SQL, ['admin@example.com'], ['users_email_key']),
+        ('verify_user_credentials', USER_CREDENTIALS_SQL, ['admin', 'admin'], ['users_username_key', 'users_email_key']),
+    ]
+
+def check_query_indexes():
+    """Rulează EXPLAIN pentru fiecare interogare și verifică folosirea indexului așteptat.
+    
+    Scanările secvențiale sunt dezactivate pe durata verificării: pe tabelele mici
+    din mediile de dezvoltare planificatorul le-ar alege oricum. Asta nu ajunge pentru
+    o interogare ORDER BY fără limită (planul rămâne o sortare peste orice index), de aceea
+    interogările verificate sunt mărginite, ca în get_query_index_expectations().
+    Returnează o listă de dicționare {function, expected, used, ok}.
+    """
+    results = []
+    with db_cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        for function_name, query, params, expected in get_query_index_expectations():
+            cursor.execute("EXPLAIN (FORMAT JSON) " + query, params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            used = _plan_index_names(plan[0]['Plan'])
+            results.append({
+                'function': function_name,
+                'expected': expected,
+                'used': sorted(used),
+                'ok': all(name in used for name in expected),
+            })
+    return results
+
+MIGRATION_CHECK_SCHEMA = 'migration_check'
+
+def check_migrations():
+    """Aplică toate migrațiile într-o schemă nouă și verifică triggerele pe un document.
+
+    Inserează un blob și un document, apoi modifică textul blob-ului, titlul documentului
+    și șterge documentul, verificând numărul de referințe și search_vector. Totul rulează
+    într-o singură tranzacție anulată la final: baza de date nu este modificată.
+    Returnează o listă de dicționare {check, ok, detail}.
+    """
+    results = []
+
+    def record(check, ok, detail=''):
+        results.append({'check': check, 'ok': bool(ok), 'detail': detail})
+
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"CREATE SCHEMA {MIGRATION_CHECK_SCHEMA}")
+            # public rămâne în cale pentru extensiile deja instalate (pg_trgm)
+            cursor.execute(f"SET LOCAL search_path TO {MIGRATION_CHECK_SCHEMA}, public")
+            for version, name, path in get_migrations():
+                with open(path, encoding='utf-8') as f:
+                    cursor.execute(f.read())
+            record('migrații aplicate', True, f"{len(get_migrations())} migrații")
+
+            sha256 = 'a' * 64
+            cursor.execute("""
+                INSERT INTO document_blobs (sha256, file_path, file_size, ref_count, unreferenced_since)
+                VALUES (%s, 'blobs/aa/aa/check', 3, 0, NULL)
+            """, [sha256])
+            cursor.execute("""
+                INSERT INTO documents (title, file_name, file_path, file_size, category, content_hash)
+                VALUES ('Factură INV-CHECK', 'factura.pdf', 'blobs/aa/aa/check', 3, 'Factură', %s)
+                RETURNING id
+            """, [sha256])
+            document_id = cursor.fetchone()[0]
+
+            def blob_state():
+                cursor.execute("SELECT ref_count, unreferenced_since FROM document_blobs WHERE sha256 = %s", [sha256])
+                return cursor.fetchone()
+
+            def document_matches(term):
+                cursor.execute("SELECT search_vector @@ to_tsquery('simple', %s) FROM documents WHERE id = %s",
+                               [term, document_id])
+                return cursor.fetchone()[0]
+
+            ref_count, unreferenced_since = blob_state()
+            record('inserare document', ref_count == 1 and unreferenced_since is None, f"ref_count={ref_count}")
+
+            cursor.execute("""
+                UPDATE document_blobs SET content_text = 'panou LCD container', text_status = 'done'
+                WHERE sha256 = %s
+            """, [sha256])
+            record('text extras -> search_vector', document_matches('container'))
+
+            cursor.execute("UPDATE documents SET title = 'Factură INV-CHECK-2' WHERE id = %s", [document_id])
+            ref_count, _ = blob_state()
+            record('actualizare titlu', ref_count == 1 and document_matches('container'), f"ref_count={ref_count}")
+
+            cursor.execute("DELETE FROM documents WHERE id = %s", [document_id])
+            ref_count, unreferenced_since = blob_state()
+            record('ștergere document', ref_count == 0 and unreferenced_since is not None, f"ref_count={ref_count}")
+    except psycopg2.Error as e:
+        record('eroare', False, str(e).strip())
+    finally:
+        conn.rollback()
+        conn.close()
+    return results
+
+# Inițializare bază de date și comenzi de administrare
 if __name__ == '__main__':
-    create_tables()
-    insert_sample_data()
\ No newline at end of file
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Administrare bază de date LED/LCD Import")
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser('init', help="aplică migrațiile și inserează datele demonstrative (implicit)")
+    subparsers.add_parser('migrate', help="aplică migrațiile de schemă nerulate")
+    subparsers.add_parser('check-indexes', help="verifică prin EXPLAIN că interogările folosesc indexurile")
+    subparsers.add_parser('check-migrations',
+                          help="aplică migrațiile într-o schemă temporară și verifică triggerele documentelor")
+    subparsers.add_parser('rebuild-stats', help="recalculează tabelul system_stats")
+    subparsers.add_parser('verify-stats', help="verifică system_stats față de tabelele sursă")
+    subparsers.add_parser('rebuild-rollups', help="recalculează tabelele agregate pentru grafice")
+    export_parser = subparsers.add_parser('export', help="export CSV complet, citit în flux")
+    export_parser.add_argument('kind', choices=sorted(EXPORTS))
+    export_parser.add_argument('output', help="fișierul CSV rezultat ('-' pentru stdout)")
+    export_parser.add_argument('--itersize', type=int, default=DEFAULT_ITERSIZE,
+                               help="rânduri aduse de la server per lot")
+    args = parser.parse_args()
+    
+    if args.command == 'migrate':
+        applied = run_migrations()
+        if not applied:
+            print("Schema este la zi.")
+    elif args.command == 'check-indexes':
+        failed = False
+        for check in check_query_indexes():
+            status = "OK  " if check['ok'] else "FAIL"
+            print(f"{status} {check['function']}: așteptat {', '.join(check['expected'])}; "
+                  f"folosit {', '.join(check['used']) or '(niciun index)'}")
+            failed = failed or not check['ok']
+        if failed:
+            sys.exit(1)
+    elif args.command == 'check-migrations':
+        checks = check_migrations()
+        for check in checks:
+            status = "OK  " if check['ok'] else "FAIL"
+            print(f"{status} {check['check']}" + (f": {check['detail']}" if check['detail'] else ""))
+        if not all(check['ok'] for check in checks):
+            sys.exit(1)
+    elif args.command == 'export':
+        if args.output == '-':
+            count = export_csv(args.kind, sys.stdout, itersize=args.itersize)
+        else:
+            with open(args.output, 'w', newline='', encoding='utf-8') as output:
+                count = export_csv(args.kind, output, itersize=args.itersize)
+        print(f"{count} rânduri exportate.", file=sys.stderr)
+    elif args.command == 'rebuild-stats':
+        print(rebuild_stats())
+    elif args.command == 'verify-stats':
+        differences = verify_stats()
+        if differences:
+            for key, (stored, actual) in differences.items():
+                print(f"{key}: stocat={stored} real={actual}")
+            sys.exit(1)
+        print("Statisticile sunt corecte.")
+    elif args.command == 'rebuild-rollups':
+        rebuild_chart_rollups()
+        print("Tabelele agregate au fost recalculate.")
+    else:
+        create_tables()
+        insert_sample_data()
\ No newline at end of file
@@ -0,0 +1,164 @@
+# Export ZIP al documentelor unui furnizor sau unei perioade (de exemplu pentru auditul vamal).
+#
+# Arhiva este construită incremental și scrisă direct în fluxul de ieșire (răspunsul HTTP al
+# serverului din file_server.py sau un fișier): documentele sunt citite din baza de date cu
+# un cursor server-side, iar fiecare fișier este copiat în arhivă în bucăți, fără a fi citit
+# întreg în memorie și fără un fișier temporar pentru arhivă. Fișierele sunt stocate
+# necomprimate (PDF-urile și imaginile sunt deja comprimate); arhivele de peste 4 GB folosesc
+# extensiile ZIP64. La final se adaugă manifest.csv, cu câte un rând per document.
+#
+# Utilizare: python document_export.py export.zip [--supplier-id 3] [--from 2025-01-01] [--to 2025-03-31]
+
+import csv
+import datetime
+import io
+import os
+import posixpath
+import re
+import shutil
+import time
+import zipfile
+
+import database as db
+
+EXPORT_CHUNK_SIZE = 1024 * 1024
+# Scrierile mici ale antetelor ZIP sunt adunate înainte de a fi trimise mai departe
+EXPORT_BUFFER_SIZE = 256 * 1024
+
+MANIFEST_NAME = 'manifest.csv'
+MANIFEST_COLUMNS = ['ID', 'Fișier în arhivă', 'Titlu', 'Categorie', 'Furnizor', 'Produs',
+                    'Nume original', 'Dimensiune (octeți)', 'Data încărcării', 'SHA-256', 'Stare']
+
+_UNSAFE_NAME_CHARS = re.compile(r'[\\/:*?"<>|\x00-\x1f]+')
+
+class _BufferedOutput:
+    """Flux doar pentru scriere, cu buffer: zipfile scrie antetele în bucăți de câțiva octeți."""
+
+    def __init__(self, output, buffer_size=EXPORT_BUFFER_SIZE):
+        self._output = output
+        self._buffer = bytearray()
+        self._buffer_size = buffer_size
+        self.bytes_written = 0
+
+    def write(self, data):
+        if len(self._buffer) + len(data) > self._buffer_size:
+            self.flush()
+        if len(data) >= self._buffer_size:
+            # Bucățile mari (conținutul fișierelor) trec direct, fără copiere în buffer
+            self._output.write(data)
+        else:
+            self._buffer += data
+        self.bytes_written += len(data)
+        return len(data)
+
+    def flush(self):
+        if self._buffer:
+            self._output.write(self._buffer)
+            self._buffer.clear()
+        if hasattr(self._output, 'flush'):
+            self._output.flush()
+
+def _safe_name(name, default):
+    name = _UNSAFE_NAME_CHARS.sub('_', str(name or '')).strip(' .')
+    return name[:100] or default
+
+def _archive_name(document):
+    """Calea documentului în arhivă: <furnizor>/<categorie>/<id>_<nume original>."""
+    folder = _safe_name(document['supplier_name'], 'Fără furnizor')
+    category = _safe_name(document['category'], 'Altele')
+    return posixpath.join(folder, category, f"{document['id']}_{_safe_name(document['file_name'], 'document')}")
+
+def _zip_date(value):
+    # ZIP nu poate reprezenta date anterioare anului 1980
+    value = value or datetime.datetime.now()
+    return max(value.timetuple()[:6], (1980, 1, 1, 0, 0, 0))
+
+def export_file_name(supplier_name=None, start_date=None, end_date=None):
+    """Numele propus pentru arhivă, din filtrele exportului."""
+    parts = ['documente']
+    if supplier_name:
+        parts.append(_safe_name(supplier_name, 'furnizor').replace(' ', '_'))
+    if start_date:
+        parts.append(f"de_la_{start_date:%Y-%m-%d}")
+    if end_date:
+        parts.append(f"pana_la_{end_date:%Y-%m-%d}")
+    return '_'.join(parts) + '.zip'
+
+def write_documents_zip(output, supplier_id=None, product_id=None, category=None, start_date=None, end_date=None):
+    """Scrie în `output` (flux binar, nu trebuie să permită seek) arhiva ZIP cu documentele filtrate.
+
+    Filtrele sunt cele din database.get_documents (`start_date` inclusă, `end_date` exclusă).
+    Documentele al căror fișier lipsește apar în manifest cu starea „lipsă”.
+    Returnează {'documents', 'included', 'missing', 'bytes', 'elapsed'}.
+    """
+    start = time.monotonic()
+    report = {'documents': 0, 'included': 0, 'missing': 0}
+    stream = _BufferedOutput(output)
+    manifest = io.StringIO()
+    manifest_writer = csv.writer(manifest)
+    manifest_writer.writerow(MANIFEST_COLUMNS)
+
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for document in db.iter_documents(supplier_id=supplier_id, product_id=product_id, category=category,
+                                          start_date=start_date, end_date=end_date):
+            report['documents'] += 1
+            arcname = _archive_name(document)
+            status = 'inclus'
+            try:
+                with open(document['file_path'], 'rb') as source:
+                    info = zipfile.ZipInfo(arcname, _zip_date(document['upload_date']))
+                    # Dimensiunea cunoscută dinainte decide dacă intrarea are nevoie de ZIP64
+                    info.file_size = os.fstat(source.fileno()).st_size
+                    with archive.open(info, 'w') as target:
+                        shutil.copyfileobj(source, target, EXPORT_CHUNK_SIZE)
+                report['included'] += 1
+            except FileNotFoundError:
+                status = 'lipsă'
+                arcname = ''
+                report['missing'] += 1
+            manifest_writer.writerow([
+                document['id'], arcname, document['title'], document['category'],
+                document['supplier_name'] or '', document['product_name'] or '',
+                document['file_name'], document['file_size'],
+                document['upload_date'].strftime('%Y-%m-%d %H:%M:%S'),
+                document['content_hash'] or '', status,
+            ])
+
+        # BOM UTF-8: Excel deschide corect diacriticele
+        manifest_info = zipfile.ZipInfo(MANIFEST_NAME, _zip_date(None))
+        manifest_info.compress_type = zipfile.ZIP_DEFLATED
+        archive.writestr(manifest_info, manifest.getvalue().encode('utf-8-sig'))
+
+    stream.flush()
+    report['bytes'] = stream.bytes_written
+    report['elapsed'] = time.monotonic() - start
+    return report
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    def parse_date(value):
+        return datetime.datetime.strptime(value, '%Y-%m-%d')
+
+    parser = argparse.ArgumentParser(description="Export ZIP al documentelor, cu manifest CSV")
+    parser.add_argument('output', help="arhiva ZIP rezultată ('-' pentru stdout)")
+    parser.add_argument('--supplier-id', type=int, help="doar documentele furnizorului")
+    parser.add_argument('--category', help="doar documentele din categorie (ex. Factură)")
+    parser.add_argument('--from', dest='start_date', type=parse_date, help="data de început, inclusă (AAAA-LL-ZZ)")
+    parser.add_argument('--to', dest='end_date', type=parse_date, help="data de sfârșit, inclusă (AAAA-LL-ZZ)")
+    args = parser.parse_args()
+
+    end_date = args.end_date + datetime.timedelta(days=1) if args.end_date else None
+    filters = {'supplier_id': args.supplier_id, 'category': args.category,
+               'start_date': args.start_date, 'end_date': end_date}
+    if args.output == '-':
+        report = write_documents_zip(sys.stdout.buffer, **filters)
+    else:
+        with open(args.output, 'wb') as f:
+            report = write_documents_zip(f, **filters)
+
+    print(f"Documente: {report['documents']} (incluse: {report['included']}, lipsă: {report['missing']}), "
+          f"{report['bytes'] / 1024 / 1024:.1f} MB în {report['elapsed']:.1f}s", file=sys.stderr)
+    if report['missing']:
+        sys.exit(1)
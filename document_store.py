@@ -0,0 +1,336 @@
+# Depozit de documente adresat după conținut.
+#
+# Fiecare fișier distinct este păstrat o singură dată în DOCUMENTS_DIR/blobs/ab/cd/<sha256>,
+# unde hash-ul SHA-256 este calculat în bucăți, pe măsură ce conținutul este citit. Rândurile
+# din `documents` referă blob-ul prin `content_hash` (migrația 0010), iar `document_blobs`
+# ține numărul de referințe, actualizat de triggere. Un document identic cu unul existent
+# (aceeași factură sau același certificat CE încărcat pentru mai multe produse) primește doar
+# un rând nou în `documents`: fișierul nu mai este scris încă o dată.
+#
+# Conținutul nu este ținut în memorie: este copiat în bucăți de HASH_CHUNK_SIZE într-un
+# fișier temporar din același director, calculând hash-ul și dimensiunea pe parcurs, și
+# redenumit atomic abia după ce limitele categoriei au fost verificate.
+#
+# Blob-urile rămase fără referințe sunt șterse de colectorul de gunoi după DOCUMENT_GC_GRACE
+# secunde: python document_store.py gc
+
+import hashlib
+import os
+import threading
+import time
+
+import database as db
+import document_text
+
+DOCUMENTS_DIR = os.environ.get('DOCUMENTS_DIR', 'uploaded_documents')
+DOCUMENT_BLOBS_DIR = os.path.join(DOCUMENTS_DIR, 'blobs')
+# Cât timp un blob fără referințe este păstrat înainte de ștergere (o încărcare în curs îl
+# poate refolosi între timp)
+DOCUMENT_GC_GRACE = float(os.environ.get('DOCUMENT_GC_GRACE', '3600'))
+HASH_CHUNK_SIZE = 1024 * 1024
+# Fișierele temporare ale încărcărilor în curs (cele abandonate sunt șterse de gc)
+DOCUMENT_TMP_DIR = os.path.join(DOCUMENT_BLOBS_DIR, 'tmp')
+
+# Dimensiunea maximă a unui fișier, per categorie (implicit DOCUMENT_MAX_BYTES)
+DOCUMENT_MAX_BYTES = int(os.environ.get('DOCUMENT_MAX_BYTES', str(50 * 1024 * 1024)))
+DOCUMENT_CATEGORY_MAX_BYTES = {
+    'Declarație Vamală': 200 * 1024 * 1024,  # scanări ale declarațiilor, multe pagini
+    'Factură': 20 * 1024 * 1024,
+}
+# Spațiul total al documentelor dintr-o categorie (0 = nelimitat)
+DOCUMENT_CATEGORY_QUOTA_BYTES = int(os.environ.get('DOCUMENT_CATEGORY_QUOTA_BYTES', '0'))
+
+class DocumentQuotaError(ValueError):
+    """Documentul depășește dimensiunea maximă sau spațiul alocat categoriei sale."""
+
+UPSERT_BLOB_SQL = """
+    INSERT INTO document_blobs (sha256, file_path, file_size, ref_count, unreferenced_since)
+    VALUES (%s, %s, %s, 0, NULL)
+    ON CONFLICT (sha256) DO UPDATE SET unreferenced_since = NULL
+    RETURNING file_path
+"""
+
+INSERT_DOCUMENT_SQL = """
+    INSERT INTO documents (title, file_name, file_path, file_size, category,
+                           supplier_id, product_id, upload_date, uploaded_by, content_hash)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP, %s, %s)
+    RETURNING id
+"""
+
+def blob_path(sha256):
+    """Calea fișierului pentru blob-ul cu hash-ul dat."""
+    return os.path.join(DOCUMENT_BLOBS_DIR, sha256[:2], sha256[2:4], sha256)
+
+def _chunks(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        for offset in range(0, len(view), HASH_CHUNK_SIZE):
+            yield view[offset:offset + HASH_CHUNK_SIZE]
+        return
+    while True:
+        chunk = source.read(HASH_CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+def _rewind(source, position):
+    if not isinstance(source, (bytes, bytearray, memoryview)):
+        source.seek(position)
+
+def max_file_size(category):
+    """Dimensiunea maximă acceptată pentru un fișier din categoria dată."""
+    return DOCUMENT_CATEGORY_MAX_BYTES.get(category, DOCUMENT_MAX_BYTES)
+
+def _check_size(size, max_bytes, category):
+    if size > max_bytes:
+        raise DocumentQuotaError(f"Fișierul depășește {max_bytes / 1024 / 1024:.0f} MB, "
+                                 f"dimensiunea maximă pentru categoria {category}")
+
+def hash_source(source, max_bytes=None, category=None):
+    """Calculează (sha256, dimensiune) citind conținutul în bucăți.
+
+    `source` este un obiect bytes sau un fișier binar cu seek (de exemplu UploadedFile din
+    Streamlit); poziția fișierului este refăcută la final. Cu `max_bytes`, citirea se
+    oprește cu DocumentQuotaError de îndată ce limita este depășită.
+    """
+    position = 0 if isinstance(source, (bytes, bytearray, memoryview)) else source.tell()
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        for chunk in _chunks(source):
+            digest.update(chunk)
+            size += len(chunk)
+            if max_bytes is not None:
+                _check_size(size, max_bytes, category)
+    finally:
+        _rewind(source, position)
+    return digest.hexdigest(), size
+
+def _seekable(source):
+    return isinstance(source, (bytes, bytearray, memoryview)) or (hasattr(source, 'seekable') and source.seekable())
+
+def _spool(source, max_bytes=None, category=None):
+    """Copiază conținutul într-un fișier temporar, în bucăți, calculând hash-ul și dimensiunea.
+
+    Returnează (cale_temporară, sha256, dimensiune); fișierul temporar este șters dacă
+    limita este depășită sau citirea eșuează.
+    """
+    os.makedirs(DOCUMENT_TMP_DIR, exist_ok=True)
+    tmp_path = os.path.join(DOCUMENT_TMP_DIR, f"{os.getpid()}.{threading.get_ident()}.{time.monotonic_ns()}")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, 'wb') as f:
+            for chunk in _chunks(source):
+                digest.update(chunk)
+                size += len(chunk)
+                if max_bytes is not None:
+                    _check_size(size, max_bytes, category)
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return tmp_path, digest.hexdigest(), size
+
+def _check_category_quota(cursor, category, file_size):
+    if not DOCUMENT_CATEGORY_QUOTA_BYTES:
+        return
+    # Încărcările concurente din aceeași categorie sunt verificate pe rând
+    cursor.execute("SELECT pg_advisory_xact_lock(hashtext('document_quota:' || %s))", [category])
+    cursor.execute("SELECT COALESCE(SUM(file_size), 0) FROM documents WHERE category = %s", [category])
+    used = cursor.fetchone()[0]
+    if used + file_size > DOCUMENT_CATEGORY_QUOTA_BYTES:
+        raise DocumentQuotaError(f"Spațiul alocat categoriei {category} "
+                                 f"({DOCUMENT_CATEGORY_QUOTA_BYTES / 1024 / 1024:.0f} MB) este epuizat")
+
+def store_document(title, file_name, source, category, supplier_id=None, product_id=None, user_id=1):
+    """Salvează documentul în depozit și inserează rândul din `documents`, în aceeași tranzacție.
+
+    `source` poate fi bytes sau un fișier binar deschis; conținutul este citit în bucăți.
+    Ridică DocumentQuotaError dacă fișierul depășește limitele categoriei.
+    Returnează {'id', 'file_path', 'content_hash', 'file_size', 'deduplicated'};
+    `deduplicated` este True când conținutul exista deja și nu a fost scris din nou.
+    """
+    max_bytes = max_file_size(category)
+    tmp_path = None
+    if _seekable(source):
+        # Doar citire: un duplicat este recunoscut înainte de orice scriere pe disc
+        sha256, file_size = hash_source(source, max_bytes, category)
+    else:
+        tmp_path, sha256, file_size = _spool(source, max_bytes, category)
+
+    try:
+        with db.db_cursor() as cursor:
+            _check_category_quota(cursor, category, file_size)
+            # Rândul blob-ului este blocat până la commit: colectorul de gunoi nu îl poate
+            # șterge între verificarea fișierului și inserarea documentului care îl referă
+            cursor.execute(UPSERT_BLOB_SQL, [sha256, blob_path(sha256), file_size])
+            path = cursor.fetchone()[0]
+            deduplicated = os.path.exists(path)
+            written = False
+            try:
+                if not deduplicated:
+                    if tmp_path is None:
+                        tmp_path, spooled_hash, _ = _spool(source, max_bytes, category)
+                        if spooled_hash != sha256:
+                            raise ValueError("Conținutul fișierului s-a modificat în timpul încărcării")
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(tmp_path, path)
+                    tmp_path = None
+                    written = True
+                cursor.execute(INSERT_DOCUMENT_SQL, [title, file_name, path, file_size, category,
+                                                     supplier_id, product_id, user_id, sha256])
+                document_id = cursor.fetchone()[0]
+            except BaseException:
+                # Tranzacția va fi anulată: blob-ul scris acum nu ar avea niciun rând
+                if written:
+                    os.remove(path)
+                raise
+    finally:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    if not deduplicated:
+        # Textul pentru căutare este extras în fundal (vezi document_text.py)
+        document_text.notify()
+    return {'id': document_id, 'file_path': path, 'content_hash': sha256,
+            'file_size': file_size, 'deduplicated': deduplicated}
+
+def collect_garbage(grace=None, dry_run=False):
+    """Șterge blob-urile fără referințe mai vechi de `grace` secunde (implicit DOCUMENT_GC_GRACE).
+
+    Sunt șterse și fișierele din DOCUMENT_BLOBS_DIR care nu au rând în `document_blobs`
+    (încărcări întrerupte), dacă sunt mai vechi decât perioada de grație.
+    Returnează {'blobs', 'orphans', 'bytes'}.
+    """
+    grace = DOCUMENT_GC_GRACE if grace is None else grace
+    report = {'blobs': 0, 'orphans': 0, 'bytes': 0}
+
+    with db.db_cursor() as cursor:
+        # Rândurile sunt șterse și fișierele eliminate în aceeași tranzacție: o încărcare
+        # concurentă a aceluiași conținut așteaptă commit-ul și apoi scrie blob-ul din nou
+        cursor.execute("""
+            SELECT sha256, file_path, file_size FROM document_blobs
+            WHERE ref_count <= 0 AND unreferenced_since < CURRENT_TIMESTAMP - %s * INTERVAL '1 second'
+            FOR UPDATE SKIP LOCKED
+        """, [grace])
+        rows = cursor.fetchall()
+        if rows and not dry_run:
+            cursor.execute("DELETE FROM document_blobs WHERE sha256 = ANY(%s) AND ref_count <= 0",
+                           [[sha256 for sha256, _, _ in rows]])
+            for _, file_path, _ in rows:
+                try:
+                    os.remove(file_path)
+                except FileNotFoundError:
+                    pass
+        report['blobs'] = len(rows)
+        report['bytes'] = sum(file_size for _, _, file_size in rows)
+
+        known = set()
+        cursor.execute("SELECT sha256 FROM document_blobs")
+        known.update(sha256.strip() for sha256, in cursor.fetchall())
+
+    cutoff = time.time() - grace
+    for root, _, names in os.walk(DOCUMENT_BLOBS_DIR):
+        for name in names:
+            if name in known:
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+                if stat.st_mtime >= cutoff:
+                    continue
+                if not dry_run:
+                    os.remove(path)
+            except OSError:
+                continue
+            report['orphans'] += 1
+            report['bytes'] += stat.st_size
+    return report
+
+def backfill(dry_run=False):
+    """Mută în depozit documentele salvate înainte de migrația 0010 (fără content_hash).
+
+    Fișierele identice sunt păstrate o singură dată; fișierul vechi este șters după ce
+    nu mai este referit de niciun rând. Documentele al căror fișier lipsește sunt raportate.
+    Returnează {'documents', 'moved', 'missing'}.
+    """
+    report = {'documents': 0, 'moved': 0, 'missing': []}
+    with db.db_cursor() as cursor:
+        cursor.execute("SELECT id, file_path FROM documents WHERE content_hash IS NULL ORDER BY id")
+        legacy = cursor.fetchall()
+    report['documents'] = len(legacy)
+
+    for document_id, old_path in legacy:
+        if not os.path.exists(old_path):
+            report['missing'].append(document_id)
+            continue
+        if dry_run:
+            report['moved'] += 1
+            continue
+        try:
+            with open(old_path, 'rb') as f:
+                sha256, file_size = hash_source(f)
+                with db.db_cursor() as cursor:
+                    cursor.execute(UPSERT_BLOB_SQL, [sha256, blob_path(sha256), file_size])
+                    path = cursor.fetchone()[0]
+                    if not os.path.exists(path):
+                        tmp_path, _, _ = _spool(f)
+                        os.makedirs(os.path.dirname(path), exist_ok=True)
+                        os.replace(tmp_path, path)
+                    cursor.execute("""
+                        UPDATE documents SET content_hash = %s, file_path = %s, file_size = %s
+                        WHERE id = %s AND content_hash IS NULL
+                    """, [sha256, path, file_size, document_id])
+                    # Fișierul vechi poate fi referit și de alte documente încă nemutate
+                    cursor.execute("SELECT EXISTS (SELECT 1 FROM documents WHERE file_path = %s)", [old_path])
+                    still_used = cursor.fetchone()[0]
+            if not still_used and os.path.abspath(old_path) != os.path.abspath(path):
+                os.remove(old_path)
+            report['moved'] += 1
+        except Exception as e:
+            print(f"Eroare la mutarea documentului {document_id}: {str(e)}")
+    return report
+
+def get_store_stats():
+    """Returnează numărul de documente, de blob-uri și spațiul economisit prin deduplicare."""
+    with db.db_cursor() as cursor:
+        cursor.execute("""
+            SELECT COUNT(*), COALESCE(SUM(file_size), 0), COALESCE(SUM(file_size * ref_count), 0),
+                   COUNT(*) FILTER (WHERE ref_count <= 0)
+            FROM document_blobs
+        """)
+        blobs, stored_bytes, referenced_bytes, unreferenced = cursor.fetchone()
+    return {
+        'blobs': blobs,
+        'bytes': stored_bytes,
+        'saved_bytes': max(referenced_bytes - stored_bytes, 0),
+        'unreferenced': unreferenced,
+    }
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Întreținerea depozitului de documente")
+    parser.add_argument('command', choices=['gc', 'backfill', 'stats'])
+    parser.add_argument('--grace', type=float, default=None, help="perioada de grație în secunde (gc)")
+    parser.add_argument('--dry-run', action='store_true', help="doar raportare, fără ștergeri sau mutări")
+    args = parser.parse_args()
+
+    if args.command == 'gc':
+        report = collect_garbage(args.grace, dry_run=args.dry_run)
+        print(f"Blob-uri fără referințe: {report['blobs']}, fișiere orfane: {report['orphans']}, "
+              f"{report['bytes'] / 1024 / 1024:.1f} MB" + (" (simulare, nimic șters)" if args.dry_run else " eliberați"))
+    elif args.command == 'backfill':
+        report = backfill(dry_run=args.dry_run)
+        print(f"Documente fără hash: {report['documents']}, mutate în depozit: {report['moved']}"
+              + (" (simulare)" if args.dry_run else ""))
+        if report['missing']:
+            print(f"Documente cu fișier lipsă: {', '.join(map(str, report['missing']))}")
+    else:
+        stats = get_store_stats()
+        print(f"Blob-uri: {stats['blobs']} ({stats['bytes'] / 1024 / 1024:.1f} MB), "
+              f"economisit prin deduplicare: {stats['saved_bytes'] / 1024 / 1024:.1f} MB, "
+              f"fără referințe: {stats['unreferenced']}")
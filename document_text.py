@@ -0,0 +1,208 @@
+# Extragerea textului din documente, pentru căutarea în conținut (migrația 0011).
+#
+# Un fir de execuție în fundal preia blob-urile cu text_status = 'pending', extrage textul
+# din PDF (pypdf), DOCX (direct din XML-ul arhivei) și XLSX (openpyxl, în flux) și îl scrie
+# în document_blobs.content_text; un trigger actualizează apoi search_vector pentru toate
+# documentele care referă blob-ul. Tipul fișierului este recunoscut după conținut, nu după
+# nume. Textul este extras o singură dată per conținut, oricâte documente îl referă.
+#
+# Utilizare (fără aplicație pornită): python document_text.py [--retry-errors]
+
+import os
+import threading
+import zipfile
+from xml.etree import ElementTree
+
+import database as db
+
+# Textul păstrat per document (tsvector are o limită de 1 MB)
+DOCUMENT_TEXT_MAX_CHARS = int(os.environ.get('DOCUMENT_TEXT_MAX_CHARS', '200000'))
+DOCUMENT_TEXT_BATCH_SIZE = int(os.environ.get('DOCUMENT_TEXT_BATCH_SIZE', '20'))
+# Intervalul la care firul de execuție verifică și fără notificare blob-urile noi
+# (încărcate de alte procese ale aplicației)
+DOCUMENT_TEXT_POLL_INTERVAL = float(os.environ.get('DOCUMENT_TEXT_POLL_INTERVAL', '60'))
+
+_WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+class UnsupportedDocumentError(Exception):
+    """Formatul fișierului nu este recunoscut sau biblioteca necesară lipsește."""
+
+class _TextBuffer:
+    """Adună fragmentele de text până la DOCUMENT_TEXT_MAX_CHARS."""
+
+    def __init__(self, max_chars):
+        self.parts = []
+        self.remaining = max_chars
+
+    @property
+    def full(self):
+        return self.remaining <= 0
+
+    def add(self, text):
+        if text and not self.full:
+            text = text[:self.remaining]
+            self.parts.append(text)
+            self.remaining -= len(text)
+
+    def text(self):
+        # PostgreSQL nu acceptă caracterul NUL în coloanele text
+        return '\n'.join(self.parts).replace('\x00', '')
+
+def _pdf_text(path, buffer):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise UnsupportedDocumentError("Pentru fișiere PDF este necesar pachetul pypdf")
+    reader = PdfReader(path)
+    for page in reader.pages:
+        if buffer.full:
+            break
+        buffer.add(page.extract_text())
+
+def _docx_text(archive, buffer):
+    with archive.open('word/document.xml') as f:
+        paragraph = []
+        for _, element in ElementTree.iterparse(f):
+            if element.tag == f'{_WORD_NS}t' and element.text:
+                paragraph.append(element.text)
+            elif element.tag == f'{_WORD_NS}p':
+                buffer.add(''.join(paragraph))
+                paragraph = []
+                element.clear()
+                if buffer.full:
+                    break
+
+def _xlsx_text(path, buffer):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise UnsupportedDocumentError("Pentru fișiere XLSX este necesar pachetul openpyxl")
+    # read_only citește foile în flux, fără a încărca tot registrul în memorie
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            buffer.add(sheet.title)
+            for row in sheet.iter_rows(values_only=True):
+                if buffer.full:
+                    return
+                buffer.add(' '.join(str(value) for value in row if value is not None))
+    finally:
+        workbook.close()
+
+def extract_text(path, max_chars=DOCUMENT_TEXT_MAX_CHARS):
+    """Returnează textul fișierului (cel mult `max_chars` caractere).
+
+    Ridică UnsupportedDocumentError pentru formatele necunoscute (imagini, DOC/XLS vechi).
+    """
+    with open(path, 'rb') as f:
+        header = f.read(8)
+    buffer = _TextBuffer(max_chars)
+
+    if header.startswith(b'%PDF'):
+        _pdf_text(path, buffer)
+    elif header.startswith(b'PK') and zipfile.is_zipfile(path):
+        # DOCX și XLSX sunt arhive ZIP; le deosebim după conținutul arhivei
+        with zipfile.ZipFile(path) as archive:
+            names = set(archive.namelist())
+            if 'word/document.xml' in names:
+                _docx_text(archive, buffer)
+        if 'xl/workbook.xml' in names:
+            _xlsx_text(path, buffer)
+        elif 'word/document.xml' not in names:
+            raise UnsupportedDocumentError("Arhivă fără document Word sau Excel")
+    else:
+        raise UnsupportedDocumentError("Format de fișier necunoscut")
+    return buffer.text()
+
+def _pending_blobs(limit):
+    with db.db_cursor() as cursor:
+        cursor.execute("""
+            SELECT sha256, file_path FROM document_blobs
+            WHERE text_status = 'pending'
+            ORDER BY created_at
+            LIMIT %s
+        """, [limit])
+        return cursor.fetchall()
+
+def _save_text(sha256, status, text):
+    # Condiția pe text_status: un alt proces poate să fi extras deja același blob
+    with db.db_cursor() as cursor:
+        cursor.execute("""
+            UPDATE document_blobs
+            SET content_text = %s, text_status = %s, text_extracted_at = CURRENT_TIMESTAMP
+            WHERE sha256 = %s AND text_status = 'pending'
+        """, [text, status, sha256])
+
+def process_pending(limit=DOCUMENT_TEXT_BATCH_SIZE):
+    """Extrage textul pentru cel mult `limit` blob-uri în așteptare.
+
+    Returnează {'processed', 'done', 'unsupported', 'errors'}.
+    """
+    report = {'processed': 0, 'done': 0, 'unsupported': 0, 'errors': 0}
+    for sha256, file_path in _pending_blobs(limit):
+        try:
+            status, text = 'done', extract_text(file_path)
+        except UnsupportedDocumentError:
+            status, text = 'unsupported', None
+        except Exception as e:
+            print(f"Eroare la extragerea textului din {file_path}: {str(e)}")
+            status, text = 'error', None
+        _save_text(sha256, status, text)
+        report['processed'] += 1
+        report['errors' if status == 'error' else status] += 1
+    return report
+
+def retry_errors():
+    """Pune din nou în coadă blob-urile la care extragerea a eșuat sau nu era posibilă."""
+    with db.db_cursor() as cursor:
+        cursor.execute("UPDATE document_blobs SET text_status = 'pending' WHERE text_status IN ('error', 'unsupported')")
+        return cursor.rowcount
+
+_wake = threading.Event()
+_worker = None
+_worker_lock = threading.Lock()
+
+def _run():
+    while True:
+        _wake.wait(DOCUMENT_TEXT_POLL_INTERVAL)
+        _wake.clear()
+        try:
+            with db.query_caller('document_text'):
+                # Loturi succesive până la golirea cozii
+                while process_pending()['processed'] >= DOCUMENT_TEXT_BATCH_SIZE:
+                    pass
+        except Exception as e:
+            print(f"Eroare în firul de extragere a textului: {str(e)}")
+
+def start_worker():
+    """Pornește firul de extragere în fundal, o singură dată per proces."""
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run, name='document-text', daemon=True)
+            _worker.start()
+            _wake.set()
+
+def notify():
+    """Trezește firul de extragere (apelat după salvarea unui document nou)."""
+    _wake.set()
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Extrage textul documentelor pentru căutarea în conținut")
+    parser.add_argument('--retry-errors', action='store_true',
+                        help="reia și documentele la care extragerea a eșuat sau nu era posibilă")
+    args = parser.parse_args()
+
+    if args.retry_errors:
+        print(f"Documente puse din nou în coadă: {retry_errors()}")
+    total = {'processed': 0, 'done': 0, 'unsupported': 0, 'errors': 0}
+    while True:
+        report = process_pending()
+        for key in total:
+            total[key] += report[key]
+        if report['processed'] < DOCUMENT_TEXT_BATCH_SIZE:
+            break
+    print(f"Documente procesate: {total['processed']} (text extras: {total['done']}, "
+          f"format nesuportat: {total['unsupported']}, erori: {total['errors']})")
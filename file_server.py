@@ -0,0 +1,441 @@
+# Server HTTP pentru imaginile produselor, miniaturile lor și descărcarea documentelor.
+#
+# Paginile Streamlit nu mai includ fișierele în HTML (base64), ci le referă prin URL; browserul
+# le descarcă separat, le încarcă doar când devin vizibile (`loading="lazy"`) și le păstrează
+# în cache pe baza antetelor ETag și Cache-Control. Serverul rulează într-un fir de execuție
+# în fundal, în același proces cu aplicația, pe portul IMAGE_SERVER_PORT.
+#
+#   /images/<cale în product_images>                  imaginea originală
+#   /thumbnails/<variantă>/<cale în product_images>   miniatura (vezi thumbnails.py)
+#   /placeholder/<variantă>.png                       imaginea pentru produsele fără poză
+#   /documents/<cale în uploaded_documents>?...       document, doar prin URL semnat (download_url)
+#   /exports/documents.zip?...                        arhivă ZIP cu documente, prin URL semnat (export_url)
+
+import email.utils
+import hashlib
+import datetime
+import hmac
+import mimetypes
+import os
+import posixpath
+import re
+import secrets
+import threading
+import time
+import urllib.parse
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import thumbnails
+
+PRODUCT_IMAGES_DIR = os.environ.get('PRODUCT_IMAGES_DIR', 'product_images')
+IMAGE_SERVER_ADDRESS = os.environ.get('IMAGE_SERVER_ADDRESS', '0.0.0.0')
+IMAGE_SERVER_PORT = int(os.environ.get('IMAGE_SERVER_PORT', '5001'))
+# URL-ul public al serverului, dacă diferă de <gazda aplicației>:IMAGE_SERVER_PORT (ex. proxy)
+IMAGE_BASE_URL = os.environ.get('IMAGE_BASE_URL', '').rstrip('/')
+# Cât timp poate folosi browserul o imagine originală fără să o revalideze (secunde)
+IMAGE_CACHE_MAX_AGE = int(os.environ.get('IMAGE_CACHE_MAX_AGE', '3600'))
+
+# Miniaturile cu hash în URL nu se schimbă niciodată: pot fi păstrate oricât
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+DOCUMENTS_DIR = os.environ.get('DOCUMENTS_DIR', 'uploaded_documents')
+# Cheia pentru semnarea URL-urilor de descărcare; fără ea se generează una per proces
+# (suficient, fiindcă serverul rulează în același proces cu paginile care semnează URL-urile)
+DOWNLOAD_SECRET = os.environ.get('DOWNLOAD_SECRET', '').encode() or secrets.token_bytes(32)
+# Cât timp este valabil un URL de descărcare și cât rămâne activă o sesiune fără activitate (secunde)
+DOWNLOAD_URL_TTL = int(os.environ.get('DOWNLOAD_URL_TTL', '3600'))
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+_RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# Sesiunile Streamlit autentificate care pot descărca documente: cheie -> (user_id, ultima folosire)
+_download_sessions = {}
+_download_sessions_lock = threading.Lock()
+
+_server = None
+_server_lock = threading.Lock()
+
+class ImageRequestHandler(BaseHTTPRequestHandler):
+    server_version = 'LedBlastImages/1.0'
+
+    def do_GET(self):
+        self._handle(send_body=True)
+
+    def do_HEAD(self):
+        self._handle(send_body=False)
+
+    def _handle(self, send_body):
+        url = urllib.parse.urlsplit(self.path)
+        query = urllib.parse.parse_qs(url.query)
+        parts = urllib.parse.unquote(url.path).lstrip('/').split('/', 1)
+        route, rest = parts[0], parts[1] if len(parts) > 1 else ''
+
+        try:
+            if route == 'images':
+                self._send_original(rest, send_body)
+            elif route == 'thumbnails':
+                size, _, image_path = rest.partition('/')
+                self._send_thumbnail(size, image_path, query.get('v', [None])[0], send_body)
+            elif route == 'documents':
+                self._send_document(rest, query, send_body)
+            elif route == 'exports' and rest == 'documents.zip':
+                self._send_export(query, send_body)
+            elif route == 'placeholder':
+                size = rest[:-len('.png')] if rest.endswith('.png') else rest
+                if size not in thumbnails.THUMBNAIL_SIZES:
+                    return self.send_error(HTTPStatus.NOT_FOUND)
+                self._send_bytes(thumbnails.get_placeholder(size), 'image/png', f'"placeholder-{size}"',
+                                 IMMUTABLE_CACHE_CONTROL, None, send_body)
+            else:
+                self.send_error(HTTPStatus.NOT_FOUND)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _send_original(self, image_path, send_body):
+        path = _resolve_image_path(image_path)
+        if path is None:
+            return self.send_error(HTTPStatus.NOT_FOUND)
+
+        stat = os.stat(path)
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        if self._not_modified(etag):
+            return
+        with open(path, 'rb') as f:
+            data = f.read()
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self._send_bytes(data, content_type, etag, f'public, max-age={IMAGE_CACHE_MAX_AGE}',
+                         email.utils.formatdate(stat.st_mtime, usegmt=True), send_body)
+
+    def _send_thumbnail(self, size, image_path, image_hash, send_body):
+        if size not in thumbnails.THUMBNAIL_SIZES:
+            return self.send_error(HTTPStatus.NOT_FOUND)
+        path = _resolve_image_path(image_path)
+        if path is None:
+            return self.send_error(HTTPStatus.NOT_FOUND)
+
+        # Cu hash-ul în URL, ETag-ul se cunoaște fără a citi fișierul
+        if image_hash and len(image_hash) == 64:
+            cache_control = IMMUTABLE_CACHE_CONTROL
+        else:
+            image_hash = thumbnails.content_hash_for_path(path)
+            cache_control = f'public, max-age={IMAGE_CACHE_MAX_AGE}'
+        etag = f'"{image_hash}-{size}"'
+        if self._not_modified(etag):
+            return
+
+        data = thumbnails.get_thumbnail(path, image_hash, size)
+        if data is None:
+            return self.send_error(HTTPStatus.NOT_FOUND)
+        self._send_bytes(data, 'image/png', etag, cache_control, None, send_body)
+
+    def _send_document(self, document_path, query, send_body):
+        params = {key: values[0] for key, values in query.items()}
+        if not _verify_download(document_path, params):
+            return self.send_error(HTTPStatus.FORBIDDEN)
+        path = _resolve_path(DOCUMENTS_DIR, document_path)
+        if path is None:
+            return self.send_error(HTTPStatus.NOT_FOUND)
+
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+            if self._not_modified(etag):
+                return
+
+            # Un singur interval (Range: bytes=a-b); cererile cu mai multe intervale primesc tot fișierul
+            start, end = 0, stat.st_size - 1
+            status = HTTPStatus.OK
+            range_header = self.headers.get('Range')
+            if_range = self.headers.get('If-Range')
+            match = _RANGE_PATTERN.match(range_header.strip()) if range_header else None
+            if match and (not if_range or if_range.strip() == etag) and any(match.groups()):
+                first, last = match.groups()
+                if first:
+                    start = int(first)
+                    end = min(int(last), stat.st_size - 1) if last else stat.st_size - 1
+                else:
+                    start = max(0, stat.st_size - int(last))
+                if start >= stat.st_size or start > end:
+                    self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                    self.send_header('Content-Range', f'bytes */{stat.st_size}')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                status = HTTPStatus.PARTIAL_CONTENT
+
+            file_name = params.get('n') or os.path.basename(path)
+            self.send_response(status)
+            self.send_header('Content-Type', mimetypes.guess_type(file_name)[0] or 'application/octet-stream')
+            self.send_header('Content-Length', str(end - start + 1))
+            self.send_header('Content-Disposition',
+                             f"attachment; filename*=UTF-8''{urllib.parse.quote(file_name)}")
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'private, no-cache')
+            self.send_header('Last-Modified', email.utils.formatdate(stat.st_mtime, usegmt=True))
+            if status == HTTPStatus.PARTIAL_CONTENT:
+                self.send_header('Content-Range', f'bytes {start}-{end}/{stat.st_size}')
+            self.end_headers()
+            if not send_body:
+                return
+
+            # Fișierul este trimis în bucăți, fără a fi citit întreg în memorie
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+    def _send_export(self, query, send_body):
+        params = {key: values[0] for key, values in query.items()}
+        filters = {key: params[key] for key in EXPORT_FILTERS if params.get(key)}
+        if not _verify_download(_export_key(filters), params):
+            return self.send_error(HTTPStatus.FORBIDDEN)
+        try:
+            supplier_id = int(filters['supplier_id']) if 'supplier_id' in filters else None
+            start_date = datetime.date.fromisoformat(filters['start_date']) if 'start_date' in filters else None
+            end_date = datetime.date.fromisoformat(filters['end_date']) if 'end_date' in filters else None
+        except ValueError:
+            return self.send_error(HTTPStatus.BAD_REQUEST)
+
+        # Dimensiunea arhivei nu se cunoaște dinainte: fără Content-Length, răspunsul se
+        # termină la închiderea conexiunii (HTTP/1.0)
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'application/zip')
+        self.send_header('Content-Disposition',
+                         f"attachment; filename*=UTF-8''{urllib.parse.quote(params.get('n') or 'documente.zip')}")
+        self.send_header('Cache-Control', 'private, no-store')
+        self.end_headers()
+        if not send_body:
+            return
+
+        import document_export
+        try:
+            document_export.write_documents_zip(self.wfile, supplier_id=supplier_id, category=filters.get('category'),
+                                                start_date=start_date, end_date=end_date)
+        except (BrokenPipeError, ConnectionResetError):
+            raise
+        except Exception as e:
+            # Antetele au fost deja trimise: arhiva rămâne incompletă, iar conexiunea se închide
+            print(f"Eroare la exportul documentelor: {str(e)}")
+        self.close_connection = True
+
+    def _not_modified(self, etag):
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match and (if_none_match.strip() == '*'
+                              or etag in [tag.strip() for tag in if_none_match.split(',')]):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return True
+        return False
+
+    def _send_bytes(self, data, content_type, etag, cache_control, last_modified, send_body):
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', cache_control)
+        if last_modified:
+            self.send_header('Last-Modified', last_modified)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Cererile nu sunt jurnalizate (câte una per miniatură afișată)
+        pass
+
+def _resolve_path(root_dir, relative_path):
+    """Transformă calea din URL în calea fișierului din `root_dir` (sau None).
+
+    Căile care ies din director (`..`, legături simbolice) sunt refuzate.
+    """
+    if not relative_path:
+        return None
+    root = os.path.realpath(root_dir)
+    path = os.path.realpath(os.path.join(root, posixpath.normpath(relative_path).lstrip('/')))
+    if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+        return None
+    return path
+
+def _resolve_image_path(image_path):
+    return _resolve_path(PRODUCT_IMAGES_DIR, image_path)
+
+def start_server():
+    """Pornește serverul de imagini în fundal, o singură dată per proces.
+
+    Returnează True dacă serverul rulează. Dacă portul este deja ocupat (de exemplu de un alt
+    proces al aplicației), afișează eroarea și returnează False.
+    """
+    global _server
+    with _server_lock:
+        if _server is not None:
+            return True
+        try:
+            _server = ThreadingHTTPServer((IMAGE_SERVER_ADDRESS, IMAGE_SERVER_PORT), ImageRequestHandler)
+        except OSError as e:
+            print(f"Eroare la pornirea serverului de imagini pe portul {IMAGE_SERVER_PORT}: {str(e)}")
+            return False
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name='image-server', daemon=True).start()
+        return True
+
+def get_base_url(host=None):
+    """Returnează URL-ul de bază al serverului de imagini, așa cum îl vede browserul.
+
+    `host` este gazda din cererea curentă (antetul Host al paginii Streamlit); portul ei
+    este înlocuit cu IMAGE_SERVER_PORT. Fără `host` se folosește `localhost`.
+    """
+    if IMAGE_BASE_URL:
+        return IMAGE_BASE_URL
+    hostname = urllib.parse.urlsplit(f"//{host}").hostname if host else None
+    hostname = hostname or 'localhost'
+    if ':' in hostname:
+        hostname = f"[{hostname}]"
+    return f"http://{hostname}:{IMAGE_SERVER_PORT}"
+
+def _relative_path(root_dir, file_path):
+    """Calea lui `file_path` relativă la `root_dir`, sau None dacă este în afara directorului.
+
+    Calculată doar din text, fără acces la disc (este apelată pentru fiecare rând afișat);
+    legăturile simbolice sunt verificate de _resolve_path(), la cererea fișierului.
+    """
+    if not file_path:
+        return None
+    root = posixpath.normpath(str(root_dir).replace(os.sep, '/'))
+    path = posixpath.normpath(str(file_path).replace(os.sep, '/'))
+    if posixpath.isabs(root) != posixpath.isabs(path):
+        root = posixpath.normpath(os.path.abspath(root).replace(os.sep, '/'))
+        path = posixpath.normpath(os.path.abspath(path).replace(os.sep, '/'))
+    if root == '.':
+        relative = path
+    elif path.startswith(root.rstrip('/') + '/'):
+        relative = path[len(root.rstrip('/')) + 1:]
+    else:
+        return None
+    if not relative or relative == '..' or relative.startswith('../') or posixpath.isabs(relative):
+        return None
+    return relative
+
+def _relative_image_path(image_path):
+    relative = _relative_path(PRODUCT_IMAGES_DIR, image_path)
+    return urllib.parse.quote(relative) if relative else None
+
+def image_url(image_path, base_url=None):
+    """Returnează URL-ul imaginii originale, sau None dacă nu este în PRODUCT_IMAGES_DIR."""
+    relative = _relative_image_path(image_path)
+    if relative is None:
+        return None
+    return f"{base_url or get_base_url()}/images/{relative}"
+
+def thumbnail_url(image_path, image_hash=None, size='small', base_url=None):
+    """Returnează URL-ul miniaturii, sau al placeholder-ului dacă produsul nu are imagine.
+
+    Hash-ul imaginii face parte din URL: la schimbarea imaginii se schimbă și URL-ul, deci
+    browserul poate păstra miniaturile în cache fără revalidare.
+    """
+    base_url = base_url or get_base_url()
+    relative = _relative_image_path(image_path)
+    if relative is None:
+        return f"{base_url}/placeholder/{size}.png"
+    url = f"{base_url}/thumbnails/{size}/{relative}"
+    return f"{url}?v={image_hash}" if image_hash else url
+
+def _download_signature(document_path, session_key, expires, file_name):
+    message = '\n'.join([document_path, session_key, str(expires), file_name]).encode()
+    return hmac.new(DOWNLOAD_SECRET, message, hashlib.sha256).hexdigest()
+
+def _verify_download(document_path, params):
+    """Verifică semnătura, expirarea și sesiunea unui URL de descărcare."""
+    session_key = params.get('s', '')
+    try:
+        expires = int(params.get('e', ''))
+    except ValueError:
+        return False
+    expected = _download_signature(document_path, session_key, expires, params.get('n', ''))
+    if not hmac.compare_digest(expected, params.get('sig', '')) or expires < time.time():
+        return False
+
+    with _download_sessions_lock:
+        session = _download_sessions.get(session_key)
+        if session is None or time.monotonic() - session[1] > DOWNLOAD_URL_TTL:
+            _download_sessions.pop(session_key, None)
+            return False
+    return True
+
+def _register_download_session(session_key, user_id):
+    # Sesiunile Streamlit abandonate (fără deconectare) sunt șterse după DOWNLOAD_URL_TTL
+    now = time.monotonic()
+    with _download_sessions_lock:
+        expired = [key for key, (_, last_used) in _download_sessions.items() if now - last_used > DOWNLOAD_URL_TTL]
+        for key in expired:
+            del _download_sessions[key]
+        _download_sessions[session_key] = (user_id, now)
+
+def download_url(file_path, session_key, user_id, file_name=None, base_url=None):
+    """Returnează un URL semnat pentru descărcarea unui document din DOCUMENTS_DIR.
+
+    URL-ul este valabil DOWNLOAD_URL_TTL secunde și doar cât timp sesiunea `session_key`
+    (generată de pagină pentru utilizatorul autentificat) este activă; la deconectare,
+    revoke_download_session() invalidează toate URL-urile sesiunii. Returnează None dacă
+    fișierul nu este în DOCUMENTS_DIR.
+    """
+    relative = _relative_path(DOCUMENTS_DIR, file_path)
+    if relative is None or not session_key:
+        return None
+    _register_download_session(session_key, user_id)
+
+    file_name = file_name or posixpath.basename(relative)
+    expires = int(time.time()) + DOWNLOAD_URL_TTL
+    query = urllib.parse.urlencode({
+        's': session_key,
+        'e': expires,
+        'n': file_name,
+        'sig': _download_signature(relative, session_key, expires, file_name),
+    })
+    return f"{base_url or get_base_url()}/documents/{urllib.parse.quote(relative)}?{query}"
+
+# Filtrele acceptate de exportul ZIP; fac parte din semnătura URL-ului
+EXPORT_FILTERS = ('supplier_id', 'category', 'start_date', 'end_date')
+
+def _export_key(filters):
+    return 'exports/documents.zip?' + urllib.parse.urlencode(sorted(filters.items()))
+
+def export_url(session_key, user_id, supplier_id=None, category=None, start_date=None, end_date=None,
+               file_name=None, base_url=None):
+    """Returnează un URL semnat pentru exportul ZIP al documentelor filtrate (vezi document_export.py).
+
+    Filtrele au semnificația din database.get_documents (`start_date` inclusă, `end_date`
+    exclusă); URL-ul respectă aceleași reguli de valabilitate ca download_url().
+    """
+    if not session_key:
+        return None
+    _register_download_session(session_key, user_id)
+
+    filters = {
+        'supplier_id': str(supplier_id) if supplier_id else None,
+        'category': category,
+        'start_date': start_date.isoformat() if start_date else None,
+        'end_date': end_date.isoformat() if end_date else None,
+    }
+    filters = {key: value for key, value in filters.items() if value}
+    file_name = file_name or 'documente.zip'
+    expires = int(time.time()) + DOWNLOAD_URL_TTL
+    query = urllib.parse.urlencode({
+        **filters,
+        's': session_key,
+        'e': expires,
+        'n': file_name,
+        'sig': _download_signature(_export_key(filters), session_key, expires, file_name),
+    })
+    return f"{base_url or get_base_url()}/exports/documents.zip?{query}"
+
+def revoke_download_session(session_key):
+    """Invalidează URL-urile de descărcare ale unei sesiuni (apelată la deconectare)."""
+    with _download_sessions_lock:
+        _download_sessions.pop(session_key, None)
@@ -0,0 +1,178 @@
+# Import în bloc al imaginilor de produs dintr-o arhivă ZIP.
+#
+# Fișierele din arhivă sunt denumite după SKU (ex. `LCD-15-001.jpg`). Arhiva este citită
+# membru cu membru, fără a fi dezarhivată; imaginile potrivite cu un produs sunt salvate în
+# product_images/ și transformate în miniaturi (vezi thumbnails.py) pe un pool de procese,
+# iar la final image_path/image_hash sunt actualizate pentru toate produsele printr-o
+# singură instrucțiune UPDATE.
+#
+# Utilizare: python image_import.py poze_furnizor.zip [--workers 4] [--dry-run]
+
+import multiprocessing
+import os
+import posixpath
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from psycopg2.extras import execute_values
+
+import database as db
+import thumbnails
+
+PRODUCT_IMAGES_DIR = os.environ.get('PRODUCT_IMAGES_DIR', 'product_images')
+IMAGE_IMPORT_WORKERS = int(os.environ.get('IMAGE_IMPORT_WORKERS', str(os.cpu_count() or 2)))
+# Fișierele mai mari sunt ignorate (protecție față de arhive cu conținut neașteptat)
+IMAGE_IMPORT_MAX_FILE_BYTES = int(os.environ.get('IMAGE_IMPORT_MAX_FILE_BYTES', str(20 * 1024 * 1024)))
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp')
+
+UPDATE_IMAGES_SQL = """
+    UPDATE products p
+    SET image_path = v.image_path, image_hash = v.image_hash
+    FROM (VALUES %s) AS v(id, image_path, image_hash)
+    WHERE p.id = v.id
+"""
+
+def _process_image(file_data, dest_path):
+    """Rulează într-un proces separat: salvează originalul și generează miniaturile."""
+    image_hash = thumbnails.content_hash(file_data)
+    thumbnails.create_thumbnails(file_data, image_hash)
+    tmp_path = f"{dest_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(file_data)
+    os.replace(tmp_path, dest_path)
+    return image_hash
+
+def _image_members(archive, skipped):
+    for member in archive.infolist():
+        name = member.filename
+        base_name = posixpath.basename(name)
+        if member.is_dir() or name.startswith('__MACOSX/') or base_name.startswith('.'):
+            continue
+        stem, extension = posixpath.splitext(base_name)
+        if extension.lower() not in IMAGE_EXTENSIONS:
+            skipped.append({'file': name, 'reason': 'nu este imagine'})
+        elif member.file_size > IMAGE_IMPORT_MAX_FILE_BYTES:
+            skipped.append({'file': name, 'reason': 'fișier prea mare'})
+        else:
+            yield member, stem.strip(), extension.lower()
+
+def _products_by_sku(skus):
+    with db.db_cursor() as cursor:
+        cursor.execute("SELECT id, sku FROM products WHERE upper(sku) = ANY(%s)",
+                       [[sku.upper() for sku in skus]])
+        return {sku.upper(): product_id for product_id, sku in cursor.fetchall()}
+
+def import_product_images(source, workers=IMAGE_IMPORT_WORKERS, dry_run=False):
+    """Importă imaginile de produs dintr-o arhivă ZIP (cale sau fișier binar deschis).
+
+    Numele fișierului, fără extensie, este comparat cu SKU-ul produsului fără a ține cont
+    de majuscule. Cu `dry_run=True` se face doar potrivirea, fără a salva nimic.
+
+    Returnează un raport {files, matched, updated, unmatched, skipped, errors, bytes,
+    elapsed, images_per_second}; `unmatched` este lista fișierelor fără produs, `skipped`
+    și `errors` conțin {'file', 'reason'}.
+    """
+    start = time.monotonic()
+    skipped = []
+    errors = []
+    unmatched = []
+    results = []  # (product_id, image_path, image_hash)
+    total_bytes = 0
+
+    with zipfile.ZipFile(source) as archive:
+        members = list(_image_members(archive, skipped))
+        files_count = len(members) + len(skipped)
+        products = _products_by_sku({stem for _, stem, _ in members}) if members else {}
+
+        matched = []
+        seen = set()
+        for member, stem, extension in members:
+            product_id = products.get(stem.upper())
+            if product_id is None:
+                unmatched.append(member.filename)
+            elif product_id in seen:
+                skipped.append({'file': member.filename, 'reason': 'imagine duplicat pentru același SKU'})
+            else:
+                seen.add(product_id)
+                matched.append((member, product_id, os.path.join(PRODUCT_IMAGES_DIR, f"product_{product_id}{extension}")))
+
+        if matched and not dry_run:
+            os.makedirs(PRODUCT_IMAGES_DIR, exist_ok=True)
+            # Procese noi (spawn), nu copii ale procesului aplicației cu firele lui de execuție
+            with ProcessPoolExecutor(max_workers=max(1, workers),
+                                     mp_context=multiprocessing.get_context('spawn')) as executor:
+                pending = {}
+                for member, product_id, dest_path in matched:
+                    # Limităm imaginile citite în memorie și încă neprocesate
+                    if len(pending) >= max(1, workers) * 2:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            _collect(future, pending.pop(future), results, errors)
+                    file_data = archive.read(member)
+                    total_bytes += len(file_data)
+                    future = executor.submit(_process_image, file_data, dest_path)
+                    pending[future] = (member.filename, product_id, dest_path)
+                for future in list(pending):
+                    _collect(future, pending.pop(future), results, errors)
+
+    updated = 0
+    if results:
+        with db.db_cursor() as cursor:
+            execute_values(cursor, UPDATE_IMAGES_SQL, results, page_size=len(results))
+            updated = cursor.rowcount
+
+    elapsed = time.monotonic() - start
+    processed = len(results)
+    return {
+        'files': files_count,
+        'matched': len(matched),
+        'updated': updated,
+        'unmatched': unmatched,
+        'skipped': skipped,
+        'errors': errors,
+        'bytes': total_bytes,
+        'elapsed': elapsed,
+        'images_per_second': processed / elapsed if elapsed > 0 else 0.0,
+        'dry_run': dry_run,
+    }
+
+def _collect(future, task, results, errors):
+    file_name, product_id, dest_path = task
+    try:
+        results.append((product_id, dest_path, future.result()))
+    except Exception as e:
+        errors.append({'file': file_name, 'reason': str(e)})
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Import imagini de produs dintr-o arhivă ZIP (fișiere denumite după SKU)")
+    parser.add_argument('path', help="arhiva ZIP")
+    parser.add_argument('--workers', type=int, default=IMAGE_IMPORT_WORKERS, help="numărul de procese pentru redimensionare")
+    parser.add_argument('--dry-run', action='store_true', help="doar potrivirea fișierelor cu produsele, fără salvare")
+    args = parser.parse_args()
+
+    try:
+        report = import_product_images(args.path, workers=args.workers, dry_run=args.dry_run)
+    except zipfile.BadZipFile as e:
+        print(f"Eroare: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    print(f"Fișiere în arhivă: {report['files']}")
+    print(f"Potrivite cu produse: {report['matched']}" + (" (simulare, nimic salvat)" if report['dry_run'] else ""))
+    print(f"Produse actualizate: {report['updated']}")
+    print(f"Durată: {report['elapsed']:.2f}s ({report['images_per_second']:.1f} imagini/s, "
+          f"{report['bytes'] / 1024 / 1024:.1f} MB)")
+    for row in report['skipped']:
+        print(f"  ignorat {row['file']}: {row['reason']}")
+    for row in report['errors']:
+        print(f"  eroare {row['file']}: {row['reason']}")
+    if report['unmatched']:
+        print(f"Fișiere fără produs: {len(report['unmatched'])}")
+        for file_name in report['unmatched']:
+            print(f"  {file_name}")
+    if report['unmatched'] or report['errors']:
+        sys.exit(1)
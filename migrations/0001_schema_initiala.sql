@@ -0,0 +1,92 @@
+-- Schema inițială: tabelele de bază ale aplicației.
+-- Idempotentă, pentru a putea fi aplicată și peste o bază importată din backup.sql.
+
+-- Tabelul utilizatori
+CREATE TABLE IF NOT EXISTS users (
+    id SERIAL PRIMARY KEY,
+    username VARCHAR(50) UNIQUE NOT NULL,
+    email VARCHAR(100) UNIQUE NOT NULL,
+    password_hash VARCHAR(255) NOT NULL,
+    role VARCHAR(20) NOT NULL,
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_login TIMESTAMP
+);
+
+-- Tabelul furnizori
+CREATE TABLE IF NOT EXISTS suppliers (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    contact_person VARCHAR(100),
+    email VARCHAR(100),
+    phone VARCHAR(20),
+    country VARCHAR(50) DEFAULT 'China',
+    city VARCHAR(50),
+    address TEXT,
+    postal_code VARCHAR(20),
+    tax_id VARCHAR(50),
+    ce_certification BOOLEAN DEFAULT FALSE,
+    rohs_certification BOOLEAN DEFAULT FALSE,
+    notes TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Tabelul produse
+CREATE TABLE IF NOT EXISTS products (
+    id SERIAL PRIMARY KEY,
+    sku VARCHAR(50) UNIQUE NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    description TEXT,
+    category VARCHAR(50),
+    supplier_id INTEGER REFERENCES suppliers(id),
+    purchase_price DECIMAL(10, 2),
+    stock_quantity INTEGER DEFAULT 0,
+    stock_alert_threshold INTEGER DEFAULT 5,
+    image_path VARCHAR(255),
+    dimensions VARCHAR(50),
+    weight DECIMAL(8, 2),
+    technical_specs TEXT,
+    last_purchase_date TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Tabelul intrări stoc
+CREATE TABLE IF NOT EXISTS stock_entries (
+    id SERIAL PRIMARY KEY,
+    product_id INTEGER REFERENCES products(id),
+    quantity INTEGER NOT NULL,
+    unit_price DECIMAL(10, 2) NOT NULL,
+    supplier_id INTEGER REFERENCES suppliers(id),
+    entry_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    invoice_number VARCHAR(50),
+    notes TEXT
+);
+
+-- Tabelul documente
+CREATE TABLE IF NOT EXISTS documents (
+    id SERIAL PRIMARY KEY,
+    title VARCHAR(100) NOT NULL,
+    file_name VARCHAR(255) NOT NULL,
+    file_path VARCHAR(255) NOT NULL,
+    file_size INTEGER NOT NULL,
+    category VARCHAR(50) NOT NULL,
+    supplier_id INTEGER REFERENCES suppliers(id),
+    product_id INTEGER REFERENCES products(id),
+    upload_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    uploaded_by INTEGER REFERENCES users(id)
+);
+
+-- Tabelul jurnal audit
+CREATE TABLE IF NOT EXISTS audit_log (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER REFERENCES users(id),
+    action_type VARCHAR(50) NOT NULL,
+    table_name VARCHAR(50) NOT NULL,
+    record_id INTEGER,
+    action_details TEXT,
+    ip_address VARCHAR(50),
+    user_agent TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
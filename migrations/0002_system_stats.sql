@@ -0,0 +1,175 @@
+-- Statistici sistem: tabelul system_stats conține un singur rând cu contoarele afișate în dashboard.
+-- Triggerele la nivel de instrucțiune (cu tabele de tranziție) aplică doar diferențele,
+-- astfel că get_stats() devine o citire după cheia primară, indiferent de mărimea catalogului.
+CREATE TABLE IF NOT EXISTS system_stats (
+    id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    suppliers_count BIGINT NOT NULL DEFAULT 0,
+    products_count BIGINT NOT NULL DEFAULT 0,
+    stock_value NUMERIC(16, 2) NOT NULL DEFAULT 0,
+    low_stock_count BIGINT NOT NULL DEFAULT 0,
+    users_count BIGINT NOT NULL DEFAULT 0,
+    documents_count BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Recalculează complet contoarele (folosită la inițializare, TRUNCATE și de comanda rebuild-stats)
+CREATE OR REPLACE FUNCTION rebuild_system_stats() RETURNS void AS $$
+BEGIN
+    INSERT INTO system_stats (id, suppliers_count, products_count, stock_value,
+                              low_stock_count, users_count, documents_count, updated_at)
+    SELECT 1,
+           (SELECT COUNT(*) FROM suppliers),
+           p.products_count,
+           p.stock_value,
+           p.low_stock_count,
+           (SELECT COUNT(*) FROM users),
+           (SELECT COUNT(*) FROM documents),
+           CURRENT_TIMESTAMP
+    FROM (
+        SELECT COUNT(*) AS products_count,
+               COALESCE(SUM(stock_quantity * purchase_price), 0) AS stock_value,
+               COUNT(*) FILTER (WHERE stock_quantity <= stock_alert_threshold) AS low_stock_count
+        FROM products
+    ) p
+    ON CONFLICT (id) DO UPDATE SET
+        suppliers_count = EXCLUDED.suppliers_count,
+        products_count = EXCLUDED.products_count,
+        stock_value = EXCLUDED.stock_value,
+        low_stock_count = EXCLUDED.low_stock_count,
+        users_count = EXCLUDED.users_count,
+        documents_count = EXCLUDED.documents_count,
+        updated_at = EXCLUDED.updated_at;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION system_stats_rebuild_trg() RETURNS trigger AS $$
+BEGIN
+    PERFORM rebuild_system_stats();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Contor simplu (furnizori, utilizatori, documente); coloana vine ca argument al triggerului
+CREATE OR REPLACE FUNCTION system_stats_count_trg() RETURNS trigger AS $$
+DECLARE
+    delta BIGINT;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT COUNT(*) INTO delta FROM new_rows;
+    ELSE
+        SELECT -COUNT(*) INTO delta FROM old_rows;
+    END IF;
+    IF delta <> 0 THEN
+        EXECUTE format('UPDATE system_stats SET %1$I = %1$I + $1, updated_at = CURRENT_TIMESTAMP WHERE id = 1',
+                       TG_ARGV[0])
+        USING delta;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Produse: număr, valoare stoc și număr produse sub pragul de alertă
+CREATE OR REPLACE FUNCTION system_stats_products_trg() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE system_stats s SET
+            products_count = s.products_count + d.cnt,
+            stock_value = s.stock_value + d.val,
+            low_stock_count = s.low_stock_count + d.low,
+            updated_at = CURRENT_TIMESTAMP
+        FROM (
+            SELECT COUNT(*) AS cnt,
+                   COALESCE(SUM(stock_quantity * purchase_price), 0) AS val,
+                   COUNT(*) FILTER (WHERE stock_quantity <= stock_alert_threshold) AS low
+            FROM new_rows
+        ) d
+        WHERE s.id = 1 AND d.cnt > 0;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE system_stats s SET
+            products_count = s.products_count - d.cnt,
+            stock_value = s.stock_value - d.val,
+            low_stock_count = s.low_stock_count - d.low,
+            updated_at = CURRENT_TIMESTAMP
+        FROM (
+            SELECT COUNT(*) AS cnt,
+                   COALESCE(SUM(stock_quantity * purchase_price), 0) AS val,
+                   COUNT(*) FILTER (WHERE stock_quantity <= stock_alert_threshold) AS low
+            FROM old_rows
+        ) d
+        WHERE s.id = 1 AND d.cnt > 0;
+    ELSE
+        -- Actualizările care nu schimbă stocul/prețul/pragul nu ating rândul de statistici
+        UPDATE system_stats s SET
+            stock_value = s.stock_value + d.val,
+            low_stock_count = s.low_stock_count + d.low,
+            updated_at = CURRENT_TIMESTAMP
+        FROM (
+            SELECT n.val - o.val AS val, n.low - o.low AS low
+            FROM (SELECT COALESCE(SUM(stock_quantity * purchase_price), 0) AS val,
+                         COUNT(*) FILTER (WHERE stock_quantity <= stock_alert_threshold) AS low
+                  FROM new_rows) n,
+                 (SELECT COALESCE(SUM(stock_quantity * purchase_price), 0) AS val,
+                         COUNT(*) FILTER (WHERE stock_quantity <= stock_alert_threshold) AS low
+                  FROM old_rows) o
+        ) d
+        WHERE s.id = 1 AND (d.val <> 0 OR d.low <> 0);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS system_stats_products_ins ON products;
+CREATE TRIGGER system_stats_products_ins AFTER INSERT ON products
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION system_stats_products_trg();
+DROP TRIGGER IF EXISTS system_stats_products_upd ON products;
+CREATE TRIGGER system_stats_products_upd AFTER UPDATE ON products
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION system_stats_products_trg();
+DROP TRIGGER IF EXISTS system_stats_products_del ON products;
+CREATE TRIGGER system_stats_products_del AFTER DELETE ON products
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION system_stats_products_trg();
+
+DROP TRIGGER IF EXISTS system_stats_suppliers_ins ON suppliers;
+CREATE TRIGGER system_stats_suppliers_ins AFTER INSERT ON suppliers
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION system_stats_count_trg('suppliers_count');
+DROP TRIGGER IF EXISTS system_stats_suppliers_del ON suppliers;
+CREATE TRIGGER system_stats_suppliers_del AFTER DELETE ON suppliers
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION system_stats_count_trg('suppliers_count');
+
+DROP TRIGGER IF EXISTS system_stats_users_ins ON users;
+CREATE TRIGGER system_stats_users_ins AFTER INSERT ON users
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION system_stats_count_trg('users_count');
+DROP TRIGGER IF EXISTS system_stats_users_del ON users;
+CREATE TRIGGER system_stats_users_del AFTER DELETE ON users
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION system_stats_count_trg('users_count');
+
+DROP TRIGGER IF EXISTS system_stats_documents_ins ON documents;
+CREATE TRIGGER system_stats_documents_ins AFTER INSERT ON documents
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION system_stats_count_trg('documents_count');
+DROP TRIGGER IF EXISTS system_stats_documents_del ON documents;
+CREATE TRIGGER system_stats_documents_del AFTER DELETE ON documents
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION system_stats_count_trg('documents_count');
+
+DROP TRIGGER IF EXISTS system_stats_suppliers_truncate ON suppliers;
+CREATE TRIGGER system_stats_suppliers_truncate AFTER TRUNCATE ON suppliers
+    FOR EACH STATEMENT EXECUTE FUNCTION system_stats_rebuild_trg();
+DROP TRIGGER IF EXISTS system_stats_products_truncate ON products;
+CREATE TRIGGER system_stats_products_truncate AFTER TRUNCATE ON products
+    FOR EACH STATEMENT EXECUTE FUNCTION system_stats_rebuild_trg();
+DROP TRIGGER IF EXISTS system_stats_users_truncate ON users;
+CREATE TRIGGER system_stats_users_truncate AFTER TRUNCATE ON users
+    FOR EACH STATEMENT EXECUTE FUNCTION system_stats_rebuild_trg();
+DROP TRIGGER IF EXISTS system_stats_documents_truncate ON documents;
+CREATE TRIGGER system_stats_documents_truncate AFTER TRUNCATE ON documents
+    FOR EACH STATEMENT EXECUTE FUNCTION system_stats_rebuild_trg();
+
+-- Inițializăm rândul după ce triggerele sunt active, ca să nu pierdem modificări
+SELECT rebuild_system_stats() WHERE NOT EXISTS (SELECT 1 FROM system_stats);
@@ -0,0 +1,26 @@
+-- Indexuri secundare pentru interogările frecvente din database.py.
+-- Verificarea că sunt folosite: python database.py check-indexes
+
+-- Produse: join/filtrare după furnizor și ordonarea catalogului după nume
+CREATE INDEX IF NOT EXISTS idx_products_supplier_id ON products (supplier_id);
+CREATE INDEX IF NOT EXISTS idx_products_name ON products (name, id);
+
+-- Index parțial pentru alertele de stoc: conține doar produsele sub prag,
+-- deci rămâne mic chiar și pentru un catalog mare (get_stock_alerts)
+CREATE INDEX IF NOT EXISTS idx_products_low_stock ON products (stock_quantity)
+    WHERE stock_quantity <= stock_alert_threshold;
+
+-- Intrări stoc: cele mai recente intrări și istoricul per produs/furnizor
+CREATE INDEX IF NOT EXISTS idx_stock_entries_entry_date ON stock_entries (entry_date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_stock_entries_product_id ON stock_entries (product_id);
+CREATE INDEX IF NOT EXISTS idx_stock_entries_supplier_id ON stock_entries (supplier_id);
+
+-- Documente: fiecare filtru din get_documents, ordonat după data încărcării
+CREATE INDEX IF NOT EXISTS idx_documents_upload_date ON documents (upload_date DESC);
+CREATE INDEX IF NOT EXISTS idx_documents_supplier_id ON documents (supplier_id, upload_date DESC);
+CREATE INDEX IF NOT EXISTS idx_documents_product_id ON documents (product_id, upload_date DESC);
+CREATE INDEX IF NOT EXISTS idx_documents_category ON documents (category, upload_date DESC);
+
+-- Jurnal audit: rapoarte pe interval de timp și activitatea unui utilizator
+CREATE INDEX IF NOT EXISTS idx_audit_log_created_at ON audit_log (created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_audit_log_user_id ON audit_log (user_id, created_at DESC);
@@ -0,0 +1,8 @@
+-- Paginarea keyset ordonează după (entry_date, id) și (upload_date, id); o dată NULL
+-- ar întrerupe paginarea, deci coloanele devin obligatorii. Rândurile vechi fără dată
+-- (teoretic imposibile datorită valorii implicite) primesc data epocii, ca să apară ultimele.
+UPDATE stock_entries SET entry_date = TIMESTAMP '1970-01-01' WHERE entry_date IS NULL;
+ALTER TABLE stock_entries ALTER COLUMN entry_date SET NOT NULL;
+
+UPDATE documents SET upload_date = TIMESTAMP '1970-01-01' WHERE upload_date IS NULL;
+ALTER TABLE documents ALTER COLUMN upload_date SET NOT NULL;
@@ -0,0 +1,23 @@
+-- Notificări pentru invalidarea cache-ului de citire din database.py.
+-- Fiecare instrucțiune care modifică un tabel citit prin cache trimite numele tabelului
+-- pe canalul `table_changes`; notificările se livrează doar la commit, iar cele identice
+-- din aceeași tranzacție sunt comasate de PostgreSQL.
+
+CREATE OR REPLACE FUNCTION notify_table_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('table_changes', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS suppliers_notify_change ON suppliers;
+CREATE TRIGGER suppliers_notify_change AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON suppliers
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_table_change();
+
+DROP TRIGGER IF EXISTS products_notify_change ON products;
+CREATE TRIGGER products_notify_change AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON products
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_table_change();
+
+DROP TRIGGER IF EXISTS system_stats_notify_change ON system_stats;
+CREATE TRIGGER system_stats_notify_change AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON system_stats
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_table_change();
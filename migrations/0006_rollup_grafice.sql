@@ -0,0 +1,187 @@
+-- Tabele agregate pentru graficele din dashboard: valoarea stocului per categorie și
+-- achizițiile lunare per furnizor. Ca la system_stats, triggerele la nivel de instrucțiune
+-- aplică doar diferențele aduse de rândurile noi/modificate, fără a reagrega tot istoricul.
+CREATE TABLE IF NOT EXISTS stock_value_by_category (
+    category VARCHAR(50) PRIMARY KEY,  -- '' pentru produsele fără categorie
+    stock_value NUMERIC(16, 2) NOT NULL DEFAULT 0,
+    products_count BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS monthly_purchases_by_supplier (
+    month DATE NOT NULL,
+    supplier_id INTEGER NOT NULL,  -- 0 pentru intrările fără furnizor
+    total_value NUMERIC(16, 2) NOT NULL DEFAULT 0,
+    total_quantity BIGINT NOT NULL DEFAULT 0,
+    entries_count BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (month, supplier_id)
+);
+
+-- Recalculează complet ambele tabele (inițializare, TRUNCATE și comanda rebuild-rollups)
+CREATE OR REPLACE FUNCTION rebuild_chart_rollups() RETURNS void AS $$
+BEGIN
+    DELETE FROM stock_value_by_category;
+    INSERT INTO stock_value_by_category (category, stock_value, products_count)
+    SELECT COALESCE(category, ''), COALESCE(SUM(stock_quantity * purchase_price), 0), COUNT(*)
+    FROM products
+    GROUP BY 1;
+
+    DELETE FROM monthly_purchases_by_supplier;
+    INSERT INTO monthly_purchases_by_supplier (month, supplier_id, total_value, total_quantity, entries_count)
+    SELECT date_trunc('month', entry_date)::date, COALESCE(supplier_id, 0),
+           SUM(quantity * unit_price), SUM(quantity), COUNT(*)
+    FROM stock_entries
+    GROUP BY 1, 2;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION chart_rollups_rebuild_trg() RETURNS trigger AS $$
+BEGIN
+    PERFORM rebuild_chart_rollups();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Produse: diferența de valoare și de număr de produse, pe categorie
+CREATE OR REPLACE FUNCTION stock_value_by_category_trg() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO stock_value_by_category AS t (category, stock_value, products_count)
+        SELECT COALESCE(category, ''), COALESCE(SUM(stock_quantity * purchase_price), 0), COUNT(*)
+        FROM new_rows
+        GROUP BY 1
+        ON CONFLICT (category) DO UPDATE SET
+            stock_value = t.stock_value + EXCLUDED.stock_value,
+            products_count = t.products_count + EXCLUDED.products_count,
+            updated_at = CURRENT_TIMESTAMP;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE stock_value_by_category t SET
+            stock_value = t.stock_value - d.val,
+            products_count = t.products_count - d.cnt,
+            updated_at = CURRENT_TIMESTAMP
+        FROM (
+            SELECT COALESCE(category, '') AS category,
+                   COALESCE(SUM(stock_quantity * purchase_price), 0) AS val, COUNT(*) AS cnt
+            FROM old_rows
+            GROUP BY 1
+        ) d
+        WHERE t.category = d.category;
+    ELSE
+        -- Actualizările pot muta produse între categorii: aplicăm vechile rânduri cu minus
+        INSERT INTO stock_value_by_category AS t (category, stock_value, products_count)
+        SELECT category, SUM(val), SUM(cnt)
+        FROM (
+            SELECT COALESCE(category, '') AS category,
+                   COALESCE(stock_quantity * purchase_price, 0) AS val, 1 AS cnt
+            FROM new_rows
+            UNION ALL
+            SELECT COALESCE(category, ''), -COALESCE(stock_quantity * purchase_price, 0), -1
+            FROM old_rows
+        ) d
+        GROUP BY category
+        HAVING SUM(val) <> 0 OR SUM(cnt) <> 0
+        ON CONFLICT (category) DO UPDATE SET
+            stock_value = t.stock_value + EXCLUDED.stock_value,
+            products_count = t.products_count + EXCLUDED.products_count,
+            updated_at = CURRENT_TIMESTAMP;
+    END IF;
+    DELETE FROM stock_value_by_category WHERE products_count <= 0;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Intrări în stoc: diferența de valoare, cantitate și număr de intrări, pe lună și furnizor
+CREATE OR REPLACE FUNCTION monthly_purchases_trg() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO monthly_purchases_by_supplier AS t (month, supplier_id, total_value, total_quantity, entries_count)
+        SELECT date_trunc('month', entry_date)::date, COALESCE(supplier_id, 0),
+               SUM(quantity * unit_price), SUM(quantity), COUNT(*)
+        FROM new_rows
+        GROUP BY 1, 2
+        ON CONFLICT (month, supplier_id) DO UPDATE SET
+            total_value = t.total_value + EXCLUDED.total_value,
+            total_quantity = t.total_quantity + EXCLUDED.total_quantity,
+            entries_count = t.entries_count + EXCLUDED.entries_count,
+            updated_at = CURRENT_TIMESTAMP;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE monthly_purchases_by_supplier t SET
+            total_value = t.total_value - d.val,
+            total_quantity = t.total_quantity - d.qty,
+            entries_count = t.entries_count - d.cnt,
+            updated_at = CURRENT_TIMESTAMP
+        FROM (
+            SELECT date_trunc('month', entry_date)::date AS month, COALESCE(supplier_id, 0) AS supplier_id,
+                   SUM(quantity * unit_price) AS val, SUM(quantity) AS qty, COUNT(*) AS cnt
+            FROM old_rows
+            GROUP BY 1, 2
+        ) d
+        WHERE t.month = d.month AND t.supplier_id = d.supplier_id;
+    ELSE
+        INSERT INTO monthly_purchases_by_supplier AS t (month, supplier_id, total_value, total_quantity, entries_count)
+        SELECT month, supplier_id, SUM(val), SUM(qty), SUM(cnt)
+        FROM (
+            SELECT date_trunc('month', entry_date)::date AS month, COALESCE(supplier_id, 0) AS supplier_id,
+                   quantity * unit_price AS val, quantity AS qty, 1 AS cnt
+            FROM new_rows
+            UNION ALL
+            SELECT date_trunc('month', entry_date)::date, COALESCE(supplier_id, 0),
+                   -(quantity * unit_price), -quantity, -1
+            FROM old_rows
+        ) d
+        GROUP BY month, supplier_id
+        HAVING SUM(val) <> 0 OR SUM(qty) <> 0 OR SUM(cnt) <> 0
+        ON CONFLICT (month, supplier_id) DO UPDATE SET
+            total_value = t.total_value + EXCLUDED.total_value,
+            total_quantity = t.total_quantity + EXCLUDED.total_quantity,
+            entries_count = t.entries_count + EXCLUDED.entries_count,
+            updated_at = CURRENT_TIMESTAMP;
+    END IF;
+    DELETE FROM monthly_purchases_by_supplier WHERE entries_count <= 0;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS stock_value_by_category_ins ON products;
+CREATE TRIGGER stock_value_by_category_ins AFTER INSERT ON products
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION stock_value_by_category_trg();
+DROP TRIGGER IF EXISTS stock_value_by_category_upd ON products;
+CREATE TRIGGER stock_value_by_category_upd AFTER UPDATE ON products
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION stock_value_by_category_trg();
+DROP TRIGGER IF EXISTS stock_value_by_category_del ON products;
+CREATE TRIGGER stock_value_by_category_del AFTER DELETE ON products
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION stock_value_by_category_trg();
+DROP TRIGGER IF EXISTS stock_value_by_category_truncate ON products;
+CREATE TRIGGER stock_value_by_category_truncate AFTER TRUNCATE ON products
+    FOR EACH STATEMENT EXECUTE FUNCTION chart_rollups_rebuild_trg();
+
+DROP TRIGGER IF EXISTS monthly_purchases_ins ON stock_entries;
+CREATE TRIGGER monthly_purchases_ins AFTER INSERT ON stock_entries
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION monthly_purchases_trg();
+DROP TRIGGER IF EXISTS monthly_purchases_upd ON stock_entries;
+CREATE TRIGGER monthly_purchases_upd AFTER UPDATE ON stock_entries
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION monthly_purchases_trg();
+DROP TRIGGER IF EXISTS monthly_purchases_del ON stock_entries;
+CREATE TRIGGER monthly_purchases_del AFTER DELETE ON stock_entries
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION monthly_purchases_trg();
+DROP TRIGGER IF EXISTS monthly_purchases_truncate ON stock_entries;
+CREATE TRIGGER monthly_purchases_truncate AFTER TRUNCATE ON stock_entries
+    FOR EACH STATEMENT EXECUTE FUNCTION chart_rollups_rebuild_trg();
+
+-- Graficele sunt citite prin cache-ul din database.py: notificăm modificările (vezi 0005)
+DROP TRIGGER IF EXISTS stock_value_by_category_notify_change ON stock_value_by_category;
+CREATE TRIGGER stock_value_by_category_notify_change AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON stock_value_by_category
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_table_change();
+DROP TRIGGER IF EXISTS monthly_purchases_notify_change ON monthly_purchases_by_supplier;
+CREATE TRIGGER monthly_purchases_notify_change AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON monthly_purchases_by_supplier
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_table_change();
+
+-- Inițializăm tabelele după ce triggerele sunt active, ca să nu pierdem modificări
+SELECT rebuild_chart_rollups();
@@ -0,0 +1,4 @@
+-- Hash-ul SHA-256 al imaginii produsului: cheia miniaturilor din cache-ul de pe disc
+-- (vezi thumbnails.py). NULL pentru produsele fără imagine sau cu imagini salvate înainte
+-- de această migrație; pentru acestea miniaturile sunt generate la prima afișare.
+ALTER TABLE products ADD COLUMN IF NOT EXISTS image_hash CHAR(64);
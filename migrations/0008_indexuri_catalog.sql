@@ -0,0 +1,9 @@
+-- Indexuri pentru sortările catalogului paginat (get_products_page, PRODUCT_SORTS).
+-- Paginarea keyset compară (cheie de sortare, id) cu ultimul rând din pagina anterioară;
+-- expresiile trebuie să fie identice cu cele din database.py ca indexurile să fie folosite.
+-- Sortarea după nume folosește idx_products_name din migrația 0003.
+CREATE INDEX IF NOT EXISTS idx_products_sku_id ON products (sku, id);
+CREATE INDEX IF NOT EXISTS idx_products_stock_quantity_id ON products ((COALESCE(stock_quantity, 0)), id);
+CREATE INDEX IF NOT EXISTS idx_products_purchase_price_id ON products ((COALESCE(purchase_price, 0)), id);
+CREATE INDEX IF NOT EXISTS idx_products_last_purchase_date_id
+    ON products ((COALESCE(last_purchase_date, TIMESTAMP '1970-01-01')), id);
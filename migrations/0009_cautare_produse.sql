@@ -0,0 +1,18 @@
+-- Căutarea produselor în baza de date (search_products din database.py).
+--   * indexuri trigram (pg_trgm) pe SKU și nume: subșiruri (ILIKE '%...%') și greșeli de scriere
+--   * coloană tsvector generată din SKU, nume, descriere și specificații, cu index GIN: cuvinte
+--     din textele lungi, cu ponderi pentru ordonarea după relevanță
+-- Configurația 'simple' nu aplică stemming: codurile și termenii tehnici rămân neschimbați.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_products_sku_trgm ON products USING gin (sku gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_products_name_trgm ON products USING gin (name gin_trgm_ops);
+
+ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', coalesce(sku, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(description, '')), 'C') ||
+    setweight(to_tsvector('simple', coalesce(technical_specs, '')), 'D')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_products_search_vector ON products USING gin (search_vector);
@@ -0,0 +1,71 @@
+-- Depozit de documente adresat după conținut (vezi document_store.py).
+-- Fiecare fișier distinct este păstrat o singură dată, sub hash-ul SHA-256 al conținutului;
+-- rândurile din documents îl referă prin content_hash. ref_count este ținut la zi de
+-- triggere la nivel de instrucțiune, iar blob-urile rămase fără referințe sunt șterse de
+-- colectorul de gunoi după o perioadă de grație (unreferenced_since).
+CREATE TABLE IF NOT EXISTS document_blobs (
+    sha256 CHAR(64) PRIMARY KEY,
+    file_path VARCHAR(255) NOT NULL,
+    file_size BIGINT NOT NULL,
+    ref_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    unreferenced_since TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash CHAR(64) REFERENCES document_blobs(sha256);
+CREATE INDEX IF NOT EXISTS idx_documents_content_hash ON documents (content_hash);
+
+-- Index parțial pentru colectorul de gunoi: doar blob-urile fără referințe
+CREATE INDEX IF NOT EXISTS idx_document_blobs_unreferenced ON document_blobs (unreferenced_since)
+    WHERE ref_count = 0;
+
+-- Diferența de referințe per blob, aplicată o singură dată per instrucțiune
+CREATE OR REPLACE FUNCTION document_blobs_ref_count_trg() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE document_blobs b SET
+            ref_count = b.ref_count + d.delta,
+            unreferenced_since = NULL
+        FROM (SELECT content_hash, COUNT(*) AS delta FROM new_rows
+              WHERE content_hash IS NOT NULL GROUP BY 1) d
+        WHERE b.sha256 = d.content_hash;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE document_blobs b SET
+            ref_count = b.ref_count - d.delta,
+            unreferenced_since = CASE WHEN b.ref_count - d.delta <= 0 THEN CURRENT_TIMESTAMP END
+        FROM (SELECT content_hash, COUNT(*) AS delta FROM old_rows
+              WHERE content_hash IS NOT NULL GROUP BY 1) d
+        WHERE b.sha256 = d.content_hash;
+    ELSE
+        -- Actualizările pot muta documente de pe un blob pe altul
+        UPDATE document_blobs b SET
+            ref_count = b.ref_count + d.delta,
+            unreferenced_since = CASE WHEN b.ref_count + d.delta <= 0 THEN CURRENT_TIMESTAMP END
+        FROM (
+            SELECT content_hash, SUM(delta) AS delta
+            FROM (
+                SELECT content_hash, 1 AS delta FROM new_rows WHERE content_hash IS NOT NULL
+                UNION ALL
+                SELECT content_hash, -1 FROM old_rows WHERE content_hash IS NOT NULL
+            ) changes
+            GROUP BY content_hash
+            HAVING SUM(delta) <> 0
+        ) d
+        WHERE b.sha256 = d.content_hash;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS document_blobs_ref_count_ins ON documents;
+CREATE TRIGGER document_blobs_ref_count_ins AFTER INSERT ON documents
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION document_blobs_ref_count_trg();
+DROP TRIGGER IF EXISTS document_blobs_ref_count_upd ON documents;
+CREATE TRIGGER document_blobs_ref_count_upd AFTER UPDATE ON documents
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION document_blobs_ref_count_trg();
+DROP TRIGGER IF EXISTS document_blobs_ref_count_del ON documents;
+CREATE TRIGGER document_blobs_ref_count_del AFTER DELETE ON documents
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION document_blobs_ref_count_trg();
@@ -0,0 +1,59 @@
+-- Căutarea în conținutul documentelor (get_documents(query=...) din database.py).
+-- Textul este extras o singură dată per blob (vezi document_text.py) și păstrat în
+-- document_blobs.content_text; fiecare document are un tsvector din titlu, numele fișierului
+-- și textul blob-ului, cu index GIN. Configurația 'simple' păstrează neschimbate numerele de
+-- factură și codurile HS.
+ALTER TABLE document_blobs ADD COLUMN IF NOT EXISTS content_text TEXT;
+-- pending: de extras; done: text extras (posibil gol, ex. PDF scanat); unsupported: format
+-- necunoscut sau bibliotecă lipsă; error: fișier corupt sau ilizibil
+ALTER TABLE document_blobs ADD COLUMN IF NOT EXISTS text_status VARCHAR(20) NOT NULL DEFAULT 'pending';
+ALTER TABLE document_blobs ADD COLUMN IF NOT EXISTS text_extracted_at TIMESTAMP;
+
+-- Index parțial pentru coada de extragere
+CREATE INDEX IF NOT EXISTS idx_document_blobs_text_pending ON document_blobs (created_at)
+    WHERE text_status = 'pending';
+
+CREATE OR REPLACE FUNCTION document_search_vector(title TEXT, file_name TEXT, content_text TEXT)
+RETURNS tsvector AS $$
+    SELECT setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+           setweight(to_tsvector('simple', coalesce(file_name, '')), 'B') ||
+           setweight(to_tsvector('simple', coalesce(content_text, '')), 'C')
+$$ LANGUAGE sql IMMUTABLE;
+
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS search_vector tsvector;
+UPDATE documents d SET search_vector = document_search_vector(d.title, d.file_name,
+    (SELECT b.content_text FROM document_blobs b WHERE b.sha256 = d.content_hash));
+CREATE INDEX IF NOT EXISTS idx_documents_search_vector ON documents USING gin (search_vector);
+
+-- Documentele noi sau cu titlu/fișier schimbat primesc textul deja extras al blob-ului
+-- (o încărcare duplicat este căutabilă imediat)
+CREATE OR REPLACE FUNCTION documents_search_vector_trg() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := document_search_vector(NEW.title, NEW.file_name,
+        (SELECT content_text FROM document_blobs WHERE sha256 = NEW.content_hash));
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS documents_search_vector ON documents;
+CREATE TRIGGER documents_search_vector BEFORE INSERT OR UPDATE OF title, file_name, content_hash ON documents
+    FOR EACH ROW EXECUTE FUNCTION documents_search_vector_trg();
+
+-- Textul extras ulterior ajunge în toate documentele care referă blob-ul. Tabelele de
+-- tranziție nu pot fi folosite cu UPDATE OF <coloane>, deci filtrăm modificările aici.
+CREATE OR REPLACE FUNCTION document_blobs_text_trg() RETURNS trigger AS $$
+BEGIN
+    UPDATE documents d
+    SET search_vector = document_search_vector(d.title, d.file_name, n.content_text)
+    FROM new_rows n
+    JOIN old_rows o ON o.sha256 = n.sha256
+    WHERE d.content_hash = n.sha256
+      AND n.content_text IS DISTINCT FROM o.content_text;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS document_blobs_text ON document_blobs;
+CREATE TRIGGER document_blobs_text AFTER UPDATE ON document_blobs
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION document_blobs_text_trg();
@@ -0,0 +1,14 @@
+-- Indexuri pentru lista paginată de documente (get_documents / get_documents_page).
+-- Paginarea keyset compară (upload_date, id) cu ultimul rând din pagina anterioară, iar
+-- intervalul de date este o condiție pe upload_date: ambele sunt servite de indexuri
+-- (filtru, upload_date DESC, id DESC). Acestea înlocuiesc indexurile din migrația 0003,
+-- care nu conțineau id-ul.
+CREATE INDEX IF NOT EXISTS idx_documents_upload_date_id ON documents (upload_date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_documents_supplier_upload_date_id ON documents (supplier_id, upload_date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_documents_product_upload_date_id ON documents (product_id, upload_date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_documents_category_upload_date_id ON documents (category, upload_date DESC, id DESC);
+
+DROP INDEX IF EXISTS idx_documents_upload_date;
+DROP INDEX IF EXISTS idx_documents_supplier_id;
+DROP INDEX IF EXISTS idx_documents_product_id;
+DROP INDEX IF EXISTS idx_documents_category;
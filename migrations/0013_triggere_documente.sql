@@ -0,0 +1,71 @@
+-- Corectează triggerele documentelor din migrațiile 0010 și 0011, care se apelau reciproc la
+-- nesfârșit: triggerele la nivel de instrucțiune rulează și când instrucțiunea nu modifică
+-- niciun rând, deci UPDATE documents -> UPDATE document_blobs -> UPDATE documents -> ...
+-- Acum fiecare trigger se oprește imediat dacă tabelele de tranziție nu conțin o modificare
+-- relevantă (content_hash pentru numărul de referințe, content_text pentru căutare).
+-- Verificare pe o schemă nou creată: python database.py check-migrations
+
+CREATE OR REPLACE FUNCTION document_blobs_ref_count_trg() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        IF NOT EXISTS (SELECT 1 FROM new_rows WHERE content_hash IS NOT NULL) THEN
+            RETURN NULL;
+        END IF;
+        UPDATE document_blobs b SET
+            ref_count = b.ref_count + d.delta,
+            unreferenced_since = NULL
+        FROM (SELECT content_hash, COUNT(*) AS delta FROM new_rows
+              WHERE content_hash IS NOT NULL GROUP BY 1) d
+        WHERE b.sha256 = d.content_hash;
+    ELSIF TG_OP = 'DELETE' THEN
+        IF NOT EXISTS (SELECT 1 FROM old_rows WHERE content_hash IS NOT NULL) THEN
+            RETURN NULL;
+        END IF;
+        UPDATE document_blobs b SET
+            ref_count = b.ref_count - d.delta,
+            unreferenced_since = CASE WHEN b.ref_count - d.delta <= 0 THEN CURRENT_TIMESTAMP END
+        FROM (SELECT content_hash, COUNT(*) AS delta FROM old_rows
+              WHERE content_hash IS NOT NULL GROUP BY 1) d
+        WHERE b.sha256 = d.content_hash;
+    ELSE
+        -- Majoritatea actualizărilor (titlu, search_vector) nu schimbă blob-ul referit
+        IF NOT EXISTS (SELECT 1 FROM new_rows n JOIN old_rows o USING (id)
+                       WHERE n.content_hash IS DISTINCT FROM o.content_hash) THEN
+            RETURN NULL;
+        END IF;
+        -- Actualizările pot muta documente de pe un blob pe altul
+        UPDATE document_blobs b SET
+            ref_count = b.ref_count + d.delta,
+            unreferenced_since = CASE WHEN b.ref_count + d.delta <= 0 THEN CURRENT_TIMESTAMP END
+        FROM (
+            SELECT content_hash, SUM(delta) AS delta
+            FROM (
+                SELECT content_hash, 1 AS delta FROM new_rows WHERE content_hash IS NOT NULL
+                UNION ALL
+                SELECT content_hash, -1 FROM old_rows WHERE content_hash IS NOT NULL
+            ) changes
+            GROUP BY content_hash
+            HAVING SUM(delta) <> 0
+        ) d
+        WHERE b.sha256 = d.content_hash;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION document_blobs_text_trg() RETURNS trigger AS $$
+BEGIN
+    -- Actualizările numărului de referințe și ale stării extragerii nu schimbă textul
+    IF NOT EXISTS (SELECT 1 FROM new_rows n JOIN old_rows o USING (sha256)
+                   WHERE n.content_text IS DISTINCT FROM o.content_text) THEN
+        RETURN NULL;
+    END IF;
+    UPDATE documents d
+    SET search_vector = document_search_vector(d.title, d.file_name, n.content_text)
+    FROM new_rows n
+    JOIN old_rows o ON o.sha256 = n.sha256
+    WHERE d.content_hash = n.sha256
+      AND n.content_text IS DISTINCT FROM o.content_text;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
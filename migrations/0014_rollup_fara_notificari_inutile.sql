@@ -0,0 +1,147 @@
+-- Triggerele tabelelor agregate (migrația 0006) rulau la fiecare instrucțiune un DELETE al
+-- rândurilor golite și un INSERT ... ON CONFLICT, chiar fără nicio diferență de aplicat.
+-- Fiind instrucțiuni pe tabelele agregate, ambele declanșau notificarea de modificare, deci
+-- orice editare a unui produs (ex. descrierea) invalida cache-ul graficelor. Acum:
+--   * actualizările care nu ating coloanele agregate nu modifică tabelele agregate;
+--   * rândurile sunt șterse doar dacă tabelele de tranziție au adus numărul lor la 0.
+
+CREATE OR REPLACE FUNCTION stock_value_by_category_trg() RETURNS trigger AS $$
+DECLARE
+    emptied INTEGER;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO stock_value_by_category AS t (category, stock_value, products_count)
+        SELECT COALESCE(category, ''), COALESCE(SUM(stock_quantity * purchase_price), 0), COUNT(*)
+        FROM new_rows
+        GROUP BY 1
+        ON CONFLICT (category) DO UPDATE SET
+            stock_value = t.stock_value + EXCLUDED.stock_value,
+            products_count = t.products_count + EXCLUDED.products_count,
+            updated_at = CURRENT_TIMESTAMP;
+        RETURN NULL;
+    ELSIF TG_OP = 'DELETE' THEN
+        WITH changed AS (
+            UPDATE stock_value_by_category t SET
+                stock_value = t.stock_value - d.val,
+                products_count = t.products_count - d.cnt,
+                updated_at = CURRENT_TIMESTAMP
+            FROM (
+                SELECT COALESCE(category, '') AS category,
+                       COALESCE(SUM(stock_quantity * purchase_price), 0) AS val, COUNT(*) AS cnt
+                FROM old_rows
+                GROUP BY 1
+            ) d
+            WHERE t.category = d.category
+            RETURNING t.products_count
+        )
+        SELECT COUNT(*) INTO emptied FROM changed WHERE products_count <= 0;
+    ELSE
+        IF NOT EXISTS (
+            SELECT 1 FROM new_rows n JOIN old_rows o USING (id)
+            WHERE n.category IS DISTINCT FROM o.category
+               OR n.stock_quantity IS DISTINCT FROM o.stock_quantity
+               OR n.purchase_price IS DISTINCT FROM o.purchase_price
+        ) THEN
+            RETURN NULL;
+        END IF;
+        -- Actualizările pot muta produse între categorii: aplicăm vechile rânduri cu minus
+        WITH changed AS (
+            INSERT INTO stock_value_by_category AS t (category, stock_value, products_count)
+            SELECT category, SUM(val), SUM(cnt)
+            FROM (
+                SELECT COALESCE(category, '') AS category,
+                       COALESCE(stock_quantity * purchase_price, 0) AS val, 1 AS cnt
+                FROM new_rows
+                UNION ALL
+                SELECT COALESCE(category, ''), -COALESCE(stock_quantity * purchase_price, 0), -1
+                FROM old_rows
+            ) d
+            GROUP BY category
+            HAVING SUM(val) <> 0 OR SUM(cnt) <> 0
+            ON CONFLICT (category) DO UPDATE SET
+                stock_value = t.stock_value + EXCLUDED.stock_value,
+                products_count = t.products_count + EXCLUDED.products_count,
+                updated_at = CURRENT_TIMESTAMP
+            RETURNING t.products_count
+        )
+        SELECT COUNT(*) INTO emptied FROM changed WHERE products_count <= 0;
+    END IF;
+    IF emptied > 0 THEN
+        DELETE FROM stock_value_by_category WHERE products_count <= 0;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION monthly_purchases_trg() RETURNS trigger AS $$
+DECLARE
+    emptied INTEGER;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO monthly_purchases_by_supplier AS t (month, supplier_id, total_value, total_quantity, entries_count)
+        SELECT date_trunc('month', entry_date)::date, COALESCE(supplier_id, 0),
+               SUM(quantity * unit_price), SUM(quantity), COUNT(*)
+        FROM new_rows
+        GROUP BY 1, 2
+        ON CONFLICT (month, supplier_id) DO UPDATE SET
+            total_value = t.total_value + EXCLUDED.total_value,
+            total_quantity = t.total_quantity + EXCLUDED.total_quantity,
+            entries_count = t.entries_count + EXCLUDED.entries_count,
+            updated_at = CURRENT_TIMESTAMP;
+        RETURN NULL;
+    ELSIF TG_OP = 'DELETE' THEN
+        WITH changed AS (
+            UPDATE monthly_purchases_by_supplier t SET
+                total_value = t.total_value - d.val,
+                total_quantity = t.total_quantity - d.qty,
+                entries_count = t.entries_count - d.cnt,
+                updated_at = CURRENT_TIMESTAMP
+            FROM (
+                SELECT date_trunc('month', entry_date)::date AS month, COALESCE(supplier_id, 0) AS supplier_id,
+                       SUM(quantity * unit_price) AS val, SUM(quantity) AS qty, COUNT(*) AS cnt
+                FROM old_rows
+                GROUP BY 1, 2
+            ) d
+            WHERE t.month = d.month AND t.supplier_id = d.supplier_id
+            RETURNING t.entries_count
+        )
+        SELECT COUNT(*) INTO emptied FROM changed WHERE entries_count <= 0;
+    ELSE
+        IF NOT EXISTS (
+            SELECT 1 FROM new_rows n JOIN old_rows o USING (id)
+            WHERE n.entry_date IS DISTINCT FROM o.entry_date
+               OR n.supplier_id IS DISTINCT FROM o.supplier_id
+               OR n.quantity IS DISTINCT FROM o.quantity
+               OR n.unit_price IS DISTINCT FROM o.unit_price
+        ) THEN
+            RETURN NULL;
+        END IF;
+        WITH changed AS (
+            INSERT INTO monthly_purchases_by_supplier AS t (month, supplier_id, total_value, total_quantity, entries_count)
+            SELECT month, supplier_id, SUM(val), SUM(qty), SUM(cnt)
+            FROM (
+                SELECT date_trunc('month', entry_date)::date AS month, COALESCE(supplier_id, 0) AS supplier_id,
+                       quantity * unit_price AS val, quantity AS qty, 1 AS cnt
+                FROM new_rows
+                UNION ALL
+                SELECT date_trunc('month', entry_date)::date, COALESCE(supplier_id, 0),
+                       -(quantity * unit_price), -quantity, -1
+                FROM old_rows
+            ) d
+            GROUP BY month, supplier_id
+            HAVING SUM(val) <> 0 OR SUM(qty) <> 0 OR SUM(cnt) <> 0
+            ON CONFLICT (month, supplier_id) DO UPDATE SET
+                total_value = t.total_value + EXCLUDED.total_value,
+                total_quantity = t.total_quantity + EXCLUDED.total_quantity,
+                entries_count = t.entries_count + EXCLUDED.entries_count,
+                updated_at = CURRENT_TIMESTAMP
+            RETURNING t.entries_count
+        )
+        SELECT COUNT(*) INTO emptied FROM changed WHERE entries_count <= 0;
+    END IF;
+    IF emptied > 0 THEN
+        DELETE FROM monthly_purchases_by_supplier WHERE entries_count <= 0;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
@@ -10,9 +10,12 @@ st.set_page_config(page_title='Dashboard - LED/LCD Import Management', layout='w
 st.title('Dashboard Sistem')
 st.markdown('Vizualizare centralizată a sistemului de gestiune importuri LED/LCD')
 
+# Datele paginii sunt citite în paralel; o secțiune care eșuează nu le blochează pe celelalte
+data = db.load_dashboard_data()
+
 # Obține statisticile generale
 try:
-    stats = db.get_stats()
+    stats = data.result('stats')
     
     # Calculează valorile pentru afișare
     suppliers_count = stats['suppliers_count']
@@ -57,27 +60,17 @@ with col4:
 st.subheader('Produse cu Stoc Scăzut')
 
 try:
-    stock_alerts = db.get_stock_alerts()
+    stock_alerts = data.result('stock_alerts')
     
-    if not stock_alerts:
+    if stock_alerts.empty:
         st.success("Nu există produse cu stoc sub limita de alertă.")
     else:
         st.warning(f"{len(stock_alerts)} produse au stoc scăzut și necesită reaprovizionare.")
         
         # Tabel cu cele mai urgente 5 produse cu stoc scăzut
-        top_alerts = sorted(stock_alerts, key=lambda x: x['stock_quantity'])[:5]
-        
-        table_data = []
-        for p in top_alerts:
-            table_data.append({
-                "SKU": p['sku'],
-                "Produs": p['name'],
-                "Stoc Actual": p['stock_quantity'],
-                "Limită Alertă": p['stock_alert_threshold'],
-                "Furnizor": p['supplier_name']
-            })
-        
-        df = pd.DataFrame(table_data)
+        top_alerts = stock_alerts.nsmallest(5, 'stock_quantity')
+        df = db.label_frame(top_alerts, ['sku', 'name', 'stock_quantity', 'stock_alert_threshold', 'supplier_name'],
+                            {'name': 'Produs', 'stock_quantity': 'Stoc Actual'})
         st.dataframe(df)
         
         if len(stock_alerts) > 5:
@@ -89,26 +82,16 @@ except Exception as e:
 st.subheader('Ultimele Intrări în Stoc')
 
 try:
-    stock_entries = db.get_stock_entries()
+    # Din baza de date s-au citit doar ultimele 5 intrări, cele afișate
+    recent_entries = data.result('recent_entries')
     
-    if not stock_entries:
+    if not recent_entries:
         st.info("Nu există înregistrări de intrări în stoc.")
     else:
-        # Afișăm doar ultimele 5 intrări
-        recent_entries = stock_entries[:5]
-        
-        table_data = []
-        for entry in recent_entries:
-            table_data.append({
-                "Data": entry['entry_date'].strftime('%d.%m.%Y') if entry['entry_date'] else 'N/A',
-                "Produs": entry['product_name'],
-                "Cantitate": entry['quantity'],
-                "Preț Unitar": f"{entry['unit_price']:.2f} Lei",
-                "Furnizor": entry['supplier_name'],
-                "Factură": entry['invoice_number']
-            })
-        
-        df = pd.DataFrame(table_data)
+        entries = pd.DataFrame.from_records(recent_entries, columns=db.STOCK_ENTRY_COLUMNS)
+        df = db.label_frame(entries, ['entry_date', 'product_name', 'quantity', 'unit_price', 'supplier_name', 'invoice_number'])
+        df['Data'] = pd.to_datetime(entries['entry_date']).dt.strftime('%d.%m.%Y').fillna('N/A')
+        df['Preț Unitar'] = entries['unit_price'].map('{:.2f} Lei'.format)
         st.dataframe(df)
 except Exception as e:
     st.error(f"Eroare la încărcarea intrărilor de stoc: {str(e)}")
@@ -118,22 +101,13 @@ st.subheader('Distribuția Produselor pe Furnizori')
 
 try:
     # Calculăm numărul de produse per furnizor
-    supplier_products = {}
-    for product in db.get_products():
-        supplier_name = product['supplier_name']
-        if supplier_name:
-            if supplier_name in supplier_products:
-                supplier_products[supplier_name] += 1
-            else:
-                supplier_products[supplier_name] = 1
+    products = data.result('products')
+    supplier_products = products.loc[products['supplier_name'] != '', 'supplier_name'].value_counts(sort=False)
     
-    if supplier_products:
-        supplier_data = pd.DataFrame({
-            'Furnizor': list(supplier_products.keys()),
-            'Număr Produse': list(supplier_products.values())
-        })
+    if not supplier_products.empty:
+        supplier_data = supplier_products.rename_axis('Furnizor').to_frame('Număr Produse')
         
-        st.bar_chart(supplier_data.set_index('Furnizor'))
+        st.bar_chart(supplier_data)
     else:
         st.info("Nu există date pentru a genera graficul.")
 except Exception as e:
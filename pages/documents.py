@@ -1,35 +1,48 @@
 import streamlit as st
 import pandas as pd
 import database as db
+import document_export
+import document_store
+import document_text
+import file_server
+import html
 import os
-import base64
-from datetime import datetime
+import secrets
+from datetime import timedelta
 
 # Configurare pagină
 st.set_page_config(page_title='Documente - LED/LCD Import Management', layout='wide')
 
-# Directorul pentru documente
-DOCUMENTS_DIR = "uploaded_documents"
-if not os.path.exists(DOCUMENTS_DIR):
-    os.makedirs(DOCUMENTS_DIR)
-
 # Header
 st.title('Gestiune Documente')
 st.markdown('Încărcare și management documente pentru importurile de produse LED/LCD.')
 
+# Documentele sunt descărcate prin URL-uri semnate de la serverul din file_server.py, valabile
+# doar pentru sesiunea utilizatorului autentificat; afișarea listei nu citește fișierele
+file_server.start_server()
+file_base_url = file_server.get_base_url(st.context.headers.get('Host') if hasattr(st, 'context') else None)
+current_user = st.session_state.get('user')
+# Textul documentelor încărcate este extras în fundal, pentru căutarea în conținut
+document_text.start_worker()
+if current_user and 'download_session' not in st.session_state:
+    st.session_state.download_session = secrets.token_urlsafe(24)
+
 # Funcție pentru download fișiere cu iconițe
-def get_binary_file_downloader_html(bin_file_path, file_label, is_admin=False):
-    with open(bin_file_path, 'rb') as f:
-        data = f.read()
-    b64 = base64.b64encode(data).decode()
+def get_binary_file_downloader_html(bin_file_path, file_label, is_admin=False, file_name=None, doc_id=None):
+    url = None
+    if current_user:
+        url = file_server.download_url(bin_file_path, st.session_state.download_session, current_user.get('id'),
+                                       file_name, file_base_url)
+    if url is None:
+        return '<span title="Autentificați-vă pentru a descărca">—</span>'
     
     # Iconiță de descărcare - folosim JavaScript direct pentru a evita erorile React
-    download_icon = f"""<a href="data:application/octet-stream;base64,{b64}" download="{os.path.basename(bin_file_path)}" class="icon-btn download-btn" title="Descarcă fișier"><svg xmlns="http://www.w3.org/2000/svg" width="24" height="24" viewBox="0 0 24 24" fill="none" stroke="#2980b9" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><path d="M21 15v4a2 2 0 0 1-2 2H5a2 2 0 0 1-2-2v-4"></path><polyline points="7 10 12 15 17 10"></polyline><line x1="12" y1="15" x2="12" y2="3"></line></svg></a>"""
+    download_icon = f"""<a href="{url}" class="icon-btn download-btn" title="Descarcă fișier"><svg xmlns="http://www.w3.org/2000/svg" width="24" height="24" viewBox="0 0 24 24" fill="none" stroke="#2980b9" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><path d="M21 15v4a2 2 0 0 1-2 2H5a2 2 0 0 1-2-2v-4"></path><polyline points="7 10 12 15 17 10"></polyline><line x1="12" y1="15" x2="12" y2="3"></line></svg></a>"""
     
     # Adăugam butonul de ștergere dacă utilizatorul este admin
     delete_icon = ""
     if is_admin:
-        doc_id = os.path.basename(bin_file_path).split('.')[0]  # extragem un ID pentru document
+        doc_id = doc_id or os.path.basename(bin_file_path).split('.')[0]  # ID-ul documentului
         # Folosim un anchor tag în loc de buton pentru a evita erorile React cu onClick
         # Înlocuim onclick cu JavaScript adăugat prin addEventListener pentru a preveni erorile React
         delete_icon = f"""<a href="#" class="icon-btn delete-btn" id="delete-{doc_id}" title="Șterge fișier" style="display:inline-flex;margin:0 5px;text-decoration:none;"><svg xmlns="http://www.w3.org/2000/svg" width="24" height="24" viewBox="0 0 24 24" fill="none" stroke="#e74c3c" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><polyline points="3 6 5 6 21 6"></polyline><path d="M19 6v14a2 2 0 0 1-2 2H7a2 2 0 0 1-2-2V6m3 0V4a2 2 0 0 1 2-2h4a2 2 0 0 1 2 2v2"></path><line x1="10" y1="11" x2="10" y2="17"></line><line x1="14" y1="11" x2="14" y2="17"></line></svg></a><script>document.addEventListener('DOMContentLoaded',function(){{document.getElementById('delete-{doc_id}').addEventListener('click',function(e){{e.preventDefault();if(confirm('Sigur doriți să ștergeți documentul {file_label}?')){{alert('Document {file_label} șters (simulare)');}}}});}});</script>"""
@@ -57,76 +70,102 @@ def get_binary_file_downloader_html(bin_file_path, file_label, is_admin=False):
     
     return styles + download_icon + delete_icon
 
+DOCUMENT_CATEGORIES = ["Factură", "Certificare", "Specificații", "Declarație Vamală", "Altele"]
+PAGE_SIZES = [25, 50, 100]
+
 # Tab-uri pentru diferite operațiuni
 tabs = st.tabs(["Listă Documente", "Încărcare Document"])
 
 with tabs[0]:
     st.header('Documente Disponibile')
     
-    # Simulăm documente din baza de date (în implementarea finală, acestea vor veni din tabelul 'documents')
-    documents_data = [
-        {"id": 1, "title": "Factură Shenzhen Display", "file_name": "invoice_sdt_2025_1.pdf", 
-         "category": "Factură", "supplier": "Shenzhen Display Tech", "upload_date": datetime(2025, 5, 1)},
-        {"id": 2, "title": "Certificat CE - LCD Panels", "file_name": "ce_cert_lcd_2025.pdf", 
-         "category": "Certificare", "supplier": "Shenzhen Display Tech", "upload_date": datetime(2025, 4, 15)},
-        {"id": 3, "title": "Factură Guangzhou LED", "file_name": "invoice_gzled_2025_1.pdf", 
-         "category": "Factură", "supplier": "Guangzhou LED Solutions", "upload_date": datetime(2025, 5, 5)},
-    ]
+    # Filtrele, căutarea și paginarea se fac în baza de date; lista nu citește fișierele
+    col1, col2 = st.columns(2)
+    with col1:
+        search_term = st.text_input("Caută document", placeholder="Titlu, nume fișier sau conținut (ex. număr factură, cod HS)")
+    with col2:
+        selected_category = st.selectbox("Filtru Categorie", options=["Toate"] + DOCUMENT_CATEGORIES)
     
-    # Creăm un tabel pentru afișarea documentelor
-    if documents_data:
-        # Filtre pentru documente
-        col1, col2 = st.columns(2)
-        with col1:
-            search_term = st.text_input("Caută document", placeholder="Nume sau categorie")
-        with col2:
-            category_options = ["Toate"] + list(set(doc["category"] for doc in documents_data))
-            selected_category = st.selectbox("Filtru Categorie", options=category_options)
+    col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
+    with col1:
+        suppliers = db.get_suppliers()
+        supplier_names = {s['id']: s['name'] for s in suppliers}
+        selected_supplier_id = st.selectbox("Filtru Furnizor", options=[None] + list(supplier_names),
+                                            format_func=lambda supplier_id: supplier_names.get(supplier_id, "Toți"))
+    with col2:
+        start_date = st.date_input("De la data", value=None)
+    with col3:
+        end_date = st.date_input("Până la data", value=None)
+    with col4:
+        page_size = st.selectbox("Documente pe pagină", options=PAGE_SIZES)
+    
+    # Intervalul este inclusiv: ziua de sfârșit este adăugată întreagă
+    if end_date:
+        end_date = end_date + timedelta(days=1)
+    
+    # Paginare: cursorii paginilor vizitate sunt valabili doar pentru filtrele curente
+    search_term = search_term.strip()
+    documents_filters = (search_term, selected_category, selected_supplier_id, start_date, end_date, page_size)
+    if st.session_state.get('documents_filters') != documents_filters:
+        st.session_state.documents_filters = documents_filters
+        st.session_state.documents_cursors = [None]
+    cursors = st.session_state.documents_cursors
+    
+    page = db.get_documents_page(after=cursors[-1], limit=page_size, supplier_id=selected_supplier_id,
+                                 category=selected_category if selected_category != "Toate" else None,
+                                 query=search_term, start_date=start_date, end_date=end_date)
+    
+    if not page['items']:
+        st.info("Nu există documente care să corespundă criteriilor de filtrare.")
+    else:
+        is_admin = bool(current_user) and current_user.get('role') == 'Admin'
         
-        # Filtrăm documentele
-        filtered_docs = documents_data
-        if search_term:
-            filtered_docs = [d for d in filtered_docs if search_term.lower() in d['title'].lower() or 
-                            search_term.lower() in d['file_name'].lower()]
-        if selected_category and selected_category != "Toate":
-            filtered_docs = [d for d in filtered_docs if d['category'] == selected_category]
+        # Pregătim datele pentru tabel, doar pentru pagina curentă
+        docs_for_display = []
+        for doc in page['items']:
+            doc_with_action = {
+                "Titlu": html.escape(doc['title']),
+                "Categorie": html.escape(doc['category']),
+                "Furnizor": html.escape(doc['supplier_name'] or "—"),
+                "Produs": html.escape(doc['product_name'] or "—"),
+                "Data Încărcare": doc['upload_date'].strftime('%d.%m.%Y'),
+                "Fișier": html.escape(doc['file_name']),
+            }
+            if search_term:
+                # Fragmentele găsite în conținut, cu termenii căutați evidențiați
+                snippet = html.escape(doc['snippet'] or "").replace("&lt;b&gt;", "<b>").replace("&lt;/b&gt;", "</b>")
+                doc_with_action["Fragment"] = snippet
+            doc_with_action["Acțiuni"] = get_binary_file_downloader_html(doc['file_path'], "Fișier", is_admin,
+                                                                         doc['file_name'], doc['id'])
+            docs_for_display.append(doc_with_action)
         
-        # Afișăm documentele ca tabel cu opțiuni de download
-        if not filtered_docs:
-            st.info("Nu există documente care să corespundă criteriilor de filtrare.")
-        else:
-            # Pregătim datele pentru tabel
-            docs_for_display = []
-            for doc in filtered_docs:
-                # Simulăm că avem fișierul (în implementarea reală, verificăm dacă fișierul există)
-                file_path = os.path.join(DOCUMENTS_DIR, doc['file_name'])
-                # Verificăm dacă fișierul există pe disc
-                if not os.path.exists(file_path):
-                    # Pentru demo, creăm un fișier text gol cu acest nume
-                    with open(file_path, 'w') as f:
-                        f.write(f"Demo file for {doc['title']}")
-                
-                # Verificăm dacă utilizatorul este admin
-                is_admin = False
-                if 'user' in st.session_state and st.session_state.user:
-                    is_admin = st.session_state.user.get('role') == 'Admin'
-                
-                # Adăugăm în lista pentru afișare
-                doc_with_action = {
-                    "Titlu": doc['title'],
-                    "Categorie": doc['category'],
-                    "Furnizor": doc['supplier'],
-                    "Data Încărcare": doc['upload_date'].strftime('%d.%m.%Y'),
-                    "Fișier": doc['file_name'],
-                    "Acțiuni": get_binary_file_downloader_html(file_path, "Fișier", is_admin)
-                }
-                docs_for_display.append(doc_with_action)
-            
-            # Afișăm tabelul
-            docs_df = pd.DataFrame(docs_for_display)
-            st.write(docs_df.to_html(escape=False, index=False), unsafe_allow_html=True)
-    else:
-        st.info('Nu există documente în baza de date.')
+        # Afișăm tabelul
+        docs_df = pd.DataFrame(docs_for_display)
+        st.write(docs_df.to_html(escape=False, index=False), unsafe_allow_html=True)
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if len(cursors) > 1 and st.button("← Pagina anterioară", key="documents_prev"):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        st.caption(f"Pagina {len(cursors)}")
+    with col3:
+        if page['next_cursor'] and st.button("Pagina următoare →", key="documents_next"):
+            cursors.append(page['next_cursor'])
+            st.rerun()
+    
+    # Exportul ZIP (ex. pentru auditul vamal) conține toate documentele furnizorului, categoriei
+    # și perioadei selectate, cu manifest CSV; arhiva este generată în flux de serverul de fișiere
+    if current_user and page['items']:
+        export_name = document_export.export_file_name(supplier_names.get(selected_supplier_id), start_date,
+                                                       end_date - timedelta(days=1) if end_date else None)
+        export_link = file_server.export_url(st.session_state.download_session, current_user.get('id'),
+                                             selected_supplier_id,
+                                             selected_category if selected_category != "Toate" else None,
+                                             start_date, end_date, export_name, file_base_url)
+        st.markdown(f'<a href="{export_link}">📦 Descarcă arhiva ZIP cu documentele filtrate</a>'
+                    + (" (căutarea nu se aplică exportului)" if search_term else ""), unsafe_allow_html=True)
 
 with tabs[1]:
     st.header('Încarcă Document Nou')
@@ -137,7 +176,7 @@ with tabs[1]:
         
         with col1:
             doc_title = st.text_input("Titlu Document*")
-            doc_category = st.selectbox("Categorie", ["Factură", "Certificare", "Specificații", "Declarație Vamală", "Altele"])
+            doc_category = st.selectbox("Categorie", DOCUMENT_CATEGORIES)
         
         with col2:
             # Obținem lista de furnizori din baza de date
@@ -162,13 +201,25 @@ with tabs[1]:
             if not doc_title or not uploaded_file:
                 st.error("Titlul documentului și fișierul sunt obligatorii!")
             else:
-                # Salvăm fișierul
-                file_path = os.path.join(DOCUMENTS_DIR, uploaded_file.name)
-                with open(file_path, "wb") as f:
-                    f.write(uploaded_file.getbuffer())
-                
-                # Afișăm confirmarea
-                st.success(f"Documentul '{doc_title}' a fost încărcat cu succes!")
-                
-                # Opțiune de descărcare directă pentru documentul tocmai încărcat
-                st.markdown(get_binary_file_downloader_html(file_path, "fișierul tocmai încărcat"), unsafe_allow_html=True)
\ No newline at end of file
+                # Salvăm fișierul în depozitul de documente (conținutul identic nu se scrie din nou)
+                supplier_id = int(selected_supplier.split("ID: ")[1].strip(")")) if selected_supplier else None
+                product_id = int(selected_product.split("ID: ")[1].strip(")")) if selected_product else None
+                user_id = current_user.get('id') if current_user else 1
+                # Fișierul este transmis ca atare și citit în bucăți, fără o copie în memorie
+                try:
+                    result = db.save_document(doc_title, uploaded_file.name, uploaded_file, doc_category,
+                                              supplier_id, product_id, notes, user_id)
+                except document_store.DocumentQuotaError as e:
+                    st.error(str(e))
+                else:
+                    if result is None:
+                        st.error("Documentul nu a putut fi salvat.")
+                    else:
+                        # Afișăm confirmarea
+                        st.success(f"Documentul '{doc_title}' a fost încărcat cu succes!")
+                        if result['deduplicated']:
+                            st.info("Un fișier identic exista deja; documentul îl refolosește, fără spațiu suplimentar pe disc.")
+                        
+                        # Opțiune de descărcare directă pentru documentul tocmai încărcat
+                        st.markdown(get_binary_file_downloader_html(result['file_path'], "fișierul tocmai încărcat",
+                                                                    file_name=uploaded_file.name), unsafe_allow_html=True)
@@ -1,10 +1,10 @@
 import streamlit as st
 import pandas as pd
 import database as db
+import file_server
+import image_import
 from PIL import Image
 import os
-import base64
-import io
 
 # Configurare pagină
 st.set_page_config(page_title='Produse - LED/LCD Import Management', layout='wide')
@@ -18,25 +18,17 @@ if not os.path.exists(PRODUCT_IMAGES_DIR):
 st.title('Gestiune Produse')
 st.markdown('Vizualizare și management produse LED/LCD importate.')
 
+# Imaginile sunt servite prin URL de serverul din file_server.py (cache în browser, încărcare lazy)
+file_server.start_server()
+image_base_url = file_server.get_base_url(st.context.headers.get('Host') if hasattr(st, 'context') else None)
+
+# Stilurile pentru miniaturi și modal, incluse o singură dată per pagină
+THUMBNAIL_STYLE = "<style>.thumbnail{width:50px;height:50px;object-fit:cover;cursor:pointer;}.modal{display:none;position:fixed;z-index:1000;left:0;top:0;width:100%;height:100%;overflow:auto;background-color:rgba(0,0,0,0.7);}.modal-content{margin:5% auto;display:block;max-width:500px;max-height:500px;}.close{position:absolute;top:15px;right:35px;color:white;font-size:40px;font-weight:bold;cursor:pointer;}.zoom-icon{position:absolute;background-color:rgba(255,255,255,0.7);border-radius:50%;padding:2px;width:20px;height:20px;display:flex;align-items:center;justify-content:center;cursor:pointer;margin-left:35px;margin-top:-15px;}</style>"
+
 # Funcția pentru afișarea imaginilor miniatură și mărirea lor în modal
-def get_image_with_zoom(image_path, image_name, size=(50, 50)):
-    # Verificăm dacă fișierul există
-    if not os.path.exists(image_path):
-        # Imagine placeholder pentru produsele fără imagine
-        placeholder_img = Image.new('RGB', size, color='lightgray')
-        img_byte_arr = io.BytesIO()
-        placeholder_img.save(img_byte_arr, format='PNG')
-        img_byte_arr = img_byte_arr.getvalue()
-    else:
-        # Deschidem imaginea și redimensionăm la dimensiunea thumbnail
-        img = Image.open(image_path)
-        img.thumbnail(size)
-        img_byte_arr = io.BytesIO()
-        img.save(img_byte_arr, format='PNG')
-        img_byte_arr = img_byte_arr.getvalue()
-    
-    # Convertim imaginea în base64 pentru afișare în HTML
-    img_b64 = base64.b64encode(img_byte_arr).decode()
+def get_image_with_zoom(image_path, image_hash, image_name):
+    img_src = file_server.thumbnail_url(image_path, image_hash, 'small', image_base_url)
+    zoom_src = file_server.thumbnail_url(image_path, image_hash, 'large', image_base_url)
     
     # Generăm un ID unic pentru modal pentru a evita conflictele
     import uuid
@@ -45,11 +37,18 @@ def get_image_with_zoom(image_path, image_name, size=(50, 50)):
     # Cream HTML-ul care include imaginea miniatură și modalul pentru zoom
     # Eliminăm caracterele newline și spațiile nedorite
     # Am eliminat evenimentele React care generau erori (onmouseover, onmouseout, onclick)
-    html = f"""<style>.thumbnail{{width:{size[0]}px;height:{size[1]}px;object-fit:cover;cursor:pointer;}}.modal{{display:none;position:fixed;z-index:1000;left:0;top:0;width:100%;height:100%;overflow:auto;background-color:rgba(0,0,0,0.7);}}.modal-content{{margin:5% auto;display:block;max-width:500px;max-height:500px;}}.close{{position:absolute;top:15px;right:35px;color:white;font-size:40px;font-weight:bold;cursor:pointer;}}.zoom-icon{{position:absolute;background-color:rgba(255,255,255,0.7);border-radius:50%;padding:2px;width:20px;height:20px;display:flex;align-items:center;justify-content:center;cursor:pointer;margin-left:35px;margin-top:-15px;}}</style><div style="position:relative;display:inline-block;"><img src="data:image/png;base64,{img_b64}" class="thumbnail" alt="{image_name}" style="cursor:pointer;"><div class="zoom-icon"><svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="black" stroke-width="2"><circle cx="11" cy="11" r="8"></circle><line x1="21" y1="21" x2="16.65" y2="16.65"></line><line x1="11" y1="8" x2="11" y2="14"></line><line x1="8" y1="11" x2="14" y2="11"></line></svg></div></div><div id="modal-{unique_id}" class="modal"><span class="close" style="cursor:pointer;">&times;</span><img class="modal-content" src="data:image/png;base64,{img_b64}"></div><script>document.addEventListener('DOMContentLoaded',function(){{const thumbnail=document.querySelectorAll('.thumbnail');const modal=document.getElementById('modal-{unique_id}');const closeBtn=document.querySelectorAll('.close');thumbnail.forEach(img=>{{img.addEventListener('mouseover',function(){{this.style.opacity=0.8;}});img.addEventListener('mouseout',function(){{this.style.opacity=1;}})}});thumbnail.forEach(img=>{{img.addEventListener('click',function(){{modal.style.display='block';}});}});closeBtn.forEach(btn=>{{btn.addEventListener('click',function(){{modal.style.display='none';}});}});window.addEventListener('click',function(event){{if(event.target==modal){{modal.style.display='none';}}}});}});</script>"""
+    html = f"""<div style="position:relative;display:inline-block;"><img src="{img_src}" loading="lazy" class="thumbnail" alt="{image_name}" style="cursor:pointer;"><div class="zoom-icon"><svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="black" stroke-width="2"><circle cx="11" cy="11" r="8"></circle><line x1="21" y1="21" x2="16.65" y2="16.65"></line><line x1="11" y1="8" x2="11" y2="14"></line><line x1="8" y1="11" x2="14" y2="11"></line></svg></div></div><div id="modal-{unique_id}" class="modal"><span class="close" style="cursor:pointer;">&times;</span><img class="modal-content" src="{zoom_src}" loading="lazy"></div><script>document.addEventListener('DOMContentLoaded',function(){{const thumbnail=document.querySelectorAll('.thumbnail');const modal=document.getElementById('modal-{unique_id}');const closeBtn=document.querySelectorAll('.close');thumbnail.forEach(img=>{{img.addEventListener('mouseover',function(){{this.style.opacity=0.8;}});img.addEventListener('mouseout',function(){{this.style.opacity=1;}})}});thumbnail.forEach(img=>{{img.addEventListener('click',function(){{modal.style.display='block';}});}});closeBtn.forEach(btn=>{{btn.addEventListener('click',function(){{modal.style.display='none';}});}});window.addEventListener('click',function(event){{if(event.target==modal){{modal.style.display='none';}}}});}});</script>"""
     return html
 
-# Obține lista de produse
-products = db.get_products()
+# Sortările disponibile în catalog (cheile din db.PRODUCT_SORTS)
+SORT_OPTIONS = {
+    'name': "Nume",
+    'sku': "SKU",
+    'stock_quantity': "Stoc",
+    'purchase_price': "Preț achiziție",
+    'last_purchase_date': "Ultima achiziție",
+}
+PAGE_SIZES = [25, 50, 100]
 
 # Tab-uri pentru diferite operațiuni
 tabs = st.tabs(["Catalog Produse", "Adăugare Produs", "Alerte Stoc"])
@@ -57,86 +56,119 @@ tabs = st.tabs(["Catalog Produse", "Adăugare Produs", "Alerte Stoc"])
 with tabs[0]:
     st.header('Catalog Produse')
     
-    # Filtre pentru produse
+    # Filtre pentru produse; filtrarea și sortarea se fac în baza de date
     col1, col2, col3 = st.columns(3)
     with col1:
-        search_term = st.text_input("Caută produs", placeholder="SKU sau nume")
+        search_term = st.text_input("Caută produs", placeholder="SKU, nume, descriere sau specificații")
     with col2:
-        # Obține categoriile unice
-        categories = list(set([p['category'] for p in products if p['category']]))
+        categories = db.get_product_categories()
         selected_category = st.selectbox("Filtru Categorie", options=["Toate"] + categories)
     with col3:
         show_low_stock = st.checkbox("Arată doar stoc scăzut")
     
-    # Filtrare produse
-    filtered_products = products
+    # La căutare, rezultatele sunt ordonate după relevanță
+    search_term = search_term.strip()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        sort = st.selectbox("Sortare după", options=list(SORT_OPTIONS), format_func=SORT_OPTIONS.get,
+                            disabled=bool(search_term))
+    with col2:
+        descending = st.checkbox("Descrescător", disabled=bool(search_term))
+    with col3:
+        page_size = st.selectbox("Produse pe pagină", options=PAGE_SIZES)
+    
+    # Paginare: cursorii paginilor vizitate sunt valabili doar pentru filtrele curente
+    catalog_filters = (search_term, selected_category, show_low_stock, sort, descending, page_size)
+    if st.session_state.get('catalog_filters') != catalog_filters:
+        st.session_state.catalog_filters = catalog_filters
+        st.session_state.catalog_cursors = [None]
+    cursors = st.session_state.catalog_cursors
+    
+    category_filter = selected_category if selected_category != "Toate" else None
     if search_term:
-        filtered_products = [p for p in filtered_products if search_term.lower() in p['name'].lower() or search_term.lower() in p['sku'].lower()]
-    if selected_category and selected_category != "Toate":
-        filtered_products = [p for p in filtered_products if p['category'] == selected_category]
-    if show_low_stock:
-        filtered_products = [p for p in filtered_products if p['stock_quantity'] <= p['stock_alert_threshold']]
+        page = db.search_products(search_term, category=category_filter, low_stock=show_low_stock,
+                                  limit=page_size, after=cursors[-1])
+    else:
+        page = db.get_products_page(after=cursors[-1], limit=page_size, category=category_filter,
+                                    low_stock=show_low_stock, sort=sort, descending=descending)
+    page_products = pd.DataFrame.from_records(page['items'], columns=db.PRODUCT_COLUMNS)
     
-    if not filtered_products:
+    if page_products.empty:
         st.info('Nu există produse care să corespundă criteriilor de filtrare.')
     else:
-        # Pregătim datele pentru tabel
-        table_data = []
-        for product in filtered_products:
-            # Obținem calea imaginii
-            image_path = product.get('image_path', '')
-            if not image_path or not os.path.exists(image_path):
-                image_path = os.path.join(PRODUCT_IMAGES_DIR, f"placeholder_{product['id']}.png")
-                
-            # Generăm HTML pentru imagine cu zoom
-            image_html = get_image_with_zoom(image_path, f"product_{product['id']}")
-            
-            # Status stoc
-            stock_status = "🔴 Scăzut" if product['stock_quantity'] <= product['stock_alert_threshold'] else "🟢 OK"
-            
-            table_data.append({
-                "Imagine": image_html,
-                "SKU": product['sku'],
-                "Nume": product['name'],
-                "Categorie": product['category'],
-                "Furnizor": product['supplier_name'],
-                "Stoc": f"{product['stock_quantity']} ({stock_status})",
-                "Preț": f"{product['purchase_price']} Lei" if product['purchase_price'] else "N/A"
-            })
-        
-        # Convertim la DataFrame și afișăm
-        products_df = pd.DataFrame(table_data)
-        st.write(products_df.to_html(escape=False, index=False), unsafe_allow_html=True)
+        # Pregătim datele pentru tabel, doar pentru pagina curentă
+        low_stock_mask = page_products['stock_quantity'] <= page_products['stock_alert_threshold']
+        table_df = db.label_frame(page_products, ['sku', 'name', 'category', 'supplier_name'])
+        table_df.insert(0, "Imagine", [
+            get_image_with_zoom(image_path, image_hash, f"product_{product_id}")
+            for product_id, image_path, image_hash
+            in page_products[['id', 'image_path', 'image_hash']].itertuples(index=False)
+        ])
+        stock_status = low_stock_mask.map({True: "🔴 Scăzut", False: "🟢 OK"})
+        table_df["Stoc"] = page_products['stock_quantity'].astype(str) + " (" + stock_status + ")"
+        prices = page_products['purchase_price'].astype('float64')
+        table_df["Preț"] = (prices.round(2).astype(str) + " Lei").where(prices.notna() & (prices != 0), "N/A")
         
-        # Afișarea produselor ca carduri expandabile (alternativ)
+        # Afișăm tabelul
+        st.write(THUMBNAIL_STYLE + table_df.to_html(escape=False, index=False), unsafe_allow_html=True)
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if len(cursors) > 1 and st.button("← Pagina anterioară", key="catalog_prev"):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        st.caption(f"Pagina {len(cursors)}")
+    with col3:
+        if page['next_cursor'] and st.button("Pagina următoare →", key="catalog_next"):
+            cursors.append(page['next_cursor'])
+            st.rerun()
+    
+    if not page_products.empty:
+        # Detaliile sunt încărcate doar pentru produsul selectat din pagina curentă
         st.subheader("Vizualizare detaliată")
-        for product in filtered_products:
-            with st.expander(f"{product['name']} (SKU: {product['sku']})"):
-                col1, col2, col3 = st.columns([2, 1, 1])
-                
-                with col1:
-                    st.markdown(f"**Categorie:** {product['category']}")
-                    st.markdown(f"**Furnizor:** {product['supplier_name']}")
-                
-                with col2:
-                    st.markdown(f"**Stoc:** {product['stock_quantity']} buc")
-                    stock_status = "🔴 Stoc scăzut" if product['stock_quantity'] <= product['stock_alert_threshold'] else "🟢 Stoc OK"
-                    st.markdown(f"**Status:** {stock_status}")
-                
-                with col3:
-                    st.markdown(f"**Preț achiziție:** {product['purchase_price']} Lei" if product['purchase_price'] else "**Preț achiziție:** N/A")
-                    st.markdown(f"**Ultima achiziție:** {product['last_purchase_date'].strftime('%d.%m.%Y') if product['last_purchase_date'] else 'Niciodată'}")
-                
-                # Butoane de acțiune
-                col1, col2, col3, col4 = st.columns(4)
-                with col1:
-                    st.button("Vizualizare", key=f"view_{product['id']}")
-                with col2:
-                    st.button("Editare", key=f"edit_{product['id']}")
-                with col3:
-                    st.button("Adaugă stoc", key=f"stock_{product['id']}")
-                with col4:
-                    st.button("Șterge", key=f"delete_{product['id']}")
+        product_labels = {item['id']: f"{item['name']} (SKU: {item['sku']})" for item in page['items']}
+        selected_id = st.selectbox("Selectează produs", options=[None] + list(product_labels),
+                                   format_func=lambda product_id: product_labels.get(product_id, "—"))
+        product = db.get_product(selected_id) if selected_id else None
+        
+        if product:
+            col1, col2, col3, col4 = st.columns([1, 2, 1, 1])
+            
+            with col1:
+                st.image(file_server.thumbnail_url(product['image_path'], product['image_hash'], 'medium', image_base_url))
+            
+            with col2:
+                st.markdown(f"**Categorie:** {product['category']}")
+                st.markdown(f"**Furnizor:** {product['supplier_name']}")
+                if product['dimensions']:
+                    st.markdown(f"**Dimensiuni:** {product['dimensions']}")
+                if product['description']:
+                    st.markdown(product['description'])
+            
+            with col3:
+                st.markdown(f"**Stoc:** {product['stock_quantity']} buc")
+                stock_status = "🔴 Stoc scăzut" if product['stock_quantity'] <= product['stock_alert_threshold'] else "🟢 Stoc OK"
+                st.markdown(f"**Status:** {stock_status}")
+            
+            with col4:
+                st.markdown(f"**Preț achiziție:** {product['purchase_price']} Lei" if product['purchase_price'] else "**Preț achiziție:** N/A")
+                st.markdown(f"**Ultima achiziție:** {product['last_purchase_date'].strftime('%d.%m.%Y') if product['last_purchase_date'] else 'Niciodată'}")
+            
+            if product['technical_specs']:
+                with st.expander("Specificații Tehnice"):
+                    st.markdown(product['technical_specs'])
+            
+            # Butoane de acțiune
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.button("Vizualizare", key=f"view_{product['id']}")
+            with col2:
+                st.button("Editare", key=f"edit_{product['id']}")
+            with col3:
+                st.button("Adaugă stoc", key=f"stock_{product['id']}")
+            with col4:
+                st.button("Șterge", key=f"delete_{product['id']}")
 
 with tabs[1]:
     st.header('Adăugare Produs Nou')
@@ -184,30 +216,42 @@ with tabs[1]:
                     st.info("Imaginea produsului a fost salvată.")
                 
                 st.success(f"Produsul {name} a fost adăugat cu succes! (simulare)")
+    
+    # Import în bloc al imaginilor primite de la furnizori (fișiere denumite după SKU)
+    st.subheader("Import Imagini din Arhivă")
+    uploaded_archive = st.file_uploader("Arhivă ZIP cu imagini denumite după SKU", type=["zip"])
+    if uploaded_archive is not None and st.button("Importă imaginile"):
+        with st.spinner("Se procesează imaginile..."):
+            try:
+                report = image_import.import_product_images(uploaded_archive)
+            except Exception as e:
+                report = None
+                st.error(f"Eroare la importul imaginilor: {str(e)}")
+        
+        if report:
+            st.success(f"{report['updated']} produse actualizate din {report['files']} fișiere "
+                       f"({report['elapsed']:.1f}s, {report['images_per_second']:.1f} imagini/s).")
+            if report['unmatched']:
+                st.warning(f"{len(report['unmatched'])} fișiere nu corespund niciunui SKU.")
+                st.dataframe(pd.DataFrame({'Fișier': report['unmatched']}))
+            if report['skipped'] or report['errors']:
+                st.dataframe(pd.DataFrame(report['skipped'] + report['errors']).rename(
+                    columns={'file': 'Fișier', 'reason': 'Motiv'}))
 
 with tabs[2]:
     st.header('Alerte Stoc')
     
     # Obține produsele cu stoc scăzut
-    low_stock_products = [p for p in products if p['stock_quantity'] <= p['stock_alert_threshold']]
+    low_stock_products = db.get_stock_alerts(as_frame=True)
     
-    if not low_stock_products:
+    if low_stock_products.empty:
         st.success("Nu există produse cu stoc sub limita de alertă.")
     else:
         st.warning(f"{len(low_stock_products)} produse au stoc scăzut și necesită reaprovizionare.")
         
         # Tabel cu produsele cu stoc scăzut
-        table_data = []
-        for p in low_stock_products:
-            table_data.append({
-                "SKU": p['sku'],
-                "Produs": p['name'],
-                "Stoc Actual": p['stock_quantity'],
-                "Limită Alertă": p['stock_alert_threshold'],
-                "Furnizor": p['supplier_name']
-            })
-        
-        df = pd.DataFrame(table_data)
+        df = db.label_frame(low_stock_products, ['sku', 'name', 'stock_quantity', 'stock_alert_threshold', 'supplier_name'],
+                            {'name': 'Produs', 'stock_quantity': 'Stoc Actual'})
         st.dataframe(df)
         
         # Buton pentru generare comandă
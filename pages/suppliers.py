@@ -86,16 +86,30 @@ with tabs[2]:
         # Obținem ID-ul furnizorului din string-ul selectat
         supplier_id = int(selected_supplier.split("ID: ")[1].strip(")"))
         
-        # Aici ar trebui să obținem produsele pentru acest furnizor
-        # Simulăm câteva produse pentru demonstrație
         st.subheader(f"Produse pentru {selected_supplier.split(' (ID')[0]}")
         
-        sample_products = [
-            {"sku": "LCD-1001", "name": "LCD Display 15\"", "category": "LCD Panels", "stock": 15},
-            {"sku": "LCD-1002", "name": "LCD Display 17\"", "category": "LCD Panels", "stock": 8},
-            {"sku": "LED-2001", "name": "LED Backlight Module", "category": "LED Components", "stock": 24}
-        ]
+        # Paginare: păstrăm cursorii paginilor vizitate pentru furnizorul selectat
+        if st.session_state.get('supplier_products_for') != supplier_id:
+            st.session_state.supplier_products_for = supplier_id
+            st.session_state.supplier_products_cursors = [None]
+        cursors = st.session_state.supplier_products_cursors
         
-        # Afișăm produsele într-un tabel
-        products_df = pd.DataFrame(sample_products)
-        st.dataframe(products_df)
\ No newline at end of file
+        page = db.get_products_page(after=cursors[-1], limit=25, supplier_id=supplier_id)
+        
+        if not page['items']:
+            st.info("Nu există produse pentru acest furnizor.")
+        else:
+            # Afișăm produsele într-un tabel
+            products_df = db.label_frame(pd.DataFrame.from_records(page['items'], columns=db.PRODUCT_COLUMNS),
+                                         ['sku', 'name', 'category', 'stock_quantity'])
+            st.dataframe(products_df)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            if len(cursors) > 1 and st.button("← Pagina anterioară", key="supplier_products_prev"):
+                cursors.pop()
+                st.rerun()
+        with col2:
+            if page['next_cursor'] and st.button("Pagina următoare →", key="supplier_products_next"):
+                cursors.append(page['next_cursor'])
+                st.rerun()
\ No newline at end of file
@@ -36,7 +36,7 @@ if 'user' not in st.session_state or st.session_state.user is None or st.session
     st.stop()
 
 # Tab-uri principale
-tabs = st.tabs(["Listă Utilizatori", "Adaugă Utilizator", "Roluri și Permisiuni", "Jurnal Activitate"])
+tabs = st.tabs(["Listă Utilizatori", "Adaugă Utilizator", "Roluri și Permisiuni", "Jurnal Activitate", "Performanță Bază de Date"])
 
 with tabs[0]:
     st.header("Utilizatori Înregistrați")
@@ -276,4 +276,61 @@ with tabs[3]:
                 data=pd.DataFrame(logs_table).to_csv(index=False).encode('utf-8'),
                 file_name=f"jurnal_activitate_{datetime.datetime.now().strftime('%Y%m%d')}.csv",
                 mime="text/csv"
-            )
\ No newline at end of file
+            )
+
+with tabs[4]:
+    st.header("Performanță Bază de Date")
+    st.markdown(f"Statistici din ultimele {db.DB_QUERY_LOG_SIZE} interogări ale acestui proces. "
+                f"Pragul pentru jurnalul de interogări lente: {db.DB_SLOW_QUERY_MS:.0f} ms.")
+    
+    col1, col2 = st.columns([1, 4])
+    with col1:
+        if st.button("Golește statisticile"):
+            db.reset_query_log()
+    
+    # Percentile per funcție din database.py
+    st.subheader("Durată per funcție")
+    summary = db.get_query_summary()
+    if summary.empty:
+        st.info("Nu există încă interogări înregistrate.")
+    else:
+        st.dataframe(summary.rename(columns={
+            'function': 'Funcție',
+            'calls': 'Apeluri',
+            'p50_ms': 'p50 (ms)',
+            'p95_ms': 'p95 (ms)',
+            'p99_ms': 'p99 (ms)',
+            'max_ms': 'Maxim (ms)',
+            'total_ms': 'Total (ms)',
+            'rows_avg': 'Rânduri (medie)',
+            'wait_avg_ms': 'Așteptare conexiune (ms)',
+            'callers': 'Pagini',
+        }).round(2), use_container_width=True)
+    
+    # Pool și cache
+    pool_col, cache_col = st.columns(2)
+    with pool_col:
+        st.subheader("Pool conexiuni")
+        st.json(db.get_pool_stats())
+    with cache_col:
+        st.subheader("Cache citiri")
+        st.json(db.get_cache_stats())
+    
+    # Cele mai lente instrucțiuni recente, cu planul de execuție la cerere
+    st.subheader("Cele mai lente instrucțiuni recente")
+    slow_queries = db.get_slow_queries(limit=10)
+    if not slow_queries:
+        st.info("Nu există încă interogări înregistrate.")
+    for record in slow_queries:
+        with st.expander(f"{record['duration_ms']:.1f} ms - {record['function']} ({record['caller'] or 'necunoscut'}) - "
+                         f"{record['started_at'].strftime('%d.%m.%Y %H:%M:%S')}"):
+            st.code(record['statement'], language='sql')
+            st.markdown(f"**Rânduri:** {record['rows'] if record['rows'] is not None else '-'} &nbsp; "
+                        f"**Așteptare conexiune:** {record['wait_ms']:.1f} ms"
+                        + (" &nbsp; **Eșuată**" if record['failed'] else ""))
+            # Cheia urmează înregistrarea, nu poziția: lista se reordonează la fiecare rerulare
+            if st.button("Plan de execuție (EXPLAIN)", key=f"explain_{record['id']}"):
+                try:
+                    st.code('\n'.join(db.explain_query(record['statement'], record['params'])))
+                except Exception as e:
+                    st.error(f"Nu s-a putut obține planul de execuție: {str(e)}")
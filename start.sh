@@ -21,6 +21,17 @@ source venv/bin/activate
 echo "Instalez dependențele necesare..."
 pip install -r requirements.txt
 
+# Încarc configurația bazei de date generată de db_init.sh, dacă există
+if [ -f ".env" ]; then
+    set -a
+    source .env
+    set +a
+fi
+
+# Aplic migrațiile de schemă care nu au fost încă rulate
+echo "Aplic migrațiile bazei de date..."
+python database.py migrate
+
 # Creez directoarele necesare dacă nu există
 mkdir -p product_images
 mkdir -p uploaded_documents
@@ -0,0 +1,357 @@
+# Import în bloc al intrărilor în stoc din facturi (CSV sau XLSX).
+#
+# Rândurile sunt citite în flux, validate în Python și încărcate cu COPY într-un tabel
+# temporar; apoi, într-o singură tranzacție, SKU-urile sunt mapate la produse, intrările
+# sunt inserate în stock_entries și stocul/data ultimei achiziții sunt actualizate.
+#
+# Utilizare: python stock_import.py factura.xlsx [--supplier-id 3] [--dry-run]
+
+import csv
+import datetime
+import io
+import os
+import time
+from decimal import Decimal, InvalidOperation
+
+import database as db
+
+# Denumirile acceptate pentru coloane (antetul este comparat fără majuscule și spații)
+COLUMN_ALIASES = {
+    'sku': 'sku',
+    'cod': 'sku',
+    'cod produs': 'sku',
+    'quantity': 'quantity',
+    'cantitate': 'quantity',
+    'qty': 'quantity',
+    'unit price': 'unit_price',
+    'pret unitar': 'unit_price',
+    'preț unitar': 'unit_price',
+    'pret': 'unit_price',
+    'preț': 'unit_price',
+    'supplier id': 'supplier_id',
+    'furnizor id': 'supplier_id',
+    'id furnizor': 'supplier_id',
+    'entry date': 'entry_date',
+    'data': 'entry_date',
+    'data intrare': 'entry_date',
+    'invoice number': 'invoice_number',
+    'factura': 'invoice_number',
+    'factură': 'invoice_number',
+    'numar factura': 'invoice_number',
+    'număr factură': 'invoice_number',
+    'notes': 'notes',
+    'note': 'notes',
+    'observatii': 'notes',
+    'observații': 'notes',
+}
+
+REQUIRED_COLUMNS = ('sku', 'quantity', 'unit_price')
+
+STAGING_COLUMNS = ('line_no', 'sku', 'quantity', 'unit_price', 'supplier_id', 'entry_date', 'invoice_number', 'notes')
+
+DATE_FORMATS = ('%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%d.%m.%Y', '%d.%m.%Y %H:%M', '%d/%m/%Y')
+
+class ImportFormatError(ValueError):
+    """Fișierul nu poate fi citit ca listă de intrări în stoc (format sau antet invalid)."""
+
+def _normalize_header(name):
+    return ' '.join(str(name or '').replace('_', ' ').lower().split())
+
+def _map_header(header):
+    mapping = {}
+    for index, name in enumerate(header):
+        key = COLUMN_ALIASES.get(_normalize_header(name))
+        if key and key not in mapping:
+            mapping[key] = index
+    missing = [column for column in REQUIRED_COLUMNS if column not in mapping]
+    if missing:
+        raise ImportFormatError(f"Lipsesc coloanele obligatorii: {', '.join(missing)}")
+    return mapping
+
+def _read_csv(source):
+    sample = source.read(4096)
+    source.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    yield from csv.reader(source, dialect)
+
+def _read_xlsx(path):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFormatError("Pentru fișiere XLSX este necesar pachetul openpyxl")
+
+    # read_only citește foaia în flux, fără a încărca tot registrul în memorie
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+def read_rows(path, file_format=None):
+    """Produce rândurile brute (liste de valori) din fișier, începând cu antetul."""
+    file_format = (file_format or os.path.splitext(path)[1].lstrip('.')).lower()
+    if file_format in ('xlsx', 'xlsm'):
+        yield from _read_xlsx(path)
+    elif file_format in ('csv', 'txt'):
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            yield from _read_csv(f)
+    else:
+        raise ImportFormatError(f"Format neacceptat: {file_format}")
+
+def _parse_int(value):
+    if isinstance(value, int):
+        return value
+    number = Decimal(str(value).strip().replace(',', '.'))
+    if number != number.to_integral_value():
+        raise ValueError
+    return int(number)
+
+def _parse_decimal(value):
+    if isinstance(value, (int, float, Decimal)):
+        return Decimal(str(value))
+    return Decimal(str(value).strip().replace(' ', '').replace(',', '.'))
+
+def _parse_date(value):
+    if isinstance(value, datetime.datetime):
+        return value
+    if isinstance(value, datetime.date):
+        return datetime.datetime.combine(value, datetime.time.min)
+    text = str(value).strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(text, date_format)
+        except ValueError:
+            continue
+    raise ValueError
+
+def _cell(row, mapping, column):
+    index = mapping.get(column)
+    if index is None or index >= len(row):
+        return None
+    value = row[index]
+    if isinstance(value, str):
+        value = value.strip()
+    return None if value in (None, '') else value
+
+def validate_rows(rows, rejected, counters):
+    """Validează rândurile brute și produce tupluri gata de COPY.
+
+    Rândurile invalide sunt adăugate în `rejected` ca {'line', 'sku', 'reason'}.
+    `counters['rows_read']` numără rândurile de date citite.
+    """
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        raise ImportFormatError("Fișierul este gol")
+    mapping = _map_header(header)
+
+    for line_no, row in enumerate(rows, start=2):
+        if not any(value not in (None, '') for value in row):
+            continue
+        counters['rows_read'] += 1
+
+        sku = _cell(row, mapping, 'sku')
+        sku = str(sku) if sku is not None else None
+        try:
+            if not sku:
+                raise ValueError("SKU lipsă")
+            if len(sku) > 50:
+                raise ValueError("SKU prea lung")
+
+            try:
+                quantity = _parse_int(_cell(row, mapping, 'quantity'))
+            except (ValueError, TypeError, InvalidOperation):
+                raise ValueError("cantitate invalidă")
+            if quantity <= 0:
+                raise ValueError("cantitatea trebuie să fie pozitivă")
+
+            try:
+                unit_price = _parse_decimal(_cell(row, mapping, 'unit_price'))
+            except (ValueError, TypeError, InvalidOperation):
+                raise ValueError("preț unitar invalid")
+            if unit_price < 0 or unit_price >= Decimal('100000000'):
+                raise ValueError("preț unitar în afara intervalului")
+
+            supplier_id = _cell(row, mapping, 'supplier_id')
+            if supplier_id is not None:
+                try:
+                    supplier_id = _parse_int(supplier_id)
+                except (ValueError, TypeError, InvalidOperation):
+                    raise ValueError("ID furnizor invalid")
+
+            entry_date = _cell(row, mapping, 'entry_date')
+            if entry_date is not None:
+                try:
+                    entry_date = _parse_date(entry_date)
+                except ValueError:
+                    raise ValueError("dată invalidă")
+
+            invoice_number = _cell(row, mapping, 'invoice_number')
+            invoice_number = str(invoice_number)[:50] if invoice_number is not None else None
+            notes = _cell(row, mapping, 'notes')
+            notes = str(notes) if notes is not None else None
+        except ValueError as e:
+            rejected.append({'line': line_no, 'sku': sku or '', 'reason': str(e)})
+            continue
+
+        yield (line_no, sku, quantity, unit_price.quantize(Decimal('0.01')), supplier_id,
+               entry_date.isoformat(sep=' ') if entry_date else None, invoice_number, notes)
+
+class _CsvCopyStream:
+    """Adaptor de tip fișier pentru COPY ... FROM STDIN.
+
+    Serializează rândurile în CSV doar când PostgreSQL le cere, deci fișierul
+    sursă nu este niciodată ținut integral în memorie.
+    """
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator='\n')
+        self._pending = ''
+
+    def read(self, size=-1):
+        while size is None or size < 0 or len(self._pending) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._writer.writerow(row)
+            self._pending += self._buffer.getvalue()
+            self._buffer.seek(0)
+            self._buffer.truncate()
+
+        if size is None or size < 0:
+            data, self._pending = self._pending, ''
+        else:
+            data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+    readline = read
+
+MERGE_SQL = """
+    WITH matched AS (
+        SELECT st.line_no, p.id AS product_id, st.quantity, st.unit_price,
+               s.id AS supplier_id, COALESCE(st.entry_date, CURRENT_TIMESTAMP) AS entry_date,
+               st.invoice_number, st.notes
+        FROM stock_import_staging st
+        JOIN products p ON p.sku = st.sku
+        JOIN suppliers s ON s.id = COALESCE(st.supplier_id, %(supplier_id)s, p.supplier_id)
+    ),
+    inserted AS (
+        INSERT INTO stock_entries (product_id, quantity, unit_price, supplier_id, entry_date, invoice_number, notes)
+        SELECT product_id, quantity, unit_price, supplier_id, entry_date, invoice_number, notes
+        FROM matched
+        ORDER BY line_no
+        RETURNING product_id, quantity, entry_date
+    ),
+    updated AS (
+        UPDATE products p SET
+            stock_quantity = COALESCE(p.stock_quantity, 0) + agg.quantity,
+            last_purchase_date = GREATEST(p.last_purchase_date, agg.last_entry_date),
+            updated_at = CURRENT_TIMESTAMP
+        FROM (
+            SELECT product_id, SUM(quantity) AS quantity, MAX(entry_date) AS last_entry_date
+            FROM inserted
+            GROUP BY product_id
+        ) agg
+        WHERE p.id = agg.product_id
+        RETURNING p.id
+    )
+    SELECT (SELECT COUNT(*) FROM inserted), (SELECT COUNT(*) FROM updated)
+"""
+
+def ingest_stock_entries(path, supplier_id=None, file_format=None, dry_run=False):
+    """Importă intrările în stoc dintr-un fișier CSV/XLSX.
+
+    `supplier_id` este furnizorul implicit pentru rândurile fără coloana de furnizor
+    (altfel se folosește furnizorul produsului). Cu `dry_run=True` totul este validat
+    și încărcat în tabelul temporar, dar tranzacția este anulată.
+
+    Returnează un raport {rows_read, inserted, products_updated, rejected,
+    elapsed, rows_per_second}; `rejected` conține {'line', 'sku', 'reason'}.
+    """
+    start = time.monotonic()
+    rejected = []
+    counters = {'rows_read': 0}
+
+    with db.db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                CREATE TEMP TABLE stock_import_staging (
+                    line_no INTEGER NOT NULL,
+                    sku VARCHAR(50) NOT NULL,
+                    quantity INTEGER NOT NULL,
+                    unit_price NUMERIC(10, 2) NOT NULL,
+                    supplier_id INTEGER,
+                    entry_date TIMESTAMP,
+                    invoice_number VARCHAR(50),
+                    notes TEXT
+                ) ON COMMIT DROP
+            """)
+
+            rows = validate_rows(read_rows(path, file_format), rejected, counters)
+            cursor.copy_expert(
+                f"COPY stock_import_staging ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                _CsvCopyStream(rows),
+            )
+            cursor.execute("ANALYZE stock_import_staging")
+
+            # Rândurile care nu pot fi mapate la un produs sau furnizor existent
+            cursor.execute("""
+                SELECT st.line_no, st.sku,
+                       CASE WHEN p.id IS NULL THEN 'SKU necunoscut' ELSE 'furnizor necunoscut' END
+                FROM stock_import_staging st
+                LEFT JOIN products p ON p.sku = st.sku
+                LEFT JOIN suppliers s ON s.id = COALESCE(st.supplier_id, %(supplier_id)s, p.supplier_id)
+                WHERE p.id IS NULL OR s.id IS NULL
+            """, {'supplier_id': supplier_id})
+            rejected.extend({'line': line, 'sku': sku, 'reason': reason} for line, sku, reason in cursor.fetchall())
+
+            cursor.execute(MERGE_SQL, {'supplier_id': supplier_id})
+            inserted, products_updated = cursor.fetchone()
+
+        if dry_run:
+            conn.rollback()
+
+    elapsed = time.monotonic() - start
+    rejected.sort(key=lambda r: r['line'])
+    return {
+        'rows_read': counters['rows_read'],
+        'inserted': inserted,
+        'products_updated': products_updated,
+        'rejected': rejected,
+        'elapsed': elapsed,
+        'rows_per_second': counters['rows_read'] / elapsed if elapsed > 0 else 0.0,
+        'dry_run': dry_run,
+    }
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Import intrări în stoc din factură (CSV/XLSX)")
+    parser.add_argument('path', help="fișierul CSV sau XLSX")
+    parser.add_argument('--supplier-id', type=int, help="furnizorul implicit pentru rândurile fără furnizor")
+    parser.add_argument('--format', choices=['csv', 'xlsx'], help="formatul fișierului (implicit după extensie)")
+    parser.add_argument('--dry-run', action='store_true', help="validează fără a salva modificările")
+    args = parser.parse_args()
+
+    try:
+        report = ingest_stock_entries(args.path, supplier_id=args.supplier_id,
+                                      file_format=args.format, dry_run=args.dry_run)
+    except ImportFormatError as e:
+        print(f"Eroare: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    print(f"Rânduri citite: {report['rows_read']}")
+    print(f"Intrări inserate: {report['inserted']}" + (" (simulare, nimic salvat)" if report['dry_run'] else ""))
+    print(f"Produse actualizate: {report['products_updated']}")
+    print(f"Durată: {report['elapsed']:.2f}s ({report['rows_per_second']:.0f} rânduri/s)")
+    if report['rejected']:
+        print(f"Rânduri respinse: {len(report['rejected'])}")
+        for row in report['rejected']:
+            print(f"  linia {row['line']}: {row['sku'] or '-'} - {row['reason']}")
+        sys.exit(1)
@@ -0,0 +1,174 @@
+# Miniaturi pentru imaginile produselor, generate o singură dată și păstrate pe disc.
+#
+# Fiecare imagine sursă este identificată prin hash-ul SHA-256 al conținutului; miniaturile
+# sunt scrise în THUMBNAIL_CACHE_DIR/<primele 2 caractere>/<hash>_<variantă>.png, pentru
+# toate variantele din THUMBNAIL_SIZES deodată (imaginea este decodată o singură dată).
+# Directorul este limitat ca dimensiune: la depășire se șterg fișierele folosite cel mai
+# demult (data modificării este actualizată la fiecare citire).
+
+import functools
+import hashlib
+import io
+import os
+import threading
+import time
+
+from PIL import Image, ImageOps
+
+THUMBNAIL_CACHE_DIR = os.environ.get('THUMBNAIL_CACHE_DIR', 'thumbnail_cache')
+THUMBNAIL_CACHE_MAX_BYTES = int(os.environ.get('THUMBNAIL_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+
+# Variantele generate pentru fiecare imagine: nume -> dimensiunea maximă (lățime, înălțime)
+THUMBNAIL_SIZES = {
+    'small': (50, 50),     # tabelul din catalog
+    'medium': (200, 200),  # detaliile produsului
+    'large': (500, 500),   # imaginea mărită
+}
+
+# Verificarea dimensiunii directorului parcurge toate fișierele: nu o facem mai des de atât
+_PRUNE_INTERVAL = 60.0
+_prune_lock = threading.Lock()
+_last_prune = 0.0
+_write_lock = threading.Lock()
+
+def content_hash(file_data):
+    """Returnează hash-ul SHA-256 (hex) al conținutului imaginii."""
+    return hashlib.sha256(file_data).hexdigest()
+
+def _thumbnail_path(image_hash, size):
+    return os.path.join(THUMBNAIL_CACHE_DIR, image_hash[:2], f"{image_hash}_{size}.png")
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def create_thumbnails(file_data, image_hash=None):
+    """Generează toate variantele de miniatură pentru imaginea dată și returnează hash-ul ei.
+
+    Variantele deja existente în cache nu sunt generate din nou.
+    """
+    image_hash = image_hash or content_hash(file_data)
+    missing = [size for size in THUMBNAIL_SIZES if not os.path.exists(_thumbnail_path(image_hash, size))]
+    if not missing:
+        return image_hash
+
+    with Image.open(io.BytesIO(file_data)) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+        # De la varianta cea mai mare la cea mai mică: fiecare pornește de la precedenta
+        for size in sorted(missing, key=lambda s: THUMBNAIL_SIZES[s], reverse=True):
+            img.thumbnail(THUMBNAIL_SIZES[size])
+            buf = io.BytesIO()
+            img.save(buf, format='PNG', optimize=True)
+            _write_atomic(_thumbnail_path(image_hash, size), buf.getvalue())
+
+    _prune_if_due()
+    return image_hash
+
+@functools.lru_cache(maxsize=4096)
+def _file_hash(path, mtime_ns, file_size):
+    # Cheia include data modificării și dimensiunea: un fișier înlocuit primește un hash nou
+    with open(path, 'rb') as f:
+        return content_hash(f.read())
+
+def content_hash_for_path(image_path):
+    """Returnează hash-ul conținutului fișierului, memorat cât timp fișierul nu se schimbă."""
+    stat = os.stat(image_path)
+    return _file_hash(image_path, stat.st_mtime_ns, stat.st_size)
+
+def get_thumbnail(image_path=None, image_hash=None, size='small'):
+    """Returnează PNG-ul miniaturii (bytes) sau None dacă imaginea nu există.
+
+    Dacă miniatura lipsește din cache (produs importat înainte de cache sau fișier șters
+    la curățare), este generată acum din `image_path`.
+    """
+    if size not in THUMBNAIL_SIZES:
+        raise ValueError(f"Variantă de miniatură necunoscută: {size}")
+
+    try:
+        if not image_hash:
+            if not image_path or not os.path.exists(image_path):
+                return None
+            image_hash = content_hash_for_path(image_path)
+
+        path = _thumbnail_path(image_hash, size)
+        if not os.path.exists(path):
+            if not image_path or not os.path.exists(image_path):
+                return None
+            with _write_lock:
+                with open(image_path, 'rb') as f:
+                    create_thumbnails(f.read(), image_hash)
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        # Marcăm folosirea, pentru ordinea LRU a curățării
+        os.utime(path)
+        return data
+    except Exception as e:
+        print(f"Eroare la încărcarea miniaturii: {str(e)}")
+        return None
+
+@functools.lru_cache(maxsize=None)
+def get_placeholder(size='small'):
+    """Returnează PNG-ul imaginii placeholder pentru produsele fără imagine (generat o singură dată)."""
+    buf = io.BytesIO()
+    Image.new('RGB', THUMBNAIL_SIZES[size], color='lightgray').save(buf, format='PNG')
+    return buf.getvalue()
+
+def _prune_if_due():
+    global _last_prune
+    now = time.monotonic()
+    if now - _last_prune < _PRUNE_INTERVAL or not _prune_lock.acquire(blocking=False):
+        return
+    try:
+        _last_prune = now
+        prune_cache()
+    finally:
+        _prune_lock.release()
+
+def prune_cache(max_bytes=None):
+    """Șterge miniaturile folosite cel mai demult până când directorul încape în limită.
+
+    Returnează numărul de fișiere șterse.
+    """
+    max_bytes = THUMBNAIL_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    files = []
+    total = 0
+    for root, _, names in os.walk(THUMBNAIL_CACHE_DIR):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+    removed = 0
+    for _, file_size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= file_size
+        removed += 1
+    return removed
+
+def get_cache_stats():
+    """Returnează numărul de fișiere și spațiul ocupat de cache-ul de miniaturi."""
+    files = 0
+    total = 0
+    for root, _, names in os.walk(THUMBNAIL_CACHE_DIR):
+        for name in names:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+                files += 1
+            except OSError:
+                continue
+    return {'files': files, 'bytes': total, 'max_bytes': THUMBNAIL_CACHE_MAX_BYTES}